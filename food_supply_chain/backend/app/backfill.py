@@ -0,0 +1,187 @@
+"""
+Parallel eth_getLogs backfill with adaptive block ranges.
+
+Ranges are fetched (and decoded) concurrently on a worker pool, but
+applied to the store strictly in block order: finished ranges wait in a
+bounded buffer until every range before them is in, then contiguous
+results are written in one transaction. A range the node refuses as too
+large (result caps, response size limits, timeouts) is halved and both
+halves are retried; while results come back sparse the range size
+doubles, up to max_span.
+"""
+import logging
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Messages providers use for "narrow the range" (geth, Erigon, Alchemy, Infura, QuickNode, ...)
+RANGE_ERROR = re.compile(
+    r"more than \d+ results|too many (results|logs|blocks)|response size|size exceeded|limit exceeded"
+    r"|block range|range (is )?too (large|wide|big)|query timeout|timed? ?out",
+    re.IGNORECASE,
+)
+RANGE_ERROR_CODES = {-32005, -32602}
+
+
+def is_range_error(error: Exception) -> bool:
+    """Whether a get_logs failure means the block range should be split"""
+    if isinstance(error, TimeoutError) or "Timeout" in type(error).__name__:
+        return True
+    detail = error.args[0] if error.args else ""
+    if isinstance(detail, dict):
+        if detail.get("code") in RANGE_ERROR_CODES:
+            return True
+        detail = detail.get("message", "")
+    return bool(RANGE_ERROR.search(str(detail)))
+
+
+class LogBackfill:
+    """Fetch [start, end] with fetch_range(from, to) -> (events, to_block_hash)
+    and hand contiguous results to apply(events, last_block, last_block_hash)"""
+
+    def __init__(self, fetch_range: Callable[[int, int], Tuple[List[dict], str]],
+                 apply: Callable[[List[dict], int, str], None], workers: int = 4, initial_span: int = 2000,
+                 min_span: int = 1, max_span: int = 100_000, target_logs: int = 2000, flush_events: int = 5000,
+                 flush_seconds: float = 2.0, max_retries: int = 3, log_interval: float = 10.0,
+                 on_flush: Optional[Callable[[], None]] = None):
+        self.fetch_range = fetch_range
+        self.apply = apply
+        self.workers = workers
+        self.span = initial_span
+        self.min_span = min_span
+        self.max_span = max_span
+        self.target_logs = target_logs
+        self.flush_events = flush_events
+        self.flush_seconds = flush_seconds
+        self.max_retries = max_retries
+        self.log_interval = log_interval
+        self.on_flush = on_flush
+
+        self.start_block = self.end_block = None
+        self.applied_block: Optional[int] = None
+        self.events_applied = 0
+        self.splits = 0
+        self.retries = 0
+        self.in_flight = 0
+        self._started: Optional[float] = None
+
+    def progress(self) -> dict:
+        """Blocks applied, throughput and ETA of the current (or last) run"""
+        if self._started is None:
+            return {"running": False}
+        done = self.applied_block - self.start_block + 1
+        remaining = self.end_block - self.applied_block
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        rate = done / elapsed
+        return {
+            "running": remaining > 0,
+            "from_block": self.start_block,
+            "to_block": self.end_block,
+            "applied_block": self.applied_block,
+            "events": self.events_applied,
+            "blocks_per_second": round(rate, 1),
+            "eta_seconds": round(remaining / rate, 1) if rate > 0 else None,
+            "span": self.span,
+            "in_flight": self.in_flight,
+            "splits": self.splits,
+            "retries": self.retries,
+        }
+
+    def run(self, start: int, end: int) -> int:
+        """Backfill [start, end]; returns the number of events applied"""
+        self.start_block, self.end_block = start, end
+        self.applied_block = start - 1
+        self.events_applied = self.splits = self.retries = 0
+        self._started = time.monotonic()
+        logger.info(f"Backfilling blocks {start}..{end} with {self.workers} workers")
+
+        pending: Dict[object, Tuple[int, int, int]] = {}
+        finished: Dict[int, Tuple[int, List[dict], str]] = {}
+        next_start = next_apply = start
+        buffer: List[dict] = []
+        buffered_to: Optional[Tuple[int, str]] = None
+        last_flush = last_log = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backfill") as executor:
+
+            def submit(from_block: int, to_block: int, attempt: int = 0):
+                pending[executor.submit(self.fetch_range, from_block, to_block)] = (from_block, to_block, attempt)
+
+            def flush():
+                nonlocal buffer, buffered_to, last_flush
+                if buffered_to is not None:
+                    self.apply(buffer, *buffered_to)
+                    self.events_applied += len(buffer)
+                    self.applied_block = buffered_to[0]
+                    if self.on_flush is not None:
+                        self.on_flush()
+                buffer, buffered_to, last_flush = [], None, time.monotonic()
+
+            try:
+                while True:
+                    # Keep the pool busy, but bound how far fetching runs ahead of applying
+                    while len(pending) < self.workers and next_start <= end and len(finished) < self.workers * 4:
+                        to_block = min(next_start + self.span - 1, end)
+                        submit(next_start, to_block)
+                        next_start = to_block + 1
+                    self.in_flight = len(pending)
+                    if not pending:
+                        break
+
+                    done, _ = wait(pending, timeout=self.flush_seconds, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        from_block, to_block, attempt = pending.pop(future)
+                        try:
+                            events, block_hash = future.result()
+                        except Exception as e:
+                            if is_range_error(e) and to_block > from_block:
+                                middle = (from_block + to_block) // 2
+                                self.span = max(self.min_span, (to_block - from_block + 1) // 2)
+                                self.splits += 1
+                                submit(from_block, middle)
+                                submit(middle + 1, to_block)
+                            elif attempt < self.max_retries:
+                                self.retries += 1
+                                logger.debug(f"Retrying blocks {from_block}..{to_block}: {e}")
+                                submit(from_block, to_block, attempt + 1)
+                            else:
+                                raise
+                            continue
+                        finished[from_block] = (to_block, events, block_hash)
+                        if len(events) < self.target_logs // 4:
+                            self.span = min(self.max_span, self.span * 2)
+
+                    # Move every range that is now contiguous into the write buffer
+                    while next_apply in finished:
+                        to_block, events, block_hash = finished.pop(next_apply)
+                        buffer.extend(events)
+                        buffered_to = (to_block, block_hash)
+                        next_apply = to_block + 1
+                    if buffered_to is not None and (len(buffer) >= self.flush_events
+                                                    or time.monotonic() - last_flush >= self.flush_seconds):
+                        flush()
+
+                    if time.monotonic() - last_log >= self.log_interval:
+                        last_log = time.monotonic()
+                        self._log_progress()
+                flush()
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+
+        self.in_flight = 0
+        self._log_progress()
+        return self.events_applied
+
+    def _log_progress(self):
+        progress = self.progress()
+        eta = progress["eta_seconds"]
+        logger.info(
+            f"Backfill at block {progress['applied_block']}/{progress['to_block']}: "
+            f"{progress['blocks_per_second']} blocks/s, {progress['events']} events, "
+            f"span {progress['span']}, ETA {f'{eta:.0f}s' if eta is not None else 'n/a'}"
+        )
@@ -1,60 +1,228 @@
 from pathlib import Path
 import json
-from web3 import Web3
+import logging
+import threading
 from . import config
+from . import metrics
+from .tracing import span
 
-# Connect to your node
-w3 = Web3(Web3.HTTPProvider(config.RPC_URL))
+logger = logging.getLogger(__name__)
+
+ROLE_GRANTS = ("grantFarmerRole", "grantDistributorRole", "grantRetailerRole", "grantCustomerRole")
 
 # Correct path to ABI JSON - go up to food_supply_chain directory
 ARTIFACT_PATH = Path(__file__).parent.parent.parent / "artifacts" / "contracts" / "EnhancedFoodSupplyChain.sol" / "EnhancedFoodSupplyChain.json"
+# Legacy FoodSupplyChain (contracts/CropRegistry.sol), indexed alongside when LEGACY_CONTRACT_ADDRESS is set
+LEGACY_ARTIFACT_PATH = Path(__file__).parent.parent.parent / "artifacts" / "contracts" / "CropRegistry.sol" / "FoodSupplyChain.json"
+
+# web3 is imported and connected, and the artifact parsed, on first use
+# (or during the startup warmup) so importing the app stays fast.
+_w3 = None
+_artifacts = {}
+_init_lock = threading.Lock()
+
+
+def _create_web3():
+    """Connect to the configured provider
+
+    "http" talks to RPC_URL; "eth_tester" runs a py-evm chain inside this
+    process so tests and benchmarks need no external node.
+    """
+    from web3 import Web3
+    if config.BLOCKCHAIN_PROVIDER == "eth_tester":
+        from eth_tester import EthereumTester, PyEVMBackend
+        genesis = PyEVMBackend.generate_genesis_params(overrides={"gas_limit": config.IN_PROCESS_GAS_LIMIT})
+        return Web3(Web3.EthereumTesterProvider(EthereumTester(PyEVMBackend(genesis_parameters=genesis))))
+    if config.BLOCKCHAIN_PROVIDER != "http":
+        raise RuntimeError(f"Unknown BLOCKCHAIN_PROVIDER {config.BLOCKCHAIN_PROVIDER!r}")
+    if len(config.RPC_URLS) > 1:
+        from .rpc_pool import MultiEndpointProvider
+        return Web3(MultiEndpointProvider(
+            config.RPC_URLS,
+            primary=config.RPC_PRIMARY_URL,
+            hedge_percentile=config.RPC_HEDGE_PERCENTILE,
+            hedge_min_delay=config.RPC_HEDGE_MIN_SECONDS,
+            timeout=config.RPC_TIMEOUT_SECONDS,
+            failure_threshold=config.RPC_BREAKER_FAILURES,
+            cooldown=config.RPC_BREAKER_COOLDOWN_SECONDS,
+        ))
+    return Web3(Web3.HTTPProvider(config.RPC_URLS[0], request_kwargs={"timeout": config.RPC_TIMEOUT_SECONDS}))
+
+
+def get_web3():
+    global _w3
+    if _w3 is None:
+        with _init_lock:
+            if _w3 is None:
+                _w3 = _create_web3()
+    return _w3
+
+
+def load_artifact(path: Path = ARTIFACT_PATH) -> dict:
+    """Parse a Hardhat artifact once; {} when contracts are not compiled"""
+    artifact = _artifacts.get(path)
+    if artifact is None:
+        with _init_lock:
+            artifact = _artifacts.get(path)
+            if artifact is None:
+                if path.exists():
+                    with open(path) as f:
+                        artifact = json.load(f)
+                else:
+                    artifact = {}
+                _artifacts[path] = artifact
+    return artifact
+
+
+def __getattr__(name):
+    # Module attributes kept for existing imports (from .blockchain import w3)
+    if name == "w3":
+        return get_web3()
+    if name == "ABI":
+        return load_artifact().get("abi")
+    if name == "BYTECODE":
+        return load_artifact().get("bytecode")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def is_address(value) -> bool:
+    from eth_utils import is_address as _is_address
+    return _is_address(value)
+
+
+def to_checksum_address(value) -> str:
+    from eth_utils import to_checksum_address as _to_checksum_address
+    return _to_checksum_address(value)
+
+_deploy_lock = threading.Lock()
+_in_process_deployed = False
+
+
+def deploy_in_process_contract():
+    """Deploy the compiled artifact to the in-process chain (once)
+
+    Mirrors scripts/deploy-enhanced.js: the first account deploys and is
+    granted every role. CONTRACT_ADDRESS is pointed at the new contract.
+    """
+    global _in_process_deployed
+    with _deploy_lock:
+        if _in_process_deployed:
+            return config.CONTRACT_ADDRESS
+        artifact = load_artifact()
+        if not artifact.get("abi") or not artifact.get("bytecode"):
+            raise RuntimeError(
+                f"Contract artifact not found at {ARTIFACT_PATH}. Compile contracts with Hardhat first."
+            )
+        w3 = get_web3()
+        deployer = w3.eth.accounts[0]
+        factory = w3.eth.contract(abi=artifact["abi"], bytecode=artifact["bytecode"])
+        receipt = w3.eth.wait_for_transaction_receipt(factory.constructor().transact({"from": deployer}))
+        contract = w3.eth.contract(address=receipt.contractAddress, abi=artifact["abi"])
+        for grant in ROLE_GRANTS:
+            getattr(contract.functions, grant)(deployer).transact({"from": deployer})
+        config.CONTRACT_ADDRESS = receipt.contractAddress
+        _in_process_deployed = True
+        logger.info(f"Deployed EnhancedFoodSupplyChain in-process at {receipt.contractAddress}")
+        return receipt.contractAddress
+
+_contract = None
+_contract_key = None
 
-# Load ABI
-if ARTIFACT_PATH.exists():
-    with open(ARTIFACT_PATH) as f:
-        artifact = json.load(f)
-    ABI = artifact.get("abi")
-else:
-    ABI = None
 
 def get_contract():
-    if ABI is None:
+    """The contract object, built once per (web3, CONTRACT_ADDRESS)"""
+    with span("get_contract"):
+        contract = _contract
+        if contract is None or _contract_key != (id(_w3), config.CONTRACT_ADDRESS):
+            contract = _build_contract()
+        return contract
+
+def _build_contract():
+    global _contract, _contract_key
+    if config.BLOCKCHAIN_PROVIDER == "eth_tester" and not _in_process_deployed:
+        deploy_in_process_contract()
+    abi = load_artifact().get("abi")
+    if abi is None:
         raise RuntimeError(
             f"Contract ABI not found at {ARTIFACT_PATH}. Compile contracts with Hardhat first."
         )
-    if not Web3.is_address(config.CONTRACT_ADDRESS):
+    if not is_address(config.CONTRACT_ADDRESS):
         raise RuntimeError("Set CONTRACT_ADDRESS in backend config or .env")
+    w3 = get_web3()
     contract_instance = w3.eth.contract(
-        address=Web3.to_checksum_address(config.CONTRACT_ADDRESS),
-        abi=ABI
+        address=to_checksum_address(config.CONTRACT_ADDRESS),
+        abi=abi
     )
     # Add w3 to contract instance for easy access
     contract_instance.w3 = w3
+    _contract, _contract_key = contract_instance, (id(w3), config.CONTRACT_ADDRESS)
     return contract_instance
 
 
-def get_web3():
-    return w3
+_legacy_contract = None
+_legacy_key = None
+
+
+def get_legacy_contract():
+    """The legacy FoodSupplyChain contract, or None when LEGACY_CONTRACT_ADDRESS is unset"""
+    global _legacy_contract, _legacy_key
+    if not config.LEGACY_CONTRACT_ADDRESS:
+        return None
+    w3 = get_web3()
+    if _legacy_contract is None or _legacy_key != (id(w3), config.LEGACY_CONTRACT_ADDRESS):
+        abi = load_artifact(LEGACY_ARTIFACT_PATH).get("abi")
+        if abi is None:
+            raise RuntimeError(
+                f"Legacy contract ABI not found at {LEGACY_ARTIFACT_PATH}. Compile contracts with Hardhat first."
+            )
+        if not is_address(config.LEGACY_CONTRACT_ADDRESS):
+            raise RuntimeError("LEGACY_CONTRACT_ADDRESS is not a valid address")
+        _legacy_contract = w3.eth.contract(address=to_checksum_address(config.LEGACY_CONTRACT_ADDRESS), abi=abi)
+        _legacy_key = (id(w3), config.LEGACY_CONTRACT_ADDRESS)
+    return _legacy_contract
+
+
+def rpc_nodes():
+    """Routing state of each RPC node when several are configured, else None"""
+    provider = get_web3().provider
+    return provider.snapshot() if hasattr(provider, "snapshot") else None
+
 
 def get_accounts():
     """Get all available accounts from the local blockchain"""
-    return w3.eth.accounts
+    return get_web3().eth.accounts
 
 def get_account_balance(address):
     """Get ETH balance of an account"""
-    return w3.eth.get_balance(address)
+    return get_web3().eth.get_balance(address)
+
+def call_function(contract_function, transaction=None):
+    """eth_call a bound contract function, recording its latency"""
+    with span("eth_call"), metrics.RPC_LATENCY.labels("eth_call", contract_function.fn_name).time():
+        return contract_function.call(transaction)
+
+def estimate_gas(contract_function, transaction):
+    """eth_estimateGas for a contract transaction, recording its latency"""
+    with span("gas_estimate"), metrics.RPC_LATENCY.labels("eth_estimateGas", contract_function.fn_name).time():
+        return contract_function.estimate_gas(transaction)
+
+def transact_function(contract_function, transaction):
+    """Send a contract transaction, recording its latency"""
+    with span("send_transaction"), metrics.RPC_LATENCY.labels("eth_sendTransaction", contract_function.fn_name).time():
+        return contract_function.transact(transaction)
 
-def wait_for_transaction_receipt(tx_hash, timeout=300):
+def wait_for_transaction_receipt(tx_hash, timeout=300, function="unknown"):
     """Wait for transaction to be mined"""
-    return w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+    with span("receipt_wait"), metrics.RPC_LATENCY.labels("receipt_wait", function).time():
+        return get_web3().eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
 
 def get_transaction_receipt(tx_hash):
     """Get transaction receipt"""
-    return w3.eth.get_transaction_receipt(tx_hash)
+    return get_web3().eth.get_transaction_receipt(tx_hash)
 
 def get_latest_block():
     """Get latest block number"""
-    return w3.eth.block_number
+    return get_web3().eth.block_number
 
 
 # contract = get_contract()  # Comment out to avoid immediate loading
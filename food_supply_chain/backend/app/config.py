@@ -7,14 +7,42 @@ env_path = os.path.join(here, "..", ".env")
 load_dotenv(env_path)
 
 # Blockchain Configuration
+# "http" uses RPC_URL / RPC_URLS, "eth_tester" runs an in-process py-evm chain and
+# deploys the compiled contract on first use (CONTRACT_ADDRESS is then ignored)
+BLOCKCHAIN_PROVIDER = os.getenv("BLOCKCHAIN_PROVIDER", "http").lower()
 RPC_URL = os.getenv("RPC_URL", "http://127.0.0.1:8545")
+# Several comma-separated nodes enable latency-routed, hedged reads; writes go
+# to RPC_PRIMARY_URL (default: the first one)
+RPC_URLS = [url.strip() for url in os.getenv("RPC_URLS", RPC_URL).split(",") if url.strip()]
+RPC_PRIMARY_URL = os.getenv("RPC_PRIMARY_URL", RPC_URLS[0] if RPC_URLS else RPC_URL)
+RPC_TIMEOUT_SECONDS = float(os.getenv("RPC_TIMEOUT_SECONDS", "10"))
+RPC_HEDGE_PERCENTILE = float(os.getenv("RPC_HEDGE_PERCENTILE", "0.9"))
+RPC_HEDGE_MIN_SECONDS = float(os.getenv("RPC_HEDGE_MIN_SECONDS", "0.05"))
+RPC_BREAKER_FAILURES = int(os.getenv("RPC_BREAKER_FAILURES", "3"))
+RPC_BREAKER_COOLDOWN_SECONDS = float(os.getenv("RPC_BREAKER_COOLDOWN_SECONDS", "10"))
+IN_PROCESS_GAS_LIMIT = int(os.getenv("IN_PROCESS_GAS_LIMIT", "300000000"))
 CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS", "0x5FbDB2315678afecb367f032d93F642f64180aa3")
+# Legacy FoodSupplyChain (CropRegistry.sol) indexed into the same crop index ("" disables)
+LEGACY_CONTRACT_ADDRESS = os.getenv("LEGACY_CONTRACT_ADDRESS", "")
 
 # IPFS Configuration
 IPFS_URL = os.getenv("IPFS_URL", "http://127.0.0.1:5001")  # Local IPFS node
 PINATA_API_KEY = os.getenv("PINATA_API_KEY", "")
 PINATA_SECRET = os.getenv("PINATA_SECRET", "")
 USE_PINATA = os.getenv("USE_PINATA", "false").lower() == "true"
+# Upload backends in preference order ("local", "pinata"). With both, uploads go
+# to the healthiest/fastest one, are hedged to the other after IPFS_HEDGE_SECONDS
+# and, when IPFS_REPLICATE is on, pinned to the other in the background
+IPFS_BACKENDS = [
+    backend.strip().lower()
+    for backend in os.getenv("IPFS_BACKENDS", "pinata" if USE_PINATA else "local").split(",")
+    if backend.strip()
+]
+IPFS_HEDGE_SECONDS = float(os.getenv("IPFS_HEDGE_SECONDS", "2"))
+IPFS_TIMEOUT_SECONDS = float(os.getenv("IPFS_TIMEOUT_SECONDS", "60"))  # per Pinata request
+IPFS_REPLICATE = os.getenv("IPFS_REPLICATE", "true").lower() == "true"
+IPFS_BREAKER_FAILURES = int(os.getenv("IPFS_BREAKER_FAILURES", "3"))
+IPFS_BREAKER_COOLDOWN_SECONDS = float(os.getenv("IPFS_BREAKER_COOLDOWN_SECONDS", "30"))
 
 # File Upload Configuration
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
@@ -22,3 +50,74 @@ ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.pdf', '.doc', '.docx'}
 
 # WebSocket Configuration
 WS_PORT = int(os.getenv("WS_PORT", "8001"))
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))  # per connection
+
+# Rate Limiting Configuration
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+# (requests, window seconds) per route class
+RATE_LIMIT_CLASSES = {
+    "chain_write": (int(os.getenv("RATE_LIMIT_CHAIN_WRITE", "10")), 60),
+    "upload": (int(os.getenv("RATE_LIMIT_UPLOAD", "30")), 60),
+    "write": (int(os.getenv("RATE_LIMIT_WRITE", "60")), 60),
+    "read": (int(os.getenv("RATE_LIMIT_READ", "300")), 60),
+}
+
+# Error Aggregation Configuration
+ERROR_MAX_FINGERPRINTS = int(os.getenv("ERROR_MAX_FINGERPRINTS", "512"))
+ERROR_WINDOW_SECONDS = float(os.getenv("ERROR_WINDOW_SECONDS", "60"))
+ERROR_ALERT_THRESHOLD = int(os.getenv("ERROR_ALERT_THRESHOLD", "10"))
+ERROR_TRACEBACK_SAMPLES = int(os.getenv("ERROR_TRACEBACK_SAMPLES", "1"))
+ERROR_LOG_QUEUE_SIZE = int(os.getenv("ERROR_LOG_QUEUE_SIZE", "10000"))
+
+# Tracing and Admin Configuration
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "2.0"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # admin endpoints are disabled when empty
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+# Event Indexer Configuration
+INDEXER_ENABLED = os.getenv("INDEXER_ENABLED", "true").lower() == "true"
+INDEX_DB_PATH = os.getenv("INDEX_DB_PATH", ":memory:")  # SQLite file for the local crop index
+INDEXER_POLL_SECONDS = float(os.getenv("INDEXER_POLL_SECONDS", "2.0"))
+INDEXER_BATCH_BLOCKS = int(os.getenv("INDEXER_BATCH_BLOCKS", "2000"))
+INDEXER_START_BLOCK = int(os.getenv("INDEXER_START_BLOCK", "0"))  # contract deployment block
+HISTORY_BATCH_MAX = int(os.getenv("HISTORY_BATCH_MAX", "500"))
+INDEX_PAGE_SIZE = int(os.getenv("INDEX_PAGE_SIZE", "50"))  # default page of the /api/index endpoints
+INDEX_PAGE_MAX = int(os.getenv("INDEX_PAGE_MAX", "500"))
+SEARCH_MIN_SIMILARITY = float(os.getenv("SEARCH_MIN_SIMILARITY", "0.3"))  # share of query trigrams a fuzzy match needs
+GEO_MAX_RADIUS_KM = float(os.getenv("GEO_MAX_RADIUS_KM", "1000"))  # largest /api/crops/nearby radius
+# Parallel backfill when more than INDEXER_BATCH_BLOCKS * workers behind (1 disables)
+INDEXER_BACKFILL_WORKERS = int(os.getenv("INDEXER_BACKFILL_WORKERS", "4"))
+INDEXER_BACKFILL_MAX_BLOCKS = int(os.getenv("INDEXER_BACKFILL_MAX_BLOCKS", "100000"))  # largest adaptive range
+# Snapshots of the index for fast cold start and reorg rollback: off unless set
+# to a directory (an absolute one, so it does not depend on the working directory)
+INDEX_SNAPSHOT_DIR = os.getenv("INDEX_SNAPSHOT_DIR", "")
+INDEX_SNAPSHOT_BLOCKS = int(os.getenv("INDEX_SNAPSHOT_BLOCKS", "1000"))
+INDEX_SNAPSHOT_SECONDS = float(os.getenv("INDEX_SNAPSHOT_SECONDS", "300"))
+INDEX_SNAPSHOT_KEEP = int(os.getenv("INDEX_SNAPSHOT_KEEP", "3"))
+
+# Bulk Registration / Transfer Configuration
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "5000"))
+BULK_MAX_BATCH = int(os.getenv("BULK_MAX_BATCH", "500"))  # contract MAX_BATCH_SIZE
+BULK_GAS_FRACTION = float(os.getenv("BULK_GAS_FRACTION", "0.5"))  # share of block gas limit per transaction
+
+# Fee Oracle / Gas Estimate Cache Configuration
+FEE_SAMPLE_SECONDS = float(os.getenv("FEE_SAMPLE_SECONDS", "5"))
+FEE_HISTORY_BLOCKS = int(os.getenv("FEE_HISTORY_BLOCKS", "10"))
+FEE_REWARD_PERCENTILE = float(os.getenv("FEE_REWARD_PERCENTILE", "50"))
+FEE_DEFAULT_PRIORITY_WEI = int(os.getenv("FEE_DEFAULT_PRIORITY_WEI", str(10 ** 9)))
+GAS_CACHE_TTL_SECONDS = float(os.getenv("GAS_CACHE_TTL_SECONDS", "600"))
+
+# Startup Configuration
+# Warmups (profiles, artifact, web3 connect, IPFS connect) run concurrently in the
+# lifespan phase; one that exceeds this is left running and reported as a timeout
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "10"))
+
+# Health Probe Configuration
+# /health and /ready serve the snapshot of the last background probe round
+HEALTH_PROBE_SECONDS = float(os.getenv("HEALTH_PROBE_SECONDS", "10"))
+HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "5"))
+HEALTH_MAX_BLOCK_AGE_SECONDS = float(os.getenv("HEALTH_MAX_BLOCK_AGE_SECONDS", "0"))  # 0: report only (dev chains mine on demand)
+HEALTH_MAX_NODE_LAG_BLOCKS = int(os.getenv("HEALTH_MAX_NODE_LAG_BLOCKS", "5"))  # also how far behind the index the indexer waits for a node
+HEALTH_MAX_INDEX_LAG_BLOCKS = int(os.getenv("HEALTH_MAX_INDEX_LAG_BLOCKS", "50"))
+HEALTH_MAX_LOOP_LAG_SECONDS = float(os.getenv("HEALTH_MAX_LOOP_LAG_SECONDS", "0.5"))
@@ -0,0 +1,92 @@
+"""
+Process-wide access to the deployed EnhancedFoodSupplyChain contract.
+
+The gateway is built once per contract instance: bound function
+factories, event decoders, selectors and log topics are looked up from
+the ABI up front, so handlers do no per-request contract setup, and crop
+reads come back as crop_codec.Crop records instead of positional tuples.
+"""
+import threading
+from typing import Dict, List, Optional
+
+from . import metrics
+from .blockchain import call_function, get_contract, get_legacy_contract
+from .crop_codec import Crop, digest_to_cid, unpack_crop, unpack_crops
+
+# Every crop read decodes its IPFS digests through this cache
+metrics.track_lru_cache("ipfs_cid", digest_to_cid)
+
+
+class ContractGateway:
+    def __init__(self, contract):
+        from eth_utils import event_abi_to_log_topic, function_abi_to_4byte_selector
+
+        self.contract = contract
+        self.w3 = contract.w3
+        self.address = contract.address
+        self.functions: Dict[str, object] = {}
+        self.selectors: Dict[str, bytes] = {}
+        self.events: Dict[str, object] = {}
+        self.topics: Dict[str, bytes] = {}
+        for abi in contract.abi:
+            if abi.get("type") == "function":
+                self.functions[abi["name"]] = getattr(contract.functions, abi["name"])
+                self.selectors[abi["name"]] = function_abi_to_4byte_selector(abi)
+            elif abi.get("type") == "event":
+                self.events[abi["name"]] = getattr(contract.events, abi["name"])()
+                self.topics[abi["name"]] = event_abi_to_log_topic(abi)
+        self.events_by_topic = {topic: self.events[name] for name, topic in self.topics.items()}
+
+    def function(self, name: str, *args):
+        """Bound contract function, ready for build_transaction / transact_function"""
+        return self.functions[name](*args)
+
+    def call(self, name: str, *args):
+        return call_function(self.functions[name](*args))
+
+    # ---------------- Typed reads ----------------
+
+    def crop_count(self) -> int:
+        return self.call("cropCount")
+
+    def get_crop(self, crop_id: int) -> Crop:
+        return unpack_crop(self.call("getCrop", crop_id))
+
+    def get_all_crops(self) -> List[Crop]:
+        return unpack_crops(self.call("getAllCrops"))
+
+    def get_available_crops(self) -> List[Crop]:
+        return unpack_crops(self.call("getAvailableCrops"))
+
+
+_gateway: Optional[ContractGateway] = None
+_legacy_gateway: Optional[ContractGateway] = None
+_lock = threading.Lock()
+
+
+def get_gateway() -> ContractGateway:
+    """The gateway for the current contract; rebuilt only if the contract changes"""
+    global _gateway
+    contract = get_contract()
+    gateway = _gateway
+    if gateway is None or gateway.contract is not contract:
+        with _lock:
+            if _gateway is None or _gateway.contract is not contract:
+                _gateway = ContractGateway(contract)
+            gateway = _gateway
+    return gateway
+
+
+def get_legacy_gateway() -> Optional[ContractGateway]:
+    """Gateway for the legacy FoodSupplyChain contract (events only), None when not configured"""
+    global _legacy_gateway
+    contract = get_legacy_contract()
+    if contract is None:
+        return None
+    gateway = _legacy_gateway
+    if gateway is None or gateway.contract is not contract:
+        with _lock:
+            if _legacy_gateway is None or _legacy_gateway.contract is not contract:
+                _legacy_gateway = ContractGateway(contract)
+            gateway = _legacy_gateway
+    return gateway
@@ -0,0 +1,176 @@
+"""
+Conversions between the packed on-chain Crop layout and API values.
+
+The contract stores IPFS CIDs as the bare sha2-256 digest of a CIDv0 and
+farm coordinates as signed degrees * 1e6. Everything above the contract
+(API rows, the local index) works with the unpacked Crop record.
+
+Records are named tuples: they index like the tuples web3 returns, cost
+no more to build, and let callers use field names instead of positions.
+"""
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+BASE58_INDEX = {char: i for i, char in enumerate(BASE58_ALPHABET)}
+# multihash prefix of a CIDv0: sha2-256 (0x12), 32-byte digest (0x20)
+CIDV0_PREFIX = b"\x12\x20"
+EMPTY_DIGEST = b"\x00" * 32
+COORD_SCALE = 10 ** 6
+
+# Contracts whose crops share the local index (crop ids are only unique per contract)
+ENHANCED = "enhanced"
+LEGACY = "legacy"
+CONTRACTS = (ENHANCED, LEGACY)
+
+
+class CropEncodingError(ValueError):
+    """A value cannot be represented in the packed Crop layout"""
+
+
+class Crop(NamedTuple):
+    """A crop as served by the API and stored in the local index"""
+    id: int
+    name: str
+    quantity: int
+    price: int
+    batch_number: str
+    harvest_date: int
+    expiry_date: int
+    ipfs_image_hash: Optional[str]
+    ipfs_cert_hash: Optional[str]
+    farm_coords: str
+    current_owner: str
+    available: bool
+    created_at: int
+
+
+class CropInput(NamedTuple):
+    """registerCrop arguments / one registerCrops item, in ABI order"""
+    name: str
+    quantity: int
+    price: int
+    batch_number: str
+    harvest_date: int
+    expiry_date: int
+    ipfs_image_digest: bytes
+    ipfs_cert_digest: bytes
+    lat_e6: int
+    lng_e6: int
+
+
+class TransferInput(NamedTuple):
+    """transferCrop arguments / one transferCrops item, in ABI order"""
+    crop_id: int
+    to: str
+    note: str
+    ipfs_data_hash: str
+
+
+def _b58encode(data: bytes) -> str:
+    number = int.from_bytes(data, "big")
+    chars = []
+    while number:
+        number, rem = divmod(number, 58)
+        chars.append(BASE58_ALPHABET[rem])
+    pad = len(data) - len(data.lstrip(b"\x00"))
+    return "1" * pad + "".join(reversed(chars))
+
+
+def _b58decode(text: str) -> bytes:
+    number = 0
+    for char in text:
+        if char not in BASE58_INDEX:
+            raise CropEncodingError(f"Invalid base58 character {char!r}")
+        number = number * 58 + BASE58_INDEX[char]
+    pad = len(text) - len(text.lstrip("1"))
+    return b"\x00" * pad + number.to_bytes((number.bit_length() + 7) // 8, "big")
+
+
+def cid_to_digest(cid: Optional[str]) -> bytes:
+    """bytes32 argument for a CIDv0 ("Qm..."); empty values map to zero"""
+    if not cid:
+        return EMPTY_DIGEST
+    try:
+        multihash = _b58decode(cid)
+    except CropEncodingError:
+        multihash = b""
+    if len(multihash) != 34 or not multihash.startswith(CIDV0_PREFIX):
+        raise CropEncodingError(f"Only CIDv0 (sha2-256) IPFS hashes are supported, got {cid!r}")
+    return multihash[2:]
+
+
+@lru_cache(maxsize=65536)
+def digest_to_cid(digest: bytes) -> Optional[str]:
+    """CIDv0 string for a stored digest, None for the zero digest"""
+    if digest == EMPTY_DIGEST or not digest:
+        return None
+    return _b58encode(CIDV0_PREFIX + bytes(digest))
+
+
+def parse_coords(farm_coords: str) -> Tuple[int, int]:
+    """'lat,lng' in degrees -> (latE6, lngE6)"""
+    try:
+        lat_text, lng_text = (part.strip() for part in farm_coords.split(","))
+        lat = round(float(lat_text) * COORD_SCALE)
+        lng = round(float(lng_text) * COORD_SCALE)
+    except (ValueError, OverflowError):  # OverflowError: round() of inf ("inf", "1e400")
+        raise CropEncodingError(f"Farm coordinates must be 'lat,lng', got {farm_coords!r}")
+    if not -90 * COORD_SCALE <= lat <= 90 * COORD_SCALE or not -180 * COORD_SCALE <= lng <= 180 * COORD_SCALE:
+        raise CropEncodingError(f"Farm coordinates out of range: {farm_coords!r}")
+    return lat, lng
+
+
+def _format_degrees(value_e6: int) -> str:
+    whole, frac = divmod(abs(value_e6), COORD_SCALE)
+    text = f"{whole}.{frac:06d}".rstrip("0").rstrip(".")
+    return "-" + text if value_e6 < 0 else text
+
+
+def format_coords(lat_e6: int, lng_e6: int) -> str:
+    return f"{_format_degrees(lat_e6)},{_format_degrees(lng_e6)}"
+
+
+def unpack_crop(c: tuple) -> Crop:
+    """Crop from a packed getCrop/getAllCrops struct (in Solidity field order)"""
+    (crop_id, harvest_date, expiry_date, created_at, quantity, price, owner, available,
+     lat_e6, lng_e6, image_digest, cert_digest, name, batch_number) = c
+    return Crop(
+        crop_id, name, quantity, price, batch_number, harvest_date, expiry_date,
+        digest_to_cid(image_digest), digest_to_cid(cert_digest), format_coords(lat_e6, lng_e6),
+        owner, available, created_at,
+    )
+
+
+def unpack_crops(crops: Iterable[tuple]) -> List[Crop]:
+    return [unpack_crop(c) for c in crops]
+
+
+def registration_args(name: str, quantity: int, price: int, batch_number: str, harvest_date: int,
+                      expiry_date: int, ipfs_image_hash: Optional[str], ipfs_cert_hash: Optional[str],
+                      farm_coords: str) -> CropInput:
+    """registerCrop arguments (also one registerCrops CropInput) from API values"""
+    lat, lng = parse_coords(farm_coords)
+    return CropInput(
+        name, quantity, price, batch_number, harvest_date, expiry_date,
+        cid_to_digest(ipfs_image_hash), cid_to_digest(ipfs_cert_hash), lat, lng,
+    )
+
+
+def registered_crop(crop_id: int, values: CropInput, owner: str, created_at: int) -> Crop:
+    """Crop as it stands right after registration with the given arguments"""
+    return Crop(
+        crop_id, values.name, values.quantity, values.price, values.batch_number,
+        values.harvest_date, values.expiry_date, digest_to_cid(values.ipfs_image_digest),
+        digest_to_cid(values.ipfs_cert_digest), format_coords(values.lat_e6, values.lng_e6),
+        owner, True, created_at,
+    )
+
+
+def legacy_crop(crop_id: int, name: str, quantity: int, price: int, farmer: str, created_at: int) -> Crop:
+    """Crop from a legacy FoodSupplyChain CropRegistered event
+
+    The legacy contract only records name, quantity, price and farmer; the
+    enhanced-only fields are left empty.
+    """
+    return Crop(crop_id, name, quantity, price, "", 0, 0, None, None, "", farmer, True, created_at)
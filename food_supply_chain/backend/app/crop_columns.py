@@ -0,0 +1,252 @@
+"""
+In-memory columnar copy of the crop index for range filters and sorting.
+
+Every crop is one row across NumPy arrays (price, quantity, dates,
+availability, contract) plus interned owner and name codes, about 70
+bytes per crop. Queries build a boolean mask per filter, order only the
+rows the requested page needs (np.partition, then a stable argsort, so
+ties keep registration order) and aggregate over the whole match; the
+full crop records of the page are then read from the CropStore.
+
+Rows are appended in registration order as the CropStore applies
+events, and owner/availability are updated in place on transfers and
+purchases. Prices are float64 (wei beyond 2**53 lose precision in
+comparisons, not in the crops returned, which come from SQLite).
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from . import crop_search
+from .crop_codec import CONTRACTS
+
+NUMERIC_COLUMNS = {
+    "price": np.float64,
+    "quantity": np.int64,
+    "harvest_date": np.int64,
+    "expiry_date": np.int64,
+    "created_at": np.int64,
+    "crop_id": np.int64,
+}
+SORT_COLUMNS = ("created_at", "price", "quantity", "harvest_date", "expiry_date")
+# Larger quantities are clamped in the column (filters and sorting) and
+# kept exactly in CropColumns.big_quantities for the totals
+MAX_INT64 = np.iinfo(np.int64).max
+LOW_BITS = 0xFFFFFFFF
+
+
+class ColumnQuery(NamedTuple):
+    total: int
+    keys: List[Tuple[str, int]]  # (contract, crop_id) of the page, in order
+    aggregates: dict
+
+
+class StringPool:
+    """Interned strings: each distinct value is stored once and rows hold an int32 code"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class CropColumns:
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.numeric = {name: np.zeros(capacity, dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+        self.available = np.zeros(capacity, np.bool_)
+        self.contract = np.zeros(capacity, np.uint8)
+        self.owner = np.zeros(capacity, np.int32)
+        self.name = np.zeros(capacity, np.int32)
+        self.owners = StringPool()
+        self.names = StringPool()
+        # row -> exact quantity of the rows whose column value is clamped
+        self.big_quantities: Dict[int, int] = {}
+        # crop_id -> row per contract (-1: not indexed); ids are dense per contract
+        self.rows = {code: np.full(capacity, -1, np.int32) for code in range(len(CONTRACTS))}
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> "CropColumns":
+        """Bulk load (contract, crop_id, price, quantity, harvest_date, expiry_date, created_at,
+        available, owner, name_key) rows, in registration order"""
+        columns = cls(max(1024, len(rows)))
+        n = columns.size = len(rows)
+        if not n:
+            return columns
+        contract, crop_id, price, quantity, harvest_date, expiry_date, created_at, available, owner, name = zip(*rows)
+        contract_codes = {value: code for code, value in enumerate(CONTRACTS)}
+        columns.contract[:n] = [contract_codes[value] for value in contract]
+        # uint256 values beyond int64 come back from SQLite as text
+        columns.numeric["price"][:n] = [float(value) for value in price]
+        quantity = [int(value) for value in quantity]
+        columns.numeric["quantity"][:n] = [min(value, MAX_INT64) for value in quantity]
+        columns.big_quantities = {row: value for row, value in enumerate(quantity) if value > MAX_INT64}
+        for column, values in (("harvest_date", harvest_date), ("expiry_date", expiry_date),
+                               ("created_at", created_at), ("crop_id", crop_id)):
+            columns.numeric[column][:n] = values
+        columns.available[:n] = available
+        columns.owner[:n] = [columns.owners.code(value) for value in owner]
+        columns.name[:n] = [columns.names.code(value) for value in name]
+        crop_ids = columns.numeric["crop_id"][:n]
+        for code in range(len(CONTRACTS)):
+            rows_of = np.flatnonzero(columns.contract[:n] == code)
+            if len(rows_of):
+                mapping = np.full(max(int(crop_ids[rows_of].max()) + 1, 1024), -1, np.int32)
+                mapping[crop_ids[rows_of]] = rows_of
+                columns.rows[code] = mapping
+        return columns
+
+    @property
+    def capacity(self) -> int:
+        return len(self.available)
+
+    def nbytes(self) -> int:
+        arrays = [*self.numeric.values(), self.available, self.contract, self.owner, self.name, *self.rows.values()]
+        return sum(array.nbytes for array in arrays)
+
+    # ---------------- Writes ----------------
+
+    def _grow(self, needed: int):
+        capacity = self.capacity
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+
+        def grown(array):
+            new = np.zeros(capacity, array.dtype)
+            new[:len(array)] = array
+            return new
+
+        self.numeric = {name: grown(array) for name, array in self.numeric.items()}
+        self.available = grown(self.available)
+        self.contract = grown(self.contract)
+        self.owner = grown(self.owner)
+        self.name = grown(self.name)
+
+    def _row_of(self, contract: str, crop_id: int) -> int:
+        rows = self.rows[CONTRACTS.index(contract)]
+        return int(rows[crop_id]) if 0 <= crop_id < len(rows) else -1
+
+    def _set_row(self, contract_code: int, crop_id: int, row: int):
+        rows = self.rows[contract_code]
+        if crop_id >= len(rows):
+            grown = np.full(max(crop_id + 1, len(rows) * 2), -1, np.int32)
+            grown[:len(rows)] = rows
+            rows = self.rows[contract_code] = grown
+        rows[crop_id] = row
+
+    def append(self, contract: str, crop_id: int, price: int, quantity: int, harvest_date: int,
+               expiry_date: int, created_at: int, available: bool, owner: str, name_key: str):
+        contract_code = CONTRACTS.index(contract)
+        row = self._row_of(contract, crop_id)
+        if row < 0:
+            row = self.size
+            self._grow(row + 1)
+            self.size += 1
+            self._set_row(contract_code, crop_id, row)
+        values = {"price": float(price), "quantity": min(quantity, MAX_INT64), "harvest_date": harvest_date,
+                  "expiry_date": expiry_date, "created_at": created_at, "crop_id": crop_id}
+        for column, value in values.items():
+            self.numeric[column][row] = value
+        if quantity > MAX_INT64:
+            self.big_quantities[row] = quantity
+        else:
+            self.big_quantities.pop(row, None)
+        self.available[row] = available
+        self.contract[row] = contract_code
+        self.owner[row] = self.owners.code(owner)
+        self.name[row] = self.names.code(name_key)
+
+    def apply(self, events: Iterable[dict]):
+        """Follow the events CropStore.apply_events has just committed"""
+        for event in events:
+            kind = event["event"]
+            if kind == "CropRegistered":
+                crop = event["crop"]
+                self.append(event["contract"], crop.id, crop.price, crop.quantity, crop.harvest_date,
+                            crop.expiry_date, crop.created_at, crop.available, crop.current_owner,
+                            crop_search.normalize(crop.name))
+                continue
+            row = self._row_of(event["contract"], event["crop_id"])
+            if row < 0:
+                continue
+            self.owner[row] = self.owners.code(event["to_address"])
+            if kind == "CropPurchased":
+                self.available[row] = False
+
+    # ---------------- Reads ----------------
+
+    def query(self, limit: int, offset: int = 0, sort: str = "created_at", descending: bool = True,
+              ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None, contract: Optional[str] = None,
+              owner: Optional[str] = None, name_key: Optional[str] = None,
+              available: Optional[bool] = None) -> ColumnQuery:
+        """One page of matching rows ordered by sort; ranges map numeric columns to inclusive
+        (low, high) bounds, either of which may be None"""
+        n = self.size
+        mask = np.ones(n, np.bool_)
+        if contract is not None:
+            mask &= self.contract[:n] == CONTRACTS.index(contract)
+        if available is not None:
+            mask &= self.available[:n] == available
+        for column, pool, value in ((self.owner, self.owners, owner), (self.name, self.names, name_key)):
+            if value is not None:
+                code = pool.codes.get(value)
+                if code is None:
+                    mask[:] = False
+                else:
+                    mask &= column[:n] == code
+        for column, (low, high) in (ranges or {}).items():
+            values = self.numeric[column][:n]
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+
+        matched = np.flatnonzero(mask)
+        total = len(matched)
+        keys = []
+        if offset < total:
+            values = self.numeric[sort][matched]
+            if descending:
+                values = -values
+            wanted = min(offset + limit, total)
+            if wanted < total:
+                # Keep the rows up to the page's last value (all of its ties), then order just those
+                kth = np.partition(values, wanted - 1)[wanted - 1]
+                head = np.flatnonzero(values <= kth)
+                matched, values = matched[head], values[head]
+            page = matched[np.argsort(values, kind="stable")[offset:offset + limit]]
+            contracts = self.contract[page]
+            crop_ids = self.numeric["crop_id"][page]
+            keys = [(CONTRACTS[contract_code], int(crop_id)) for contract_code, crop_id in zip(contracts, crop_ids)]
+        return ColumnQuery(total, keys, self._aggregates(mask, total))
+
+    def _aggregates(self, mask, total: int) -> dict:
+        if not total:
+            return {"count": 0}
+        # Masked reductions (where=) read the columns in place instead of copying the matches out
+        n = self.size
+        price = self.numeric["price"][:n]
+        quantity = self.numeric["quantity"][:n]
+        # Summed as 32-bit halves (each total fits int64 up to 2**31 rows) plus
+        # what clamping cut off, so the total is exact instead of wrapping
+        high = int(np.sum(quantity >> 32, where=mask))
+        low = int(np.sum(quantity & LOW_BITS, where=mask))
+        clamped = sum(value - MAX_INT64 for row, value in self.big_quantities.items() if mask[row])
+        return {
+            "count": total,
+            "available": int(np.count_nonzero(self.available[:n] & mask)),
+            "quantity_total": (high << 32) + low + clamped,
+            "price_min": float(price.min(where=mask, initial=np.inf)),
+            "price_max": float(price.max(where=mask, initial=-np.inf)),
+            "price_mean": float(price.sum(where=mask) / total),
+            "harvest_date_min": int(self.numeric["harvest_date"][:n].min(where=mask, initial=MAX_INT64)),
+            "expiry_date_max": int(self.numeric["expiry_date"][:n].max(where=mask, initial=0)),
+        }
@@ -0,0 +1,142 @@
+"""
+In-memory spatial index over the crops' farm coordinates.
+
+Farm coordinates are parsed once, when a crop is indexed, and bucketed
+into a fixed grid of CELL_DEGREES x CELL_DEGREES cells (a geohash-style
+grid; 0.25 degrees is about 28 km at the equator). A bounding-box or
+radius query only visits the cells overlapping its box and checks the
+exact position of the crops in them, so the work depends on the area
+asked for, not on the size of the index. Boxes may cross the
+antimeridian (west > east).
+
+Coordinates never change after registration, so the index only grows;
+the CropStore keeps it in step with registrations and rebuilds it from
+SQLite when the tables are replaced.
+"""
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .crop_codec import COORD_SCALE, CropEncodingError, parse_coords
+
+CELL_DEGREES = 0.25
+EARTH_RADIUS_KM = 6371.0088
+
+Point = Tuple[float, float, str, int]  # lat, lng, contract, crop_id
+
+
+def parse(farm_coords: str) -> Optional[Tuple[float, float]]:
+    """(lat, lng) in degrees, None for legacy crops (no coordinates) and malformed values"""
+    if not farm_coords:
+        return None
+    try:
+        lat_e6, lng_e6 = parse_coords(farm_coords)
+    except CropEncodingError:
+        return None
+    return lat_e6 / COORD_SCALE, lng_e6 / COORD_SCALE
+
+
+def distance_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle (haversine) distance"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _lng_ranges(west: float, east: float) -> List[Tuple[float, float]]:
+    """Longitude intervals within [-180, 180] covering west..east, split at the antimeridian"""
+    if east - west >= 360:
+        return [(-180.0, 180.0)]
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    if west <= east:
+        return [(west, east)]
+    return [(west, 180.0), (-180.0, east)]
+
+
+class GeoIndex:
+    def __init__(self, cell_degrees: float = CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.rows = math.ceil(180 / cell_degrees)
+        self.columns = math.ceil(360 / cell_degrees)
+        self.cells: Dict[Tuple[int, int], List[Point]] = defaultdict(list)
+        self.indexed: Set[Tuple[str, int]] = set()
+
+    def __len__(self) -> int:
+        return len(self.indexed)
+
+    def _row(self, lat: float) -> int:
+        return min(int((lat + 90) / self.cell_degrees), self.rows - 1)
+
+    def _column(self, lng: float) -> int:
+        return min(int((lng + 180) / self.cell_degrees), self.columns - 1)
+
+    def add(self, contract: str, crop_id: int, farm_coords: str) -> bool:
+        """Index a crop's position; False when it has none or is already indexed"""
+        position = parse(farm_coords)
+        if position is None or (contract, crop_id) in self.indexed:
+            return False
+        lat, lng = position
+        self.indexed.add((contract, crop_id))
+        self.cells[(self._row(lat), self._column(lng))].append((lat, lng, contract, crop_id))
+        return True
+
+    def apply(self, events: Iterable[dict]):
+        """Follow the events CropStore.apply_events has just committed"""
+        for event in events:
+            if event["event"] == "CropRegistered":
+                self.add(event["contract"], event["crop_id"], event["crop"].farm_coords)
+
+    # ---------------- Reads ----------------
+
+    def _candidates(self, south: float, north: float, lng_ranges: List[Tuple[float, float]]) -> Iterator[Point]:
+        """Crops inside the box, visiting only the cells it overlaps"""
+        row_range = (self._row(south), self._row(north))
+        column_ranges = [(self._column(west), self._column(east)) for west, east in lng_ranges]
+        wanted = (row_range[1] - row_range[0] + 1) * sum(high - low + 1 for low, high in column_ranges)
+        if wanted > len(self.cells):
+            # A box larger than the populated area: walk the occupied cells instead
+            cells = [
+                points for (row, column), points in self.cells.items()
+                if row_range[0] <= row <= row_range[1]
+                and any(low <= column <= high for low, high in column_ranges)
+            ]
+        else:
+            cells = [
+                self.cells[(row, column)]
+                for row in range(row_range[0], row_range[1] + 1)
+                for low, high in column_ranges
+                for column in range(low, high + 1)
+                if (row, column) in self.cells
+            ]
+        for points in cells:
+            for point in points:
+                lat, lng = point[0], point[1]
+                if south <= lat <= north and any(west <= lng <= east for west, east in lng_ranges):
+                    yield point
+
+    def within_box(self, south: float, west: float, north: float, east: float) -> List[Point]:
+        """Crops inside the box, ordered by (contract, crop_id)"""
+        return sorted(self._candidates(south, north, _lng_ranges(west, east)), key=lambda point: point[2:])
+
+    def within_radius(self, lat: float, lng: float, radius_km: float) -> List[Tuple[float, Point]]:
+        """(distance_km, point) of the crops within radius_km, nearest first"""
+        angle = radius_km / EARTH_RADIUS_KM
+        dlat = math.degrees(angle)
+        south, north = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+        # Longitude span of the circle's bounding box; the whole circle of latitude near the poles
+        if north >= 90 or south <= -90 or math.sin(angle) >= math.cos(math.radians(lat)):
+            lng_ranges = [(-180.0, 180.0)]
+        else:
+            dlng = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+            lng_ranges = _lng_ranges(lng - dlng, lng + dlng)
+        matches = []
+        for point in self._candidates(south, north, lng_ranges):
+            distance = distance_km(lat, lng, point[0], point[1])
+            if distance <= radius_km:
+                matches.append((distance, point))
+        matches.sort(key=lambda match: (match[0], match[1][2:]))
+        return matches
@@ -0,0 +1,130 @@
+"""
+Text normalization and the in-memory name index behind crop search.
+
+Crop names repeat a lot ("Organic Tomato" is registered by many farms),
+so search ranks distinct normalized names and only then reads the crops
+of the page being served. NameIndex holds, per distinct name, its crop
+count per contract plus two inverted indexes: name words, kept sorted
+for prefix matches ("tom" finds "cherry tomatoes"), and trigrams of each
+word padded pg_trgm-style ("  tomato " -> "  t", " to", "tom", ...), so
+misspelt queries still find names sharing most trigrams.
+
+The CropStore persists the names and counts (crop_names) and keeps a
+NameIndex in step with them as registrations are applied.
+"""
+import math
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+WORD = re.compile(r"[0-9a-z]+")
+
+# Score contributions
+EXACT_NAME_SCORE = 5.0
+TERM_SCORE = 2.0  # query word equal to a name word
+PREFIX_SCORE = 1.0  # query word a prefix of a name word
+TRIGRAM_SCORE = 2.0  # times the share of the query's trigrams found in the name
+BATCH_SCORE = 10.0  # exact batch number; listed before every name match
+
+# Queries shorter than this only use exact and prefix matching
+MIN_TRIGRAM_QUERY = 3
+
+
+def words(text: str) -> List[str]:
+    return WORD.findall(text.lower())
+
+
+def normalize(text: str) -> str:
+    return " ".join(words(text))
+
+
+def trigrams(text: str) -> Set[str]:
+    grams = set()
+    for word in words(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def query_trigrams(text: str) -> Set[str]:
+    """Trigrams to look a query up by
+
+    The "  x" word starts only say which letter a word begins with and
+    would match most names, so they are left out for longer words.
+    """
+    grams = set()
+    for word in words(text):
+        padded = f"  {word} "
+        first = 0 if len(word) < MIN_TRIGRAM_QUERY else 1
+        grams.update(padded[i:i + 3] for i in range(first, len(padded) - 2))
+    return grams
+
+
+class NameIndex:
+    def __init__(self):
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self.totals: Dict[str, int] = {}
+        self.terms: Dict[str, Set[str]] = defaultdict(set)
+        self.sorted_terms: List[str] = []
+        self.grams: Dict[str, Set[str]] = defaultdict(set)
+
+    def add(self, name_key: str, contract: str, crops: int = 1):
+        counts = self.counts.get(name_key)
+        if counts is None:
+            counts = self.counts[name_key] = {}
+            for term in set(name_key.split()):
+                if term not in self.terms:
+                    insort(self.sorted_terms, term)
+                self.terms[term].add(name_key)
+            for gram in trigrams(name_key):
+                self.grams[gram].add(name_key)
+        counts[contract] = counts.get(contract, 0) + crops
+        self.totals[name_key] = self.totals.get(name_key, 0) + crops
+
+    def count(self, name_key: str, contract: Optional[str] = None) -> int:
+        if contract is None:
+            return self.totals.get(name_key, 0)
+        return self.counts.get(name_key, {}).get(contract, 0)
+
+    def _prefixed(self, word: str):
+        i = bisect_left(self.sorted_terms, word)
+        while i < len(self.sorted_terms) and self.sorted_terms[i].startswith(word):
+            yield self.sorted_terms[i]
+            i += 1
+
+    def scores(self, query: str, min_similarity: float) -> Dict[str, float]:
+        """Score of every name matching the query (exact, word prefix or trigram overlap)
+
+        Trigrams are a fallback for misspellings: they are only consulted
+        when no name matches exactly or by prefix, which keeps common
+        queries cheap and scores independent of the page asked for.
+        """
+        name_key = normalize(query)
+        scores: Dict[str, float] = defaultdict(float)
+        if not name_key:
+            return scores
+        if name_key in self.counts:
+            scores[name_key] += EXACT_NAME_SCORE
+        for word in set(name_key.split()):
+            best: Dict[str, float] = {}
+            for term in self._prefixed(word):
+                score = TERM_SCORE if term == word else PREFIX_SCORE
+                for name in self.terms[term]:
+                    if score > best.get(name, 0.0):
+                        best[name] = score
+            for name, score in best.items():
+                scores[name] += score
+        if scores or len(name_key) < MIN_TRIGRAM_QUERY:
+            return scores
+
+        grams = query_trigrams(name_key)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for name in self.grams.get(gram, ()):
+                shared[name] += 1
+        needed = max(2, math.ceil(min_similarity * len(grams)))
+        for name, n in shared.items():
+            if n >= needed:
+                scores[name] += TRIGRAM_SCORE * n / len(grams)
+        return scores
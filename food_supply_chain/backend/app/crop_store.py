@@ -0,0 +1,565 @@
+import heapq
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import crop_geo, crop_search
+from .crop_codec import ENHANCED, Crop
+
+# Bump when the tables change; an index built with another version is
+# dropped and re-synced from the chain
+SCHEMA_VERSION = 4
+
+SCHEMA = """
+-- Columns follow the crop_codec.Crop field order; crop ids are per contract
+CREATE TABLE IF NOT EXISTS crops (
+    crop_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    quantity NOT NULL,
+    price NOT NULL,
+    batch_number TEXT NOT NULL,
+    harvest_date INTEGER NOT NULL,
+    expiry_date INTEGER NOT NULL,
+    ipfs_image_hash TEXT NOT NULL,
+    ipfs_cert_hash TEXT NOT NULL,
+    farm_coords TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    available INTEGER NOT NULL,
+    created_at INTEGER NOT NULL,
+    farmer TEXT NOT NULL,
+    registered_block INTEGER NOT NULL,
+    contract TEXT NOT NULL,
+    name_key TEXT NOT NULL,  -- crop_search.normalize(name)
+    PRIMARY KEY (contract, crop_id)
+);
+
+-- Registration order across both contracts: the order pages are served in
+CREATE INDEX IF NOT EXISTS crops_by_block ON crops (registered_block, contract, crop_id);
+
+-- Owner -> current crops; kept exact as transfers and purchases move crops
+CREATE INDEX IF NOT EXISTS crops_by_owner ON crops (owner, registered_block, contract, crop_id);
+
+-- Search: exact batch numbers, and a name's crops newest first
+CREATE INDEX IF NOT EXISTS crops_by_batch ON crops (batch_number COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS crops_by_name ON crops (name_key, registered_block);
+
+-- Search: distinct names with their crop counts (the word and trigram
+-- postings are rebuilt from these in memory, see crop_search.NameIndex)
+CREATE TABLE IF NOT EXISTS crop_names (
+    name_key TEXT NOT NULL,
+    contract TEXT NOT NULL,
+    crops INTEGER NOT NULL,
+    PRIMARY KEY (name_key, contract)
+) WITHOUT ROWID;
+
+-- Clustered by (contract, crop_id, timestamp) so a crop's history is one range scan
+CREATE TABLE IF NOT EXISTS transfers (
+    contract TEXT NOT NULL,
+    crop_id INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    from_address TEXT NOT NULL,
+    to_address TEXT NOT NULL,
+    note TEXT NOT NULL,
+    ipfs_data_hash TEXT,
+    transaction_hash TEXT NOT NULL,
+    PRIMARY KEY (contract, crop_id, timestamp, block_number, log_index)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+-- Search: crops a name page leaves out because the batch tier lists them
+-- (per connection, never part of a snapshot)
+CREATE TEMP TABLE IF NOT EXISTS search_excluded (
+    contract TEXT NOT NULL,
+    crop_id INTEGER NOT NULL,
+    PRIMARY KEY (contract, crop_id)
+) WITHOUT ROWID;
+"""
+
+DROP_SCHEMA = """
+DROP TABLE IF EXISTS crops;
+DROP TABLE IF EXISTS transfers;
+DROP TABLE IF EXISTS crop_names;
+DROP TABLE IF EXISTS sync_state;
+"""
+
+CROP_COLUMNS = (
+    "crop_id, name, quantity, price, batch_number, harvest_date, expiry_date, "
+    "ipfs_image_hash, ipfs_cert_hash, farm_coords, owner, available, created_at"
+)
+
+# Registration position of a crop in the unified order: (registered_block, contract, crop_id)
+CropKey = Tuple[int, str, int]
+
+# Stay well below SQLite's bound-parameter limit
+MAX_IN_PARAMS = 500
+
+# SQLite integers are signed 64-bit; larger uint256 values are stored as text
+MAX_SQLITE_INT = 2 ** 63 - 1
+
+
+def _int_value(value: int):
+    return value if value <= MAX_SQLITE_INT else str(value)
+
+
+class CropStore:
+    """SQLite read model of crops and their transfer log, fed by the indexer
+
+    One connection is shared between the indexer thread and request
+    handlers, guarded by a lock; writes for a block range are applied in a
+    single transaction together with the new sync position.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.RLock()
+        # In-memory search postings, columnar copy (crop_columns) and spatial
+        # index; None until first needed and after the tables are replaced
+        self._names: Optional[crop_search.NameIndex] = None
+        self._columns = None
+        self._geo: Optional[crop_geo.GeoIndex] = None
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            if self._get_state("schema_version") != str(SCHEMA_VERSION):
+                self._conn.executescript(DROP_SCHEMA + SCHEMA)
+                self._set_state("schema_version", SCHEMA_VERSION)
+
+    # ---------------- Sync state ----------------
+
+    def _get_state(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value):
+        self._conn.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value))
+        )
+
+    def last_block(self) -> int:
+        """Last block whose events are fully applied (-1 before the first sync)"""
+        with self._lock:
+            value = self._get_state("last_block")
+        return int(value) if value is not None else -1
+
+    def last_block_hash(self) -> Optional[str]:
+        with self._lock:
+            return self._get_state("last_block_hash")
+
+    def sources(self) -> Optional[str]:
+        """Contracts the index was built from, as recorded by set_sources"""
+        with self._lock:
+            return self._get_state("sources")
+
+    def set_sources(self, sources: str):
+        with self._lock:
+            self._set_state("sources", sources)
+
+    # ---------------- Snapshots ----------------
+
+    def reset(self):
+        """Drop everything indexed so far (sync restarts from the indexer's start block)"""
+        with self._lock:
+            self._conn.executescript(DROP_SCHEMA + SCHEMA)
+            self._set_state("schema_version", SCHEMA_VERSION)
+            self._names = self._columns = self._geo = None
+
+    def snapshot_to(self, path: str):
+        """Write a compacted copy of the whole index to path, atomically
+
+        The copy is read from its own connection, so queries and event
+        application carry on meanwhile: a file index is read through a
+        second connection, which WAL keeps on one consistent state; an
+        in-memory one is first copied page by page into a scratch database
+        under the lock, which takes a fraction of the VACUUM. The finished
+        file replaces path in one rename, so readers never see a partial
+        snapshot.
+        """
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if self.path == ":memory:":
+            source = sqlite3.connect(":memory:")
+            with self._lock:
+                self._conn.backup(source)
+        else:
+            source = sqlite3.connect(self.path)
+        try:
+            source.execute("VACUUM INTO ?", (tmp_path,))
+        finally:
+            source.close()
+        os.replace(tmp_path, path)
+
+    def restore_from(self, path: str):
+        """Replace the index with a snapshot written by snapshot_to"""
+        source = sqlite3.connect(path)
+        try:
+            row = source.execute("SELECT value FROM sync_state WHERE key = 'schema_version'").fetchone()
+            if not row or row[0] != str(SCHEMA_VERSION):
+                raise ValueError(f"Snapshot {path} has schema version {row[0] if row else None}, "
+                                 f"expected {SCHEMA_VERSION}")
+            with self._lock:
+                source.backup(self._conn)
+                self._names = self._columns = self._geo = None
+        finally:
+            source.close()
+
+    # ---------------- Writes ----------------
+
+    def apply_events(self, events: Iterable[dict], last_block: int, last_block_hash: str):
+        """Apply decoded events in chain order and advance the sync position atomically
+
+        Events of both contracts arrive normalized to the enhanced ones
+        (CropRegistered, CropTransferred, CropPurchased) and carry the
+        contract they came from.
+        """
+        events = list(events)
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                for event in events:
+                    kind = event["event"]
+                    contract = event["contract"]
+                    if kind == "CropRegistered":
+                        crop = event["crop"]
+                        name_key = crop_search.normalize(crop.name)
+                        known = conn.execute(
+                            "SELECT 1 FROM crops WHERE contract = ? AND crop_id = ?", (contract, crop.id)
+                        ).fetchone()
+                        conn.execute(
+                            f"INSERT OR REPLACE INTO crops ({CROP_COLUMNS}, farmer, registered_block, contract, "
+                            "name_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (crop.id, crop.name, _int_value(crop.quantity), _int_value(crop.price),
+                             crop.batch_number, crop.harvest_date, crop.expiry_date,
+                             crop.ipfs_image_hash or "", crop.ipfs_cert_hash or "", crop.farm_coords,
+                             crop.current_owner, int(crop.available), crop.created_at,
+                             event["farmer"], event["block_number"], contract, name_key)
+                        )
+                        if not known:
+                            self._index_name(name_key, contract)
+                    elif kind in ("CropTransferred", "CropPurchased"):
+                        from_address = event.get("from_address")
+                        if from_address is None:
+                            # CropPurchased does not carry the seller; it is the owner so far
+                            row = conn.execute(
+                                "SELECT owner FROM crops WHERE contract = ? AND crop_id = ?",
+                                (contract, event["crop_id"])
+                            ).fetchone()
+                            from_address = row[0] if row else ""
+                        conn.execute(
+                            "INSERT OR REPLACE INTO transfers "
+                            "(contract, crop_id, timestamp, block_number, log_index, from_address, to_address, "
+                            "note, ipfs_data_hash, transaction_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (contract, event["crop_id"], event["timestamp"], event["block_number"], event["log_index"],
+                             from_address, event["to_address"], event["note"], event.get("ipfs_data_hash"),
+                             event["transaction_hash"])
+                        )
+                        if kind == "CropPurchased":
+                            conn.execute(
+                                "UPDATE crops SET owner = ?, available = 0 WHERE contract = ? AND crop_id = ?",
+                                (event["to_address"], contract, event["crop_id"])
+                            )
+                        else:
+                            conn.execute(
+                                "UPDATE crops SET owner = ? WHERE contract = ? AND crop_id = ?",
+                                (event["to_address"], contract, event["crop_id"])
+                            )
+                self._set_state("last_block", last_block)
+                self._set_state("last_block_hash", last_block_hash)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                self._names = self._columns = self._geo = None
+                raise
+            if self._columns is not None:
+                self._columns.apply(events)
+            if self._geo is not None:
+                self._geo.apply(events)
+
+    def _index_name(self, name_key: str, contract: str):
+        """Count a newly registered crop under its name (names never change after registration)"""
+        self._conn.execute(
+            "INSERT INTO crop_names (name_key, contract, crops) VALUES (?, ?, 1) "
+            "ON CONFLICT(name_key, contract) DO UPDATE SET crops = crops + 1",
+            (name_key, contract)
+        )
+        if self._names is not None:
+            self._names.add(name_key, contract)
+
+    # ---------------- Reads ----------------
+
+    @staticmethod
+    def _transfer_row(row) -> dict:
+        return {
+            "from_address": row[1],
+            "to_address": row[2],
+            "timestamp": row[3],
+            "note": row[4],
+            "ipfs_data_hash": row[5] or None,
+            "transaction_hash": row[6],
+        }
+
+    @staticmethod
+    def _crop_tuple(row) -> Crop:
+        """Crop record from a crops row (columns are in Crop field order)"""
+        return Crop(row[0], row[1], int(row[2]), int(row[3]), *row[4:11], bool(row[11]), row[12])
+
+    def get_crop(self, crop_id: int, contract: str = ENHANCED) -> Optional[Crop]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {CROP_COLUMNS} FROM crops WHERE contract = ? AND crop_id = ?", (contract, crop_id)
+            ).fetchone()
+        return self._crop_tuple(row) if row else None
+
+    def get_crops_by_owner(self, owner: str, contract: str = ENHANCED) -> List[Crop]:
+        """Crops of one contract currently owned by a checksummed address, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {CROP_COLUMNS} FROM crops WHERE owner = ? AND contract = ? "
+                "ORDER BY registered_block, crop_id", (owner, contract)
+            ).fetchall()
+        return [self._crop_tuple(row) for row in rows]
+
+    def _get_crops(self, keys: List[Tuple[str, int]]) -> List[Crop]:
+        """Crops for (contract, crop_id) keys, in the same order"""
+        by_contract: Dict[str, List[int]] = defaultdict(list)
+        for contract, crop_id in keys:
+            by_contract[contract].append(crop_id)
+        crops = {}
+        for contract, crop_ids in by_contract.items():
+            for i in range(0, len(crop_ids), MAX_IN_PARAMS):
+                chunk = crop_ids[i:i + MAX_IN_PARAMS]
+                for row in self._conn.execute(
+                    f"SELECT {CROP_COLUMNS} FROM crops WHERE contract = ? AND crop_id IN ({','.join('?' * len(chunk))})",
+                    (contract, *chunk)
+                ):
+                    crops[(contract, row[0])] = self._crop_tuple(row)
+        return [crops[key] for key in keys if key in crops]
+
+    def has_crop(self, crop_id: int, contract: str = ENHANCED) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM crops WHERE contract = ? AND crop_id = ?", (contract, crop_id)
+            ).fetchone() is not None
+
+    def crop_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM crops").fetchone()[0]
+
+    def page_crops(self, limit: int, after: Optional[CropKey] = None, contract: Optional[str] = None,
+                   owner: Optional[str] = None, available: Optional[bool] = None) -> List[Tuple[CropKey, Crop]]:
+        """One page of crops from both contracts in registration order
+
+        Keyset pagination: pass the key of the last crop of the previous
+        page as after, so each page is an index range scan however deep.
+        """
+        clauses, params = [], []
+        if after is not None:
+            clauses.append("(registered_block, contract, crop_id) > (?, ?, ?)")
+            params.extend(after)
+        if contract is not None:
+            clauses.append("contract = ?")
+            params.append(contract)
+        if owner is not None:
+            clauses.append("owner = ?")
+            params.append(owner)
+        if available is not None:
+            clauses.append("available = ?")
+            params.append(int(available))
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {CROP_COLUMNS}, registered_block, contract FROM crops {where}"
+                "ORDER BY registered_block, contract, crop_id LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+        return [((row[13], row[14], row[0]), self._crop_tuple(row)) for row in rows]
+
+    def get_history(self, crop_id: int, contract: str = ENHANCED) -> List[dict]:
+        """Transfers and purchases of one crop, oldest first"""
+        return self.get_histories([crop_id], contract).get(crop_id, [])
+
+    def get_histories(self, crop_ids: List[int], contract: str = ENHANCED) -> Dict[int, List[dict]]:
+        """Histories for many crops of one contract; crops without transfers map to []"""
+        wanted = list(dict.fromkeys(crop_ids))
+        histories: Dict[int, List[dict]] = {}
+        with self._lock:
+            for i in range(0, len(wanted), MAX_IN_PARAMS):
+                chunk = wanted[i:i + MAX_IN_PARAMS]
+                marks = ",".join("?" * len(chunk))
+                for (crop_id,) in self._conn.execute(
+                    f"SELECT crop_id FROM crops WHERE contract = ? AND crop_id IN ({marks})", (contract, *chunk)
+                ):
+                    histories[crop_id] = []
+                for row in self._conn.execute(
+                    "SELECT crop_id, from_address, to_address, timestamp, note, ipfs_data_hash, "
+                    f"transaction_hash FROM transfers WHERE contract = ? AND crop_id IN ({marks}) "
+                    "ORDER BY crop_id, timestamp, block_number, log_index",
+                    (contract, *chunk)
+                ):
+                    histories[row[0]].append(self._transfer_row(row))
+        return histories
+
+    def page_history(self, crop_id: int, contract: str, limit: int,
+                     after: Optional[Tuple[int, int]] = None) -> List[Tuple[Tuple[int, int], dict]]:
+        """One page of a crop's history, oldest first, keyed by (block_number, log_index)"""
+        clause, params = "", []
+        if after is not None:
+            clause, params = "AND (block_number, log_index) > (?, ?) ", list(after)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT crop_id, from_address, to_address, timestamp, note, ipfs_data_hash, transaction_hash, "
+                "block_number, log_index FROM transfers WHERE contract = ? AND crop_id = ? "
+                f"{clause}ORDER BY timestamp, block_number, log_index LIMIT ?",
+                (contract, crop_id, *params, limit)
+            ).fetchall()
+        return [((row[7], row[8]), self._transfer_row(row)) for row in rows]
+
+    # ---------------- Search ----------------
+
+    def _name_index(self) -> crop_search.NameIndex:
+        if self._names is None:
+            names = crop_search.NameIndex()
+            for name_key, contract, crops in self._conn.execute("SELECT name_key, contract, crops FROM crop_names"):
+                names.add(name_key, contract, crops)
+            self._names = names
+        return self._names
+
+    def search(self, query: str, limit: int, offset: int = 0, contract: Optional[str] = None,
+               min_similarity: float = 0.3) -> Tuple[int, List[Tuple[str, float, Crop]]]:
+        """Ranked crops matching a batch number or (part of) a name
+
+        Returns the number of matches and one page of (contract, score,
+        crop). Exact batch number matches come first; then crops by the
+        score of their name (see crop_search), newest first within a
+        name. Work depends on the number of distinct matching names and
+        the page size, not on how many crops share a name.
+        """
+        query = query.strip()
+        if not query:
+            return 0, []
+        contract_clause = " AND contract = ?" if contract is not None else ""
+        contract_params = (contract,) if contract is not None else ()
+        with self._lock:
+            conn = self._conn
+            batch_rows = conn.execute(
+                f"SELECT {CROP_COLUMNS}, contract, name_key FROM crops WHERE batch_number = ? COLLATE NOCASE"
+                f"{contract_clause} ORDER BY registered_block DESC",
+                (query, *contract_params)
+            ).fetchall()
+            names = self._name_index()
+            scores = names.scores(query, min_similarity)
+            counts = {name: names.count(name, contract) for name in scores}
+
+            # A crop matching by batch number is only listed in the batch tier
+            excluded: Dict[str, List[Tuple[str, int]]] = defaultdict(list)
+            for row in batch_rows:
+                if row[14] in counts:
+                    excluded[row[14]].append((row[13], row[0]))
+            total = len(batch_rows) + sum(counts.values()) - sum(len(keys) for keys in excluded.values())
+            # Only the names the page reaches are ordered
+            ranked = [(-score, name) for name, score in scores.items() if counts[name]]
+            heapq.heapify(ranked)
+
+            page = [
+                (row[13], round(crop_search.BATCH_SCORE + scores.get(row[14], 0.0), 3), self._crop_tuple(row))
+                for row in batch_rows[offset:offset + limit]
+            ]
+            skip = max(0, offset - len(batch_rows))
+            while ranked and len(page) < limit:
+                name = heapq.heappop(ranked)[1]
+                available = counts[name] - len(excluded[name])
+                if skip >= available:
+                    skip -= available
+                    continue
+                exclude_clause = ""
+                if excluded[name]:
+                    # A temp table rather than one bound pair per crop: a batch
+                    # number can be shared by more crops than SQLite has variables
+                    conn.execute("DELETE FROM search_excluded")
+                    conn.executemany("INSERT OR IGNORE INTO search_excluded VALUES (?, ?)", excluded[name])
+                    exclude_clause = " AND (contract, crop_id) NOT IN (SELECT contract, crop_id FROM search_excluded)"
+                rows = conn.execute(
+                    f"SELECT {CROP_COLUMNS}, contract FROM crops WHERE name_key = ?{contract_clause}{exclude_clause} "
+                    "ORDER BY registered_block DESC, contract, crop_id LIMIT ? OFFSET ?",
+                    (name, *contract_params, limit - len(page), skip)
+                ).fetchall()
+                skip = 0
+                score = round(scores[name], 3)
+                page.extend((row[13], score, self._crop_tuple(row)) for row in rows)
+        return total, page
+
+    # ---------------- Columnar queries ----------------
+
+    def _column_store(self):
+        if self._columns is None:
+            from .crop_columns import CropColumns
+            self._columns = CropColumns.from_rows(self._conn.execute(
+                "SELECT contract, crop_id, price, quantity, harvest_date, expiry_date, created_at, available, "
+                "owner, name_key FROM crops ORDER BY registered_block, contract, crop_id"
+            ).fetchall())
+        return self._columns
+
+    def query_crops(self, limit: int, offset: int = 0, **filters) -> Tuple[int, List[Tuple[str, Crop]], dict]:
+        """Range-filtered, sorted crops from the columnar copy (see CropColumns.query for filters)
+
+        Returns the number of matches, one page of (contract, crop) and
+        aggregates over every match.
+        """
+        with self._lock:
+            result = self._column_store().query(limit, offset, **filters)
+            crops = self._get_crops(result.keys)
+        return result.total, [(key[0], crop) for key, crop in zip(result.keys, crops)], result.aggregates
+
+    # ---------------- Geospatial queries ----------------
+
+    def _geo_index(self) -> crop_geo.GeoIndex:
+        if self._geo is None:
+            geo = crop_geo.GeoIndex()
+            for contract, crop_id, farm_coords in self._conn.execute(
+                "SELECT contract, crop_id, farm_coords FROM crops WHERE farm_coords != ''"
+            ):
+                geo.add(contract, crop_id, farm_coords)
+            self._geo = geo
+        return self._geo
+
+    def crops_near(self, lat: float, lng: float, radius_km: float, limit: int, offset: int = 0,
+                   contract: Optional[str] = None) -> Tuple[int, List[Tuple[str, float, Crop]]]:
+        """Crops within radius_km of a point, nearest first
+
+        Returns the number of matches and one page of (contract,
+        distance_km, crop).
+        """
+        with self._lock:
+            matches = [
+                (distance, point) for distance, point in self._geo_index().within_radius(lat, lng, radius_km)
+                if contract is None or point[2] == contract
+            ]
+            page = matches[offset:offset + limit]
+            crops = self._get_crops([point[2:] for _, point in page])
+        return len(matches), [(point[2], distance, crop) for (distance, point), crop in zip(page, crops)]
+
+    def crops_within(self, south: float, west: float, north: float, east: float, limit: int, offset: int = 0,
+                     contract: Optional[str] = None) -> Tuple[int, List[Tuple[str, Crop]]]:
+        """Crops inside a bounding box (west > east crosses the antimeridian), by (contract, crop_id)"""
+        with self._lock:
+            keys = [
+                point[2:] for point in self._geo_index().within_box(south, west, north, east)
+                if contract is None or point[2] == contract
+            ]
+            page = keys[offset:offset + limit]
+            crops = self._get_crops(page)
+        return len(keys), [(key[0], crop) for key, crop in zip(page, crops)]
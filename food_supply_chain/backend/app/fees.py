@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import statistics
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from . import config
+from . import metrics
+from .blockchain import estimate_gas, get_web3
+
+logger = logging.getLogger(__name__)
+
+
+class FeeOracle:
+    """Background sampler of EIP-1559 fee estimates
+
+    Every interval it reads eth_feeHistory over the last few blocks and
+    keeps the next base fee and the median priority fee, so writes can set
+    maxFeePerGas / maxPriorityFeePerGas without asking the node per
+    request. Nodes without eth_feeHistory fall back to the latest block's
+    base fee and eth_maxPriorityFeePerGas; pre-London chains to gasPrice.
+    """
+
+    def __init__(self, interval: float = 5.0, history_blocks: int = 10, reward_percentile: float = 50.0,
+                 base_fee_multiplier: float = 2.0, max_age: float = 60.0):
+        self.interval = interval
+        self.history_blocks = history_blocks
+        self.reward_percentile = reward_percentile
+        self.base_fee_multiplier = base_fee_multiplier
+        self.max_age = max_age
+        self.base_fee: Optional[int] = None
+        self.priority_fee: Optional[int] = None
+        self.gas_price: Optional[int] = None
+        self.sampled_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def sample_once(self):
+        w3 = get_web3()
+        with metrics.RPC_LATENCY.labels("eth_feeHistory", "fee_oracle").time():
+            try:
+                history = w3.eth.fee_history(self.history_blocks, "latest", [self.reward_percentile])
+                base_fee = history["baseFeePerGas"][-1]  # already the next block's base fee
+                rewards = [reward[0] for reward in history.get("reward") or [] if reward]
+                priority_fee = int(statistics.median(rewards)) if rewards else None
+            except Exception as e:
+                logger.debug(f"eth_feeHistory unavailable, using latest block: {e}")
+                base_fee = w3.eth.get_block("latest").get("baseFeePerGas")
+                priority_fee = None
+
+        if base_fee is None:
+            self.base_fee, self.priority_fee = None, None
+            self.gas_price = w3.eth.gas_price
+        else:
+            if priority_fee is None:
+                try:
+                    priority_fee = w3.eth.max_priority_fee
+                except Exception:
+                    priority_fee = config.FEE_DEFAULT_PRIORITY_WEI
+            self.base_fee, self.priority_fee, self.gas_price = base_fee, priority_fee, None
+        self.sampled_at = time.time()
+
+    def fee_params(self) -> Dict[str, int]:
+        """Fee fields for a transaction; empty (node decides) until a fresh sample exists"""
+        if self.sampled_at is None or time.time() - self.sampled_at > self.max_age:
+            return {}
+        if self.base_fee is None:
+            return {"gasPrice": self.gas_price}
+        return {
+            "maxFeePerGas": int(self.base_fee * self.base_fee_multiplier) + self.priority_fee,
+            "maxPriorityFeePerGas": self.priority_fee,
+        }
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        return {
+            "base_fee": self.base_fee,
+            "priority_fee": self.priority_fee,
+            "gas_price": self.gas_price,
+            "sampled_at": self.sampled_at,
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.sample_once)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Fee sampling failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class GasEstimateCache:
+    """Gas limits per function selector and calldata word count
+
+    Calls share an entry only when their arguments encode to the same
+    number of 32-byte words, so a longer note or CID, which the contract
+    stores in more slots, always gets its own estimate. Same-sized strings
+    can still differ by one slot (up to 31 bytes are stored inline), which
+    the headroom covers. Entries keep the largest estimate seen and expire
+    after ttl; a transaction that runs out of gas invalidates its entry.
+    """
+
+    def __init__(self, ttl: float = 600.0, headroom: float = 1.25, max_entries: int = 1024):
+        self.ttl = ttl
+        self.headroom = headroom
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[str, int], Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(contract_function) -> Tuple[str, int]:
+        # Calldata is the 4-byte selector ("0x" + 8 hex digits) and the arguments
+        data = contract_function._encode_transaction_data()
+        return data[:10], (len(data) - 10) // 64
+
+    def gas_limit(self, contract_function, transaction: dict) -> int:
+        """Cached gas limit for the call, estimating (and caching) on a miss"""
+        key = self.key(contract_function)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and now - entry[1] < self.ttl:
+            metrics.record_cache("gas_estimate", True)
+            return entry[0]
+
+        metrics.record_cache("gas_estimate", False)
+        gas = int(estimate_gas(contract_function, transaction) * self.headroom)
+        with self._lock:
+            if entry is not None and now - entry[1] < self.ttl:
+                gas = max(gas, entry[0])
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (gas, now)
+        return gas
+
+    def invalidate(self, contract_function):
+        with self._lock:
+            self._entries.pop(self.key(contract_function), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def build_transaction(contract_function, sender: str, value: int = 0) -> dict:
+    """Transaction fields with a cached gas limit and sampled fees (no per-request estimate)"""
+    transaction = {"from": sender}
+    if value:
+        transaction["value"] = value
+    transaction["gas"] = gas_cache.gas_limit(contract_function, dict(transaction))
+    transaction.update(fee_oracle.fee_params())
+    return transaction
+
+
+def check_receipt_gas(contract_function, transaction: dict, receipt):
+    """Drop the cached estimate when a transaction failed having used its whole gas limit"""
+    if receipt.status != 1 and receipt.gasUsed >= transaction.get("gas", 0):
+        gas_cache.invalidate(contract_function)
+
+
+fee_oracle = FeeOracle(
+    interval=config.FEE_SAMPLE_SECONDS,
+    history_blocks=config.FEE_HISTORY_BLOCKS,
+    reward_percentile=config.FEE_REWARD_PERCENTILE,
+)
+gas_cache = GasEstimateCache(ttl=config.GAS_CACHE_TTL_SECONDS)
+
+metrics.Gauge(
+    "fee_oracle_wei", "Sampled fee estimates in wei", ["kind"],
+    callback=lambda: {
+        (kind,): value for kind, value in (
+            ("base_fee", fee_oracle.base_fee),
+            ("priority_fee", fee_oracle.priority_fee),
+            ("gas_price", fee_oracle.gas_price),
+        ) if value is not None
+    }
+)
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import orjson
+from fastapi.responses import Response
+
+from . import config
+from . import metrics
+from .blockchain import get_web3
+from .contract_gateway import get_gateway
+from .indexer import crop_store, indexer
+from .ipfs_service import ipfs_service
+
+logger = logging.getLogger(__name__)
+
+HEALTHY = "healthy"
+DEGRADED = "degraded"
+UNHEALTHY = "unhealthy"
+STARTING = "starting"
+
+# Failing any of these makes the worker unready; the rest only degrade it
+CRITICAL_CHECKS = ("rpc", "contract")
+
+
+class HealthMonitor:
+    """Background dependency probes behind /health and /ready
+
+    Every interval the probes run concurrently in worker threads, each
+    bounded by timeout, and the result is rendered to JSON once. The
+    endpoints return those bytes as they are, so load balancer checks at
+    any rate never reach the node, IPFS or the index.
+    """
+
+    def __init__(self, interval: float = 10.0, timeout: float = 5.0):
+        self.interval = interval
+        self.timeout = timeout
+        self.status = STARTING
+        self.checks: Dict[str, dict] = {}
+        self.checked_at: Optional[float] = None
+        self._body = self._render()
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------------- Probes (blocking, run in threads) ----------------
+
+    def _probe_rpc(self) -> dict:
+        w3 = get_web3()
+        block = w3.eth.get_block("latest")
+        age = max(0.0, time.time() - block["timestamp"])
+        result = {"head_block": block["number"], "block_age_seconds": round(age, 1)}
+        ok = not config.HEALTH_MAX_BLOCK_AGE_SECONDS or age <= config.HEALTH_MAX_BLOCK_AGE_SECONDS
+
+        nodes = getattr(w3.provider, "nodes", None)
+        if nodes:
+            heights = {}
+            for node in nodes:
+                height = None
+                if node.breaker.allow():
+                    try:
+                        height = int(node.request("eth_blockNumber", [])["result"], 16)
+                    except Exception:
+                        pass
+                heights[node.url] = height
+            answered = [height for height in heights.values() if height is not None]
+            lag = max(answered) - min(answered) if answered else None
+            result.update(nodes=heights, node_lag_blocks=lag)
+            ok = ok and lag is not None and lag <= config.HEALTH_MAX_NODE_LAG_BLOCKS
+        result["ok"] = ok
+        return result
+
+    def _probe_contract(self) -> dict:
+        gateway = get_gateway()
+        code = gateway.w3.eth.get_code(gateway.address)
+        return {"ok": len(code) > 0, "address": gateway.address, "code_bytes": len(code)}
+
+    def _probe_ipfs(self) -> dict:
+        backends = {}
+        for backend in ipfs_service.backends:
+            started = time.perf_counter()
+            reachable = ipfs_service.probe(backend)
+            backends[backend] = {"ok": reachable, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+        # Uploads still work while any backend does
+        return {"ok": any(entry["ok"] for entry in backends.values()), "backends": backends}
+
+    # ---------------- Cheap in-process checks ----------------
+
+    def _check_event_loop(self) -> dict:
+        lag = metrics.event_loop_monitor.last_lag
+        return {"ok": lag <= config.HEALTH_MAX_LOOP_LAG_SECONDS, "lag_seconds": round(lag, 4)}
+
+    def _check_index(self, head_block: Optional[int]) -> dict:
+        if not config.INDEXER_ENABLED:
+            return {"ok": True, "enabled": False}
+        last_block = crop_store.last_block()
+        lag = max(0, head_block - last_block) if head_block is not None else indexer.lag_blocks()
+        synced_ago = time.time() - indexer.last_synced_at if indexer.last_synced_at else None
+        return {
+            "ok": indexer.last_error is None and lag <= config.HEALTH_MAX_INDEX_LAG_BLOCKS,
+            "last_block": last_block,
+            "lag_blocks": lag,
+            "synced_seconds_ago": round(synced_ago, 1) if synced_ago is not None else None,
+            "error": indexer.last_error,
+            "backfill": indexer.backfill.progress() if indexer.backfill is not None else None,
+        }
+
+    # ---------------- Snapshot ----------------
+
+    async def _run_probe(self, name: str, probe: Callable[[], dict]) -> Tuple[str, dict]:
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(asyncio.to_thread(probe), self.timeout)
+        except asyncio.TimeoutError:
+            result = {"ok": False, "error": f"timed out after {self.timeout}s"}
+        except Exception as e:
+            result = {"ok": False, "error": str(e)}
+        result["probe_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return name, result
+
+    async def probe_once(self):
+        probes = {"rpc": self._probe_rpc, "contract": self._probe_contract, "ipfs": self._probe_ipfs}
+        checks = dict(await asyncio.gather(*(self._run_probe(name, probe) for name, probe in probes.items())))
+        checks["event_loop"] = self._check_event_loop()
+        checks["index"] = self._check_index(checks["rpc"].get("head_block"))
+
+        if all(check["ok"] for check in checks.values()):
+            status = HEALTHY
+        elif any(not checks[name]["ok"] for name in CRITICAL_CHECKS):
+            status = UNHEALTHY
+        else:
+            status = DEGRADED
+        if status != self.status:
+            failing = [name for name, check in checks.items() if not check["ok"]]
+            logger.info(f"Health {self.status} -> {status}" + (f" (failing: {', '.join(failing)})" if failing else ""))
+        self.checks, self.status, self.checked_at = checks, status, time.time()
+        self._body = self._render()
+
+    def _render(self) -> bytes:
+        return orjson.dumps({"status": self.status, "checked_at": self.checked_at, "checks": self.checks})
+
+    @property
+    def ready(self) -> bool:
+        return self.status in (HEALTHY, DEGRADED)
+
+    def health_response(self) -> Response:
+        """Liveness (always 200, so dependency outages do not restart workers) plus the last snapshot"""
+        return Response(self._body, media_type="application/json")
+
+    def ready_response(self) -> Response:
+        """503 until the first probe round and while a critical dependency is down"""
+        return Response(self._body, status_code=200 if self.ready else 503, media_type="application/json")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Health probe round failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+health_monitor = HealthMonitor(interval=config.HEALTH_PROBE_SECONDS, timeout=config.HEALTH_PROBE_TIMEOUT_SECONDS)
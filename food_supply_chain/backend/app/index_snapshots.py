@@ -0,0 +1,82 @@
+import logging
+import os
+import re
+from typing import Callable, List, NamedTuple, Optional
+
+from .crop_store import CropStore
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_NAME = re.compile(r"^crops-(\d+)-([0-9a-f]+)\.sqlite$")
+
+
+def normalize_hash(block_hash: str) -> str:
+    """Lowercase hex without 0x (HexBytes.hex() includes the prefix in some versions only)"""
+    block_hash = block_hash.lower()
+    return block_hash[2:] if block_hash.startswith("0x") else block_hash
+
+
+class Snapshot(NamedTuple):
+    block_number: int
+    block_hash: str
+    path: str
+
+
+class SnapshotStore:
+    """Directory of CropStore snapshots, each named by the block it is valid for
+
+    A snapshot holds the crop, owner and history tables exactly as they
+    stood after block_number, whose hash was block_hash. Restoring one and
+    syncing from block_number + 1 replaces replaying every log from the
+    start block; only the newest keep snapshots are retained.
+    """
+
+    def __init__(self, directory: str, keep: int = 3):
+        self.directory = directory
+        self.keep = keep
+
+    def list(self) -> List[Snapshot]:
+        """Snapshots newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        snapshots = []
+        for name in os.listdir(self.directory):
+            match = SNAPSHOT_NAME.match(name)
+            if match:
+                snapshots.append(Snapshot(int(match.group(1)), match.group(2), os.path.join(self.directory, name)))
+        return sorted(snapshots, reverse=True)
+
+    def save(self, store: CropStore) -> Optional[Snapshot]:
+        block_number, block_hash = store.last_block(), store.last_block_hash()
+        if block_number < 0 or not block_hash:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        block_hash = normalize_hash(block_hash)
+        path = os.path.join(self.directory, f"crops-{block_number}-{block_hash}.sqlite")
+        store.snapshot_to(path)
+        for stale in self.list()[self.keep:]:
+            try:
+                os.remove(stale.path)
+            except OSError as e:
+                logger.warning(f"Could not remove old index snapshot {stale.path}: {e}")
+        return Snapshot(block_number, block_hash, path)
+
+    def restore_latest(self, store: CropStore, chain_hash_at: Callable[[int], Optional[str]]) -> Optional[Snapshot]:
+        """Load the newest snapshot whose block is still on the canonical chain
+
+        chain_hash_at(block_number) gives the chain's current hash for a
+        block (None if the chain is not that long). Snapshots from an
+        abandoned fork are skipped; None means nothing usable was found.
+        """
+        for snapshot in self.list():
+            chain_hash = chain_hash_at(snapshot.block_number)
+            if chain_hash is None or normalize_hash(chain_hash) != snapshot.block_hash:
+                logger.info(f"Skipping index snapshot at block {snapshot.block_number}: not on the current chain")
+                continue
+            try:
+                store.restore_from(snapshot.path)
+            except Exception as e:
+                logger.warning(f"Could not restore index snapshot {snapshot.path}: {e}")
+                continue
+            return snapshot
+        return None
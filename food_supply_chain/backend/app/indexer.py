@@ -0,0 +1,385 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from . import config
+from . import metrics
+from .backfill import LogBackfill
+from .contract_gateway import get_gateway, get_legacy_gateway
+from .crop_codec import ENHANCED, LEGACY, Crop, CropInput, TransferInput, legacy_crop, registered_crop
+from .crop_store import CropStore
+from .index_snapshots import SnapshotStore, normalize_hash
+
+logger = logging.getLogger(__name__)
+
+INDEXED_EVENTS = {
+    ENHANCED: ("CropRegistered", "CropTransferred", "CropPurchased"),
+    LEGACY: ("CropRegistered", "CropSold"),
+}
+# Record type of the calldata behind each event that needs it
+CALL_RECORDS = {"CropRegistered": CropInput, "CropTransferred": TransferInput}
+# Functions whose calldata completes an event -> batch array argument (None for single calls)
+CALL_FUNCTIONS = {
+    "registerCrop": None,
+    "registerCrops": "_crops",
+    "transferCrop": None,
+    "transferCrops": "_transfers",
+}
+
+
+class ContractIndexer:
+    """Follows EnhancedFoodSupplyChain (and legacy FoodSupplyChain) events into the local CropStore
+
+    Logs are fetched with eth_getLogs in block ranges, decoded and applied
+    in chain order, so history and owner reads never touch the node. The blocking web3
+    calls run in a worker thread; the async loop only schedules polls.
+
+    When LEGACY_CONTRACT_ADDRESS is set, one eth_getLogs per range covers
+    both contracts and the legacy events are normalized to the enhanced
+    ones, so both share a sync position, snapshots and reorg handling.
+
+    With a SnapshotStore, an empty index starts from the newest snapshot
+    still on the chain instead of the start block, a new snapshot is taken
+    every snapshot_blocks blocks (or snapshot_seconds with any progress)
+    and on stop, and a reorg below the indexed block rolls the index back
+    to the newest consistent snapshot. A node head up to max_node_lag
+    blocks below the indexed block is taken as a lagging node and waited
+    for; a lower head means the chain was replaced (a restarted dev chain,
+    a deep reorg) and is rolled back the same way. A large gap to the head
+    is filled by the parallel LogBackfill before the regular batch loop.
+    """
+
+    def __init__(self, store: CropStore, poll_interval: float = 2.0, batch_blocks: int = 2000,
+                 start_block: int = 0, snapshots: Optional[SnapshotStore] = None,
+                 snapshot_blocks: int = 1000, snapshot_seconds: float = 300.0, backfill_workers: int = 4,
+                 backfill_max_blocks: int = 100_000, max_node_lag: int = 5):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.batch_blocks = batch_blocks
+        self.start_block = start_block
+        self.snapshots = snapshots
+        self.snapshot_blocks = snapshot_blocks
+        self.snapshot_seconds = snapshot_seconds
+        self.snapshot_block = -1
+        self.backfill_workers = backfill_workers
+        self.backfill_max_blocks = backfill_max_blocks
+        self.max_node_lag = max_node_lag
+        self.backfill: Optional[LogBackfill] = None
+        self.head_block = -1
+        self.last_synced_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._snapshot_at = time.monotonic()
+        self._restore_checked = False
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------------- Decoding ----------------
+
+    @staticmethod
+    def _gateways() -> Dict[str, object]:
+        gateways = {ENHANCED: get_gateway()}
+        legacy = get_legacy_gateway()
+        if legacy is not None:
+            gateways[LEGACY] = legacy
+        return gateways
+
+    @staticmethod
+    def _event_types(gateways) -> Dict[Tuple[str, bytes], Tuple[str, object]]:
+        """Map (emitting address, topic0) to the source contract and the event used to decode it"""
+        return {
+            (gateway.address, gateway.topics[name]): (contract, gateway.events[name])
+            for contract, gateway in gateways.items()
+            for name in INDEXED_EVENTS[contract] if name in gateway.topics
+        }
+
+    @staticmethod
+    def _sources_key(gateways) -> str:
+        return ",".join(f"{contract}:{gateway.address}" for contract, gateway in sorted(gateways.items()))
+
+    def _decode_input(self, w3, contract, tx_hash):
+        """(function name, arguments) of the transaction that emitted a log"""
+        try:
+            function, params = contract.decode_function_input(w3.eth.get_transaction(tx_hash).input)
+        except Exception as e:
+            # e.g. the call came through another contract
+            logger.debug(f"Could not decode input of {tx_hash.hex()}: {e}")
+            return None, {}
+        return function.fn_name, params
+
+    def _call_values(self, w3, contract, calls: dict, log, event_name: str) -> Optional[tuple]:
+        """Arguments behind one event, as a CropInput / TransferInput record
+
+        Single calls map to their arguments; the batch functions emit one
+        event per item in order, so the k-th event of a transaction belongs
+        to its k-th item. Decoded inputs are cached per transaction in calls.
+        """
+        tx_hash = log["transactionHash"]
+        entry = calls.get(tx_hash)
+        if entry is None:
+            entry = calls[tx_hash] = [*self._decode_input(w3, contract, tx_hash), {}]
+        fn_name, params, positions = entry
+        if fn_name not in CALL_FUNCTIONS:
+            return None
+        record = CALL_RECORDS[event_name]
+        batch_param = CALL_FUNCTIONS[fn_name]
+        if batch_param is None:
+            return record._make(params.values())
+        position = positions.get(event_name, 0)
+        positions[event_name] = position + 1
+        items = params[batch_param]
+        return record._make(items[position]) if position < len(items) else None
+
+    def _registered_crop(self, gateway, values: Optional[CropInput], args, timestamp) -> Crop:
+        """Crop as registered
+
+        Taken from the registration calldata so the row reflects the block
+        being indexed; falls back to getCrop with the registration-time
+        owner and availability.
+        """
+        if values is not None:
+            return registered_crop(args.cropId, values, args.farmer, timestamp)
+        crop = gateway.get_crop(args.cropId)
+        return crop._replace(current_owner=args.farmer, available=True, created_at=timestamp)
+
+    def _decode(self, gateways, event_types, logs) -> List[dict]:
+        gateway = gateways[ENHANCED]
+        w3, contract = gateway.w3, gateway.contract
+        timestamps: Dict[int, int] = {}
+        calls: Dict[bytes, list] = {}
+        events = []
+        for log in sorted(logs, key=lambda entry: (entry["blockNumber"], entry["logIndex"])):
+            source, event_type = event_types.get((log["address"], bytes(log["topics"][0])), (None, None))
+            if event_type is None:
+                continue
+            decoded = event_type.process_log(log)
+            args = decoded.args
+            block_number = log["blockNumber"]
+            if block_number not in timestamps:
+                timestamps[block_number] = w3.eth.get_block(block_number)["timestamp"]
+            event = {
+                "event": decoded.event,
+                "contract": source,
+                "block_number": block_number,
+                "log_index": log["logIndex"],
+                "timestamp": timestamps[block_number],
+                "transaction_hash": log["transactionHash"].hex(),
+            }
+            if source == LEGACY:
+                event["crop_id"] = args.id
+                if decoded.event == "CropRegistered":
+                    event.update(farmer=args.farmer, crop=legacy_crop(
+                        args.id, args.name, args.quantity, args.price, args.farmer, timestamps[block_number]
+                    ))
+                else:
+                    # CropSold is the legacy purchase
+                    event.update(event="CropPurchased", to_address=args.buyer, note="Purchase transaction")
+                events.append(event)
+                continue
+            event["crop_id"] = args.cropId
+            if decoded.event == "CropRegistered":
+                values = self._call_values(w3, contract, calls, log, decoded.event)
+                event.update(
+                    farmer=args.farmer,
+                    crop=self._registered_crop(gateway, values, args, timestamps[block_number])
+                )
+            elif decoded.event == "CropTransferred":
+                # CropTransferred omits ipfsDataHash; recover it from the calldata
+                values = self._call_values(w3, contract, calls, log, decoded.event)
+                event.update(
+                    from_address=args["from"], to_address=args.to, note=args.note,
+                    ipfs_data_hash=(values.ipfs_data_hash or None) if values else None
+                )
+            else:
+                # Mirrors the TransferEvent buyCrop appends to cropHistory
+                event.update(to_address=args.buyer, note="Purchase transaction")
+            events.append(event)
+        return events
+
+    # ---------------- Snapshots and reorgs ----------------
+
+    @staticmethod
+    def _chain_hash(w3, block_number: int, head: int) -> Optional[str]:
+        if block_number > head:
+            return None
+        return w3.eth.get_block(block_number)["hash"].hex()
+
+    def _restore_snapshot(self, w3, head: int) -> bool:
+        snapshot = self.snapshots.restore_latest(self.store, lambda n: self._chain_hash(w3, n, head))
+        if snapshot is None:
+            return False
+        self.snapshot_block = snapshot.block_number
+        logger.info(f"Restored index snapshot at block {snapshot.block_number}; catching up to {head}")
+        return True
+
+    def _check_reorg(self, w3, head: int):
+        """Roll back when the indexed block's hash differs from the chain's at that height"""
+        last_block = self.store.last_block()
+        if last_block < 0:
+            return
+        stored_hash = self.store.last_block_hash()
+        chain_hash = self._chain_hash(w3, last_block, head)
+        if not stored_hash or chain_hash is None or normalize_hash(chain_hash) == normalize_hash(stored_hash):
+            return
+        logger.warning(f"Indexed block {last_block} is no longer on the chain (head {head}); rolling back")
+        self._roll_back(w3, head)
+
+    def _roll_back(self, w3, head: int):
+        """Go back to the newest snapshot still on the chain, or start over"""
+        INDEXER_REORGS.inc()
+        self.snapshot_block = -1
+        if self.snapshots is None or not self._restore_snapshot(w3, head):
+            self.store.reset()
+
+    def save_snapshot(self, force: bool = False) -> bool:
+        """Snapshot the index if enough progress (or time with progress) has accumulated"""
+        if self.snapshots is None:
+            return False
+        progress = self.store.last_block() - self.snapshot_block
+        due = progress >= self.snapshot_blocks or time.monotonic() - self._snapshot_at >= self.snapshot_seconds
+        if progress <= 0 or not (due or force):
+            return False
+        started = time.perf_counter()
+        snapshot = self.snapshots.save(self.store)
+        self._snapshot_at = time.monotonic()
+        if snapshot is None:
+            return False
+        self.snapshot_block = snapshot.block_number
+        logger.info(f"Index snapshot at block {snapshot.block_number} in {time.perf_counter() - started:.2f}s")
+        return True
+
+    # ---------------- Syncing ----------------
+
+    def _fetch_range(self, gateways, event_types, start: int, end: int):
+        """Decoded events of [start, end] from every indexed contract and the hash of block end"""
+        w3 = gateways[ENHANCED].w3
+        with metrics.RPC_LATENCY.labels("eth_getLogs", "indexer").time():
+            logs = w3.eth.get_logs({
+                "address": [gateway.address for gateway in gateways.values()],
+                "fromBlock": start,
+                "toBlock": end,
+                "topics": [sorted({"0x" + topic.hex() for _, topic in event_types})],
+            })
+        return self._decode(gateways, event_types, logs), w3.eth.get_block(end)["hash"].hex()
+
+    def _check_sources(self, gateways):
+        """Start over when the index was built from other contract addresses"""
+        sources = self._sources_key(gateways)
+        if self.store.sources() == sources:
+            return
+        if self.store.last_block() >= 0:
+            logger.warning(f"Crop index was built from {self.store.sources()}, now indexing {sources}; re-syncing")
+            self.store.reset()
+            self.snapshot_block = -1
+        self.store.set_sources(sources)
+
+    def sync_once(self) -> int:
+        """Index every block up to the current head; returns the number of events applied"""
+        gateways = self._gateways()
+        w3 = gateways[ENHANCED].w3
+        event_types = self._event_types(gateways)
+        head = w3.eth.block_number
+        self.head_block = head
+        if not self._restore_checked:
+            self._restore_checked = True
+            if self.snapshots is not None and self.store.last_block() < 0:
+                self._restore_snapshot(w3, head)
+        behind = self.store.last_block() - head
+        if 0 < behind <= self.max_node_lag:
+            # Reads go to the fastest node, which may be a block or two behind the
+            # one the index was built from: wait for it instead of rolling back
+            logger.debug(f"Node head {head} is behind indexed block {self.store.last_block()}; skipping poll")
+            return 0
+        if behind > 0:
+            logger.warning(f"Node head {head} is {behind} blocks below indexed block {self.store.last_block()}; "
+                           f"the chain was replaced, rolling back")
+            self._roll_back(w3, head)
+        self._check_reorg(w3, head)
+        self._check_sources(gateways)
+        start = max(self.store.last_block() + 1, self.start_block)
+        applied = 0
+        if self.backfill_workers > 1 and head - start + 1 > self.batch_blocks * self.backfill_workers:
+            # Far behind (first sync, long outage): fetch ranges in parallel
+            self.backfill = LogBackfill(
+                lambda from_block, to_block: self._fetch_range(gateways, event_types, from_block, to_block),
+                self.store.apply_events,
+                workers=self.backfill_workers,
+                initial_span=self.batch_blocks,
+                max_span=self.backfill_max_blocks,
+                on_flush=self.save_snapshot,
+            )
+            applied += self.backfill.run(start, head)
+            start = head + 1
+        while start <= head:
+            end = min(start + self.batch_blocks - 1, head)
+            events, end_hash = self._fetch_range(gateways, event_types, start, end)
+            self.store.apply_events(events, end, end_hash)
+            applied += len(events)
+            start = end + 1
+        self.last_synced_at = time.time()
+        self.save_snapshot()
+        return applied
+
+    async def _run(self):
+        backoff = self.poll_interval
+        while True:
+            try:
+                applied = await asyncio.to_thread(self.sync_once)
+                if applied:
+                    logger.debug(f"Indexed {applied} events up to block {self.store.last_block()}")
+                self.last_error = None
+                backoff = self.poll_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.last_error != str(e):
+                    logger.warning(f"Indexer sync failed: {e}")
+                self.last_error = str(e)
+                backoff = min(backoff * 2, 60.0)
+            await asyncio.sleep(backoff)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                await asyncio.to_thread(self.save_snapshot, True)
+            except Exception as e:
+                logger.warning(f"Could not snapshot the index on shutdown: {e}")
+
+    def lag_blocks(self) -> int:
+        return max(0, self.head_block - self.store.last_block())
+
+
+INDEXER_REORGS = metrics.Counter(
+    "indexer_reorgs_total", "Reorgs below the indexed block that rolled the crop index back"
+)
+
+crop_store = CropStore(config.INDEX_DB_PATH)
+indexer = ContractIndexer(
+    crop_store,
+    poll_interval=config.INDEXER_POLL_SECONDS,
+    batch_blocks=config.INDEXER_BATCH_BLOCKS,
+    start_block=config.INDEXER_START_BLOCK,
+    snapshots=SnapshotStore(config.INDEX_SNAPSHOT_DIR, keep=config.INDEX_SNAPSHOT_KEEP)
+    if config.INDEX_SNAPSHOT_DIR else None,
+    snapshot_blocks=config.INDEX_SNAPSHOT_BLOCKS,
+    snapshot_seconds=config.INDEX_SNAPSHOT_SECONDS,
+    backfill_workers=config.INDEXER_BACKFILL_WORKERS,
+    backfill_max_blocks=config.INDEXER_BACKFILL_MAX_BLOCKS,
+    max_node_lag=config.HEALTH_MAX_NODE_LAG_BLOCKS,
+)
+
+metrics.Gauge("indexer_last_block", "Last block applied to the local crop index",
+              callback=crop_store.last_block)
+metrics.Gauge("indexer_snapshot_block", "Block of the last crop index snapshot written or restored",
+              callback=lambda: indexer.snapshot_block)
+metrics.Gauge("indexer_lag_blocks", "Blocks between the chain head and the local crop index",
+              callback=indexer.lag_blocks)
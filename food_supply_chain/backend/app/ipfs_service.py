@@ -1,8 +1,19 @@
+import logging
 import os
+import threading
+import time
 import requests
-import ipfshttpclient
-from typing import Optional, Dict, Any
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional, Dict, Any, List, Tuple
 from . import config
+from . import metrics
+from .tracing import span
+from .utils.resilience import CircuitBreaker, RollingLatency
+
+logger = logging.getLogger(__name__)
+
+_NOT_CONNECTED = object()
+
 
 class IPFSService:
     def __init__(self):
@@ -10,40 +21,241 @@ class IPFSService:
         self.pinata_api_key = config.PINATA_API_KEY
         self.pinata_secret = config.PINATA_SECRET
         self.ipfs_url = config.IPFS_URL
-        
-        # Initialize IPFS client if not using Pinata
-        if not self.use_pinata:
-            try:
-                self.ipfs_client = ipfshttpclient.connect(self.ipfs_url)
-            except Exception as e:
-                print(f"Warning: Could not connect to IPFS node at {self.ipfs_url}")
-                print(f"Error: {e}")
-                self.ipfs_client = None
+        # The local node is connected on first use (or by the startup warmup)
+        self._ipfs_client = _NOT_CONNECTED
+        self._connect_lock = threading.Lock()
+
+        # Several backends: hedged uploads with background replication
+        self.backends: List[str] = config.IPFS_BACKENDS or ["pinata" if self.use_pinata else "local"]
+        # Single-backend calls go to Pinata only when it is the backend; file URLs use
+        # its gateway whenever it is configured and preferred (USE_PINATA)
+        self.use_pinata = "pinata" in self.backends and (self.use_pinata or self.backends == ["pinata"])
+        self.multi_backend = len(self.backends) > 1
+        self.hedge_after = config.IPFS_HEDGE_SECONDS
+        self.replicate = config.IPFS_REPLICATE
+        self.health = {
+            backend: (CircuitBreaker(config.IPFS_BREAKER_FAILURES, config.IPFS_BREAKER_COOLDOWN_SECONDS),
+                      RollingLatency())
+            for backend in self.backends
+        }
+        self._uploaders = {"local": self._upload_bytes_to_local_ipfs, "pinata": self._upload_bytes_to_pinata}
+        self._pinners = {"local": self._pin_to_local_ipfs, "pinata": self._pin_to_pinata}
+        self._probes = {"local": self._probe_local, "pinata": self._probe_pinata}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def connect(self, retry: bool = False):
+        """Connect to the local IPFS node once; None if it is unreachable or Pinata is used
+
+        retry=True tries again after an earlier failure (used by the health probe).
+        """
+        if retry and self._ipfs_client is None:
+            self._ipfs_client = _NOT_CONNECTED
+        if self._ipfs_client is _NOT_CONNECTED:
+            with self._connect_lock:
+                if self._ipfs_client is _NOT_CONNECTED:
+                    self._ipfs_client = None
+                    if "local" in self.backends:
+                        try:
+                            import ipfshttpclient
+                            self._ipfs_client = ipfshttpclient.connect(self.ipfs_url)
+                        except Exception as e:
+                            logger.warning(f"Could not connect to IPFS node at {self.ipfs_url}: {e}")
+        return self._ipfs_client
+
+    @property
+    def ipfs_client(self):
+        return self.connect()
+
+    @property
+    def backend_name(self) -> str:
+        return "pinata" if self.use_pinata else "local"
+
+    def _timed(self, operation: str, func, *args, backend: Optional[str] = None):
+        """Run an upload/pin call, recording latency, failures and health per backend"""
+        backend = backend or self.backend_name
+        started = time.perf_counter()
+        with span(f"ipfs_{operation}"):
+            result = func(*args)
+        elapsed = time.perf_counter() - started
+        metrics.IPFS_LATENCY.labels(operation, backend).observe(elapsed)
+        breaker, latency = self.health.get(backend, (None, None))
+        if not result:
+            metrics.IPFS_FAILURES.labels(operation, backend).inc()
+            if breaker is not None:
+                breaker.record_failure()
+        elif breaker is not None:
+            latency.observe(elapsed)
+            breaker.record_success()
+        return result
+
+    # ---------------- Multi-backend ----------------
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._connect_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ipfs")
+        return self._executor
+
+    def ranked_backends(self) -> List[str]:
+        """Healthy backends fastest first (untried ones first); all of them if none is healthy"""
+        healthy = [backend for backend in self.backends if self.health[backend][0].available()]
+        if not healthy:
+            return list(self.backends)
+        return sorted(healthy, key=lambda backend: self.health[backend][1].ewma or 0.0)
+
+    def _hedged(self, operation: str, call) -> Tuple[Any, Optional[str], Dict[Any, str]]:
+        """Run call(backend) on the best backend, adding the next one whenever hedge_after
+        passes without an answer (or the current ones fail); the first truthy result wins
+
+        Returns (result, winning backend, calls still in flight).
+        """
+        executor = self._get_executor()
+        remaining = iter(self.ranked_backends())
+        in_flight: Dict[Any, str] = {}
+
+        def launch() -> bool:
+            for backend in remaining:
+                func, args = call(backend)
+                future = executor.submit(self._timed, operation, func, *args, backend=backend)
+                in_flight[future] = backend
+                return True
+            return False
+
+        launch()
+        result = winner = None
+        while in_flight and result is None:
+            done, _ = wait(in_flight, timeout=self.hedge_after, return_when=FIRST_COMPLETED)
+            if not done:
+                if launch():
+                    metrics.IPFS_HEDGES.labels(operation).inc()
+                continue
+            for future in done:
+                backend = in_flight.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    logger.warning(f"IPFS {operation} on {backend} raised: {e}")
+                    value = None
+                if value and result is None:
+                    result, winner = value, backend
+            if result is None and not in_flight:
+                launch()
+        return result, winner, in_flight
+
+    def _hedged_upload(self, file_bytes: bytes, file_name: str) -> Optional[str]:
+        """Upload to the fastest healthy backend, hedged to the others; the first CID wins"""
+        ipfs_hash, winner, in_flight = self._hedged(
+            "upload", lambda backend: (self._uploaders[backend], (file_bytes, file_name))
+        )
+        if ipfs_hash is not None and self.replicate:
+            self._replicate_from(ipfs_hash, winner, in_flight)
+        return ipfs_hash
+
+    def _replicate_from(self, ipfs_hash: str, winner: str, in_flight: Dict[Any, str]):
+        """Make sure every other backend ends up holding ipfs_hash
+
+        A hedged upload still running counts as the copy if it succeeds with
+        the same CID; otherwise, and for backends never tried, the CID is
+        pinned there in the background.
+        """
+        executor = self._get_executor()
+        running = {backend: future for future, backend in in_flight.items()}
+        for backend in self.backends:
+            if backend == winner:
+                continue
+            future = running.get(backend)
+            if future is None:
+                executor.submit(self._replicate, ipfs_hash, backend)
+                continue
+
+            def after_upload(done, backend=backend):
+                result = None if done.exception() else done.result()
+                if result == ipfs_hash:
+                    return
+                if result:
+                    logger.warning(f"IPFS backends disagree on CID: {winner}={ipfs_hash} {backend}={result}")
+                executor.submit(self._replicate, ipfs_hash, backend)
+
+            future.add_done_callback(after_upload)
+
+    def _replicate(self, ipfs_hash: str, backend: str) -> bool:
+        ok = self._timed("replicate", self._pinners[backend], ipfs_hash, backend=backend)
+        if not ok:
+            logger.warning(f"Could not replicate {ipfs_hash} to {backend}")
+        return ok
+
+    def probe(self, backend: str) -> bool:
+        """Cheap reachability check of one backend, recorded like any other call"""
+        return bool(self._timed("probe", self._probes[backend], backend=backend))
+
+    def _probe_local(self) -> bool:
+        client = self.connect(retry=True)
+        if not client:
+            return False
+        try:
+            return bool(client.version())
+        except Exception:
+            return False
+
+    def _probe_pinata(self) -> bool:
+        if not self.pinata_api_key or not self.pinata_secret:
+            return False
+        try:
+            response = requests.get(
+                "https://api.pinata.cloud/data/testAuthentication",
+                headers={'pinata_api_key': self.pinata_api_key, 'pinata_secret_api_key': self.pinata_secret},
+                timeout=config.IPFS_TIMEOUT_SECONDS
+            )
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    def backend_health(self) -> List[Dict[str, Any]]:
+        snapshot = []
+        for backend in self.backends:
+            breaker, latency = self.health[backend]
+            p90 = latency.percentile(0.9)
+            snapshot.append({
+                "backend": backend,
+                "state": breaker.state,
+                "consecutive_failures": breaker.failures,
+                "ewma_ms": round(latency.ewma * 1000, 2) if latency.ewma is not None else None,
+                "p90_ms": round(p90 * 1000, 2) if p90 is not None else None,
+            })
+        return snapshot
+
+    # ---------------- Uploads ----------------
 
     def upload_file(self, file_path: str, file_name: str = None) -> Optional[str]:
         """
         Upload a file to IPFS and return the hash (CID)
         """
+        if self.multi_backend:
+            with open(file_path, 'rb') as f:
+                return self._hedged_upload(f.read(), file_name or os.path.basename(file_path))
         if self.use_pinata:
-            return self._upload_to_pinata(file_path, file_name)
+            return self._timed("upload", self._upload_to_pinata, file_path, file_name)
         else:
-            return self._upload_to_local_ipfs(file_path, file_name)
+            return self._timed("upload", self._upload_to_local_ipfs, file_path, file_name)
 
     def upload_bytes(self, file_bytes: bytes, file_name: str) -> Optional[str]:
         """
         Upload file bytes to IPFS and return the hash (CID)
         """
+        if self.multi_backend:
+            return self._hedged_upload(file_bytes, file_name)
         if self.use_pinata:
-            return self._upload_bytes_to_pinata(file_bytes, file_name)
+            return self._timed("upload", self._upload_bytes_to_pinata, file_bytes, file_name)
         else:
-            return self._upload_bytes_to_local_ipfs(file_bytes, file_name)
+            return self._timed("upload", self._upload_bytes_to_local_ipfs, file_bytes, file_name)
 
     def _upload_to_pinata(self, file_path: str, file_name: str = None) -> Optional[str]:
         """
         Upload file to Pinata IPFS service
         """
         if not self.pinata_api_key or not self.pinata_secret:
-            print("Pinata API credentials not configured")
+            logger.warning("Pinata API credentials not configured")
             return None
 
         try:
@@ -59,17 +271,17 @@ class IPFSService:
                     'file': (file_name or os.path.basename(file_path), f)
                 }
                 
-                response = requests.post(url, files=files, headers=headers)
+                response = requests.post(url, files=files, headers=headers, timeout=config.IPFS_TIMEOUT_SECONDS)
                 
             if response.status_code == 200:
                 result = response.json()
                 return result['IpfsHash']
             else:
-                print(f"Pinata upload failed: {response.status_code} - {response.text}")
+                logger.warning(f"Pinata upload failed: {response.status_code} - {response.text}")
                 return None
                 
         except Exception as e:
-            print(f"Error uploading to Pinata: {e}")
+            logger.warning(f"Error uploading to Pinata: {e}")
             return None
 
     def _upload_bytes_to_pinata(self, file_bytes: bytes, file_name: str) -> Optional[str]:
@@ -77,7 +289,7 @@ class IPFSService:
         Upload file bytes to Pinata IPFS service
         """
         if not self.pinata_api_key or not self.pinata_secret:
-            print("Pinata API credentials not configured")
+            logger.warning("Pinata API credentials not configured")
             return None
 
         try:
@@ -92,17 +304,17 @@ class IPFSService:
                 'file': (file_name, file_bytes)
             }
             
-            response = requests.post(url, files=files, headers=headers)
+            response = requests.post(url, files=files, headers=headers, timeout=config.IPFS_TIMEOUT_SECONDS)
             
             if response.status_code == 200:
                 result = response.json()
                 return result['IpfsHash']
             else:
-                print(f"Pinata upload failed: {response.status_code} - {response.text}")
+                logger.warning(f"Pinata upload failed: {response.status_code} - {response.text}")
                 return None
                 
         except Exception as e:
-            print(f"Error uploading to Pinata: {e}")
+            logger.warning(f"Error uploading to Pinata: {e}")
             return None
 
     def _upload_to_local_ipfs(self, file_path: str, file_name: str = None) -> Optional[str]:
@@ -110,14 +322,14 @@ class IPFSService:
         Upload file to local IPFS node
         """
         if not self.ipfs_client:
-            print("IPFS client not available")
+            logger.warning("IPFS client not available")
             return None
 
         try:
             result = self.ipfs_client.add(file_path)
             return result['Hash']
         except Exception as e:
-            print(f"Error uploading to local IPFS: {e}")
+            logger.warning(f"Error uploading to local IPFS: {e}")
             return None
 
     def _upload_bytes_to_local_ipfs(self, file_bytes: bytes, file_name: str) -> Optional[str]:
@@ -125,14 +337,14 @@ class IPFSService:
         Upload file bytes to local IPFS node
         """
         if not self.ipfs_client:
-            print("IPFS client not available")
+            logger.warning("IPFS client not available")
             return None
 
         try:
             result = self.ipfs_client.add_bytes(file_bytes)
             return result
         except Exception as e:
-            print(f"Error uploading bytes to local IPFS: {e}")
+            logger.warning(f"Error uploading bytes to local IPFS: {e}")
             return None
 
     def get_file_url(self, ipfs_hash: str) -> str:
@@ -148,10 +360,14 @@ class IPFSService:
         """
         Pin a file to ensure it stays available
         """
+        if self.multi_backend:
+            # Hedged like uploads; replication covers the other backends, so one pin is enough
+            pinned, _, _ = self._hedged("pin", lambda backend: (self._pinners[backend], (ipfs_hash,)))
+            return bool(pinned)
         if self.use_pinata:
-            return self._pin_to_pinata(ipfs_hash)
+            return self._timed("pin", self._pin_to_pinata, ipfs_hash)
         else:
-            return self._pin_to_local_ipfs(ipfs_hash)
+            return self._timed("pin", self._pin_to_local_ipfs, ipfs_hash)
 
     def _pin_to_pinata(self, ipfs_hash: str) -> bool:
         """
@@ -176,11 +392,11 @@ class IPFSService:
                 }
             }
             
-            response = requests.post(url, json=data, headers=headers)
+            response = requests.post(url, json=data, headers=headers, timeout=config.IPFS_TIMEOUT_SECONDS)
             return response.status_code == 200
             
         except Exception as e:
-            print(f"Error pinning to Pinata: {e}")
+            logger.warning(f"Error pinning to Pinata: {e}")
             return False
 
     def _pin_to_local_ipfs(self, ipfs_hash: str) -> bool:
@@ -194,7 +410,7 @@ class IPFSService:
             self.ipfs_client.pin.add(ipfs_hash)
             return True
         except Exception as e:
-            print(f"Error pinning to local IPFS: {e}")
+            logger.warning(f"Error pinning to local IPFS: {e}")
             return False
 
 # Global IPFS service instance
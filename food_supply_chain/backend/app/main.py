@@ -1,19 +1,72 @@
+import time
+
+_import_started = time.perf_counter()
+
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 # Change these imports
 from app.routes.enhanced_crop_routes import router as enhanced_crop_router
 from app.routes.websocket_routes import router as websocket_router
-from app.utils.error_handling import error_handler
+from app.routes.admin_routes import router as admin_router
+from app.utils.error_handling import error_handler, rate_limiter
+from app.utils.middleware import MetricsMiddleware, RateLimitMiddleware
+from app.tracing import TracedJSONResponse, TracingMiddleware
+from app import config, metrics
+from app.indexer import indexer
+from app.fees import fee_oracle
+from app.health import health_monitor
+from app.warmup import StartupReport, run_warmups
+
+logger = logging.getLogger(__name__)
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    report = StartupReport(import_seconds=IMPORT_SECONDS)
+    app.state.startup_report = report
+    error_handler.start_log_queue()
+    metrics.event_loop_monitor.start()
+    await run_warmups(report)
+    if config.INDEXER_ENABLED:
+        indexer.start()
+    fee_oracle.start()
+    health_monitor.start()
+    report.finish()
+    logger.info(report.summary())
+    yield
+    await health_monitor.stop()
+    await indexer.stop()
+    await fee_oracle.stop()
+    await metrics.event_loop_monitor.stop()
+    error_handler.stop_log_queue()
+
 
 app = FastAPI(
     title="Enhanced Food Supply Chain Backend",
     description="Blockchain-based food supply chain with IPFS integration",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=TracedJSONResponse,
+    lifespan=lifespan
 )
 
+# Added before CORS so that 429 responses still carry CORS headers
+if config.RATE_LIMIT_ENABLED:
+    rate_limiter.max_keys = config.RATE_LIMIT_MAX_KEYS
+    app.add_middleware(
+        RateLimitMiddleware,
+        limits=config.RATE_LIMIT_CLASSES,
+        limiter=rate_limiter,
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
@@ -22,9 +75,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(TracingMiddleware)
+
+# Outermost, so rejected and failed requests are timed too
+app.add_middleware(MetricsMiddleware)
+
 # Include enhanced routes
 app.include_router(enhanced_crop_router, prefix="/api", tags=["Enhanced API"])
 app.include_router(websocket_router, tags=["WebSocket"])
+app.include_router(admin_router, prefix="/admin", tags=["Admin"])
 
 # Add error handlers
 @app.exception_handler(RequestValidationError)
@@ -54,5 +113,18 @@ def root():
     }
 
 @app.get("/health")
-def health_check():
-    return {"status": "healthy", "timestamp": "2024-01-01T00:00:00Z"}
+async def health_check():
+    """Last background probe snapshot (RPC, contract, IPFS, event loop, index)"""
+    return health_monitor.health_response()
+
+@app.get("/ready")
+async def readiness_check():
+    return health_monitor.ready_response()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text exposition of request, RPC, IPFS, cache and WebSocket metrics"""
+    return PlainTextResponse(
+        metrics.REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,111 @@
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from . import config
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profiling session is already running"""
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling the stacks of all threads
+
+    A background thread snapshots sys._current_frames() every interval and
+    counts collapsed stacks, so live traffic is never instrumented. Only one
+    session runs at a time and its duration is capped.
+    """
+
+    def __init__(self, max_seconds: float = 60.0, max_stack_depth: int = 64):
+        self.max_seconds = max_seconds
+        self.max_stack_depth = max_stack_depth
+        self._lock = threading.Lock()
+
+    def _collapse(self, frame) -> str:
+        names = []
+        while frame is not None and len(names) < self.max_stack_depth:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def profile(self, seconds: float, interval: float = 0.005, top: int = 50) -> Dict[str, Any]:
+        """Sample for the given number of seconds (blocking the calling thread)"""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profiling session is already running")
+        try:
+            seconds = min(max(seconds, 0.1), self.max_seconds)
+            interval = max(interval, 0.001)
+            own_thread = threading.get_ident()
+            stacks: Counter = Counter()
+            samples = 0
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id != own_thread:
+                        stacks[self._collapse(frame)] += 1
+                samples += 1
+                time.sleep(interval)
+        finally:
+            self._lock.release()
+
+        thread_samples = sum(stacks.values())
+        return {
+            "seconds": seconds,
+            "interval": interval,
+            "samples": samples,
+            "stacks": [
+                {"stack": stack, "count": count, "ratio": round(count / thread_samples, 4)}
+                for stack, count in stacks.most_common(top)
+            ],
+        }
+
+
+class MemoryTracer:
+    """On-demand tracemalloc snapshots with diffs against the previous one"""
+
+    def __init__(self):
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    def start(self, frames: int = 1):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self):
+        tracemalloc.stop()
+        self._previous = None
+
+    def snapshot(self, top: int = 25, key_type: str = "lineno") -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            return {"tracing": False}
+        with self._lock:
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            stats = snapshot.statistics(key_type)
+            diff = snapshot.compare_to(self._previous, key_type)[:top] if self._previous else []
+            self._previous = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracing": True,
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            "top": [
+                {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                for stat in stats[:top]
+            ],
+            "diff_since_last": [
+                {"location": str(stat.traceback), "size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in diff
+            ],
+        }
+
+
+profiler = SamplingProfiler(max_seconds=config.PROFILE_MAX_SECONDS)
+memory_tracer = MemoryTracer()
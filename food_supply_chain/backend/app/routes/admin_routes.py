@@ -0,0 +1,71 @@
+import asyncio
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+
+from ..ipfs_service import ipfs_service
+from ..profiling import ProfilerBusyError, memory_tracer, profiler
+from .. import blockchain, config
+
+router = APIRouter()
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints need ADMIN_TOKEN configured and sent as X-Admin-Token"""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/profile", dependencies=[Depends(require_admin_token)])
+async def profile_live_traffic(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1),
+    top: int = Query(50, ge=1, le=500)
+):
+    """Sample all thread stacks for N seconds and return the hottest collapsed stacks"""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(None, profiler.profile, seconds, interval_ms / 1000, top)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/tracemalloc", dependencies=[Depends(require_admin_token)])
+async def tracemalloc_snapshot(
+    top: int = Query(25, ge=1, le=500),
+    action: str = Query("snapshot", pattern="^(start|snapshot|stop)$"),
+    frames: int = Query(1, ge=1, le=25)
+):
+    """Start tracing, snapshot allocations (with a diff against the last snapshot) or stop"""
+    if action == "start":
+        memory_tracer.start(frames)
+        return {"tracing": True}
+    if action == "stop":
+        memory_tracer.stop()
+        return {"tracing": False}
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, memory_tracer.snapshot, top)
+
+
+@router.get("/startup", dependencies=[Depends(require_admin_token)])
+async def startup_report(request: Request):
+    """Import, warmup and total startup timings of this worker"""
+    report = getattr(request.app.state, "startup_report", None)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Startup has not run")
+    return report.to_dict()
+
+
+@router.get("/rpc", dependencies=[Depends(require_admin_token)])
+async def rpc_nodes():
+    """Circuit state and rolling latency of each configured RPC node"""
+    return {"provider": config.BLOCKCHAIN_PROVIDER, "nodes": await asyncio.to_thread(blockchain.rpc_nodes)}
+
+
+@router.get("/ipfs", dependencies=[Depends(require_admin_token)])
+async def ipfs_backends():
+    """Circuit state and rolling upload latency of each IPFS backend"""
+    return {"backends": ipfs_service.backend_health(), "hedge_after_seconds": ipfs_service.hedge_after}
@@ -1,18 +1,35 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Request
 from fastapi.responses import JSONResponse
-from typing import List, Optional
+from pydantic import ValidationError
+from typing import List, Optional, Tuple
+import asyncio
+import csv
+import io
 import os
 import json
 from datetime import datetime
 
 from .models import (
     CropRegistrationRequest, CropResponse, CropTransferRequest,
-    CropHistoryResponse, FileUploadResponse, TransactionResponse,
-    UserProfile, UserRole, CropStatus, TransferEvent, UserRegisterRequest
+    CropHistoryResponse, CropHistoryBatchRequest, CropHistoryBatchResponse,
+    FileUploadResponse, TransactionResponse, UserProfile, UserRole, CropStatus,
+    TransferEvent, UserRegisterRequest, BulkOperation, BulkResponse, CropTransferBody,
+    CropContract, CropPage, CropHistoryPage, CropSearchResponse, CropQueryResponse, CropSortField,
+    SortOrder, CropNearbyResponse, CropAreaResponse
 )
-from ..blockchain import get_contract, get_web3, wait_for_transaction_receipt
+from ..blockchain import (
+    get_web3, call_function, transact_function, wait_for_transaction_receipt, is_address, to_checksum_address
+)
+from ..contract_gateway import get_gateway
 from ..ipfs_service import ipfs_service
 from ..websocket_service import notification_service
+from ..tracing import span
+from ..serialization import FastJSONResponse, crop_row, crop_rows, decode_cursor, encode_cursor
+from ..crop_codec import registration_args
+from ..crop_search import normalize
+from ..indexer import crop_store
+from ..services import bulk_service
+from ..fees import build_transaction, check_receipt_gas
 from .. import config
 
 router = APIRouter()
@@ -22,6 +39,7 @@ router = APIRouter()
 user_profiles = {}
 
 def load_data():
+    """Load saved profiles; run by the startup warmup, not at import"""
     global user_profiles
     try:
         if os.path.exists('user_profiles.json'):
@@ -45,8 +63,6 @@ def save_data():
     except Exception as e:
         print(f"Error saving user data: {e}")
 
-load_data()
-
 # ---------------- User Endpoints ----------------
 
 @router.post("/users/register", response_model=UserProfile)
@@ -81,10 +97,11 @@ async def upload_file(file: UploadFile = File(...)):
         if file_ext not in config.ALLOWED_EXTENSIONS:
             raise HTTPException(status_code=400, detail="File type not allowed")
         content = await file.read()
-        ipfs_hash = ipfs_service.upload_bytes(content, file.filename)
+        # Blocking (and possibly hedged across backends): keep it off the event loop.
+        # Adding a file pins it on the backend that stored it; replication pins the rest
+        ipfs_hash = await asyncio.to_thread(ipfs_service.upload_bytes, content, file.filename)
         if not ipfs_hash:
             raise HTTPException(status_code=500, detail="Failed to upload to IPFS")
-        ipfs_service.pin_file(ipfs_hash)
         file_url = ipfs_service.get_file_url(ipfs_hash)
         return FileUploadResponse(success=True, ipfs_hash=ipfs_hash, file_url=file_url)
     except Exception as e:
@@ -106,48 +123,52 @@ async def register_crop(
     farmer_address: str = Form(...)
 ):
     try:
-        if farmer_address.lower() not in user_profiles:
-            raise HTTPException(status_code=400, detail="User not registered")
-        user_profile = user_profiles[farmer_address.lower()]
-        if user_profile.role != UserRole.FARMER:
-            raise HTTPException(status_code=403, detail="Only farmers can register crops")
-
-        crop_data = CropRegistrationRequest(
-            name=name,
-            quantity=quantity,
-            price=price,
-            batch_number=batch_number,
-            harvest_date=harvest_date,
-            expiry_date=expiry_date,
-            farm_coords=farm_coords,
-            ipfs_image_hash=ipfs_image_hash,
-            ipfs_cert_hash=ipfs_cert_hash
-        )
+        with span("validation"):
+            if farmer_address.lower() not in user_profiles:
+                raise HTTPException(status_code=400, detail="User not registered")
+            user_profile = user_profiles[farmer_address.lower()]
+            if user_profile.role != UserRole.FARMER:
+                raise HTTPException(status_code=403, detail="Only farmers can register crops")
 
-        contract = get_contract()
-        tx = contract.functions.registerCrop(
+            crop_data = CropRegistrationRequest(
+                name=name,
+                quantity=quantity,
+                price=price,
+                batch_number=batch_number,
+                harvest_date=harvest_date,
+                expiry_date=expiry_date,
+                farm_coords=farm_coords,
+                ipfs_image_hash=ipfs_image_hash,
+                ipfs_cert_hash=ipfs_cert_hash
+            )
+
+        register_call = get_gateway().function("registerCrop", *registration_args(
             crop_data.name,
             crop_data.quantity,
             crop_data.price,
             crop_data.batch_number,
             crop_data.harvest_date,
             crop_data.expiry_date,
-            crop_data.ipfs_image_hash or "",
-            crop_data.ipfs_cert_hash or "",
+            crop_data.ipfs_image_hash,
+            crop_data.ipfs_cert_hash,
             crop_data.farm_coords
-        ).transact({"from": farmer_address})
+        ))
+        tx_params = build_transaction(register_call, farmer_address)
+        tx = transact_function(register_call, tx_params)
 
-        receipt = wait_for_transaction_receipt(tx)
+        receipt = await asyncio.to_thread(wait_for_transaction_receipt, tx, function="registerCrop")
+        check_receipt_gas(register_call, tx_params, receipt)
         if receipt.status != 1:
             raise HTTPException(status_code=500, detail="Blockchain transaction failed")
 
-        await notification_service.notify_crop_registered({
-            "name": crop_data.name,
-            "farmer": farmer_address,
-            "batchNumber": crop_data.batch_number,
-            "quantity": crop_data.quantity,
-            "price": crop_data.price
-        })
+        with span("notify"):
+            await notification_service.notify_crop_registered({
+                "name": crop_data.name,
+                "farmer": farmer_address,
+                "batchNumber": crop_data.batch_number,
+                "quantity": crop_data.quantity,
+                "price": crop_data.price
+            })
 
         return TransactionResponse(
             success=True,
@@ -158,66 +179,507 @@ async def register_crop(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/crops/{crop_id}/transfer", response_model=TransactionResponse)
+async def transfer_crop(crop_id: int, transfer: CropTransferBody):
+    if not is_address(transfer.from_address) or not is_address(transfer.to_address):
+        raise HTTPException(status_code=400, detail="Invalid address")
+    if transfer.from_address.lower() not in user_profiles:
+        raise HTTPException(status_code=400, detail="User not registered")
+
+    sender = to_checksum_address(transfer.from_address)
+    recipient = to_checksum_address(transfer.to_address)
+
+    # Reject transfers the contract would revert, using the local index
+    crop = crop_store.get_crop(crop_id)
+    if crop is not None and crop.current_owner == sender:
+        if not crop.available:
+            raise HTTPException(status_code=400, detail="Crop not available for transfer")
+        if recipient == sender:
+            raise HTTPException(status_code=400, detail="Cannot transfer to current owner")
+
+    transfer_call = get_gateway().function(
+        "transferCrop",
+        crop_id,
+        recipient,
+        transfer.note or "",
+        transfer.ipfs_data_hash or ""
+    )
+    try:
+        tx_params = build_transaction(transfer_call, sender)
+        if crop is None or crop.current_owner != sender:
+            # Not indexed (yet), or the sender may be an admin: the cached gas
+            # limit skips eth_estimateGas, so let an eth_call surface the revert
+            call_function(transfer_call, {"from": sender})
+        tx = transact_function(transfer_call, tx_params)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    receipt = await asyncio.to_thread(wait_for_transaction_receipt, tx, function="transferCrop")
+    check_receipt_gas(transfer_call, tx_params, receipt)
+    if receipt.status != 1:
+        raise HTTPException(status_code=500, detail="Blockchain transaction failed")
+
+    with span("notify"):
+        await notification_service.notify_crop_transferred({
+            "cropId": crop_id,
+            "cropName": crop.name if crop else None,
+            "fromAddress": transfer.from_address,
+            "toAddress": transfer.to_address,
+            "note": transfer.note
+        })
+
+    return TransactionResponse(
+        success=True,
+        transaction_hash=tx.hex(),
+        gas_used=receipt.gasUsed,
+        block_number=receipt.blockNumber
+    )
+
+@router.post("/crops/{crop_id}/buy", response_model=TransactionResponse)
+async def buy_crop(
+    crop_id: int,
+    buyer_address: str = Form(...),
+    payment_amount: int = Form(..., gt=0)  # wei
+):
+    if not is_address(buyer_address):
+        raise HTTPException(status_code=400, detail="Invalid address")
+    if buyer_address.lower() not in user_profiles:
+        raise HTTPException(status_code=400, detail="User not registered")
+
+    # Reject purchases the contract would revert, using the local index
+    buyer = to_checksum_address(buyer_address)
+    crop = crop_store.get_crop(crop_id)
+    if crop is not None:
+        if not crop.available:
+            raise HTTPException(status_code=400, detail="Crop not available")
+        if payment_amount < crop.price:
+            raise HTTPException(status_code=400, detail="Insufficient payment")
+        if crop.current_owner == buyer:
+            raise HTTPException(status_code=400, detail="Cannot buy your own crop")
+
+    buy_call = get_gateway().function("buyCrop", crop_id)
+    try:
+        tx_params = build_transaction(buy_call, buyer, value=payment_amount)
+        if crop is None:
+            # Not indexed (yet) or no such crop: surface the revert before sending
+            call_function(buy_call, {"from": buyer, "value": payment_amount})
+        tx = transact_function(buy_call, tx_params)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    receipt = await asyncio.to_thread(wait_for_transaction_receipt, tx, function="buyCrop")
+    check_receipt_gas(buy_call, tx_params, receipt)
+    if receipt.status != 1:
+        raise HTTPException(status_code=500, detail="Blockchain transaction failed")
+
+    with span("notify"):
+        await notification_service.notify_crop_purchased({
+            "cropId": crop_id,
+            "cropName": crop.name if crop else None,
+            "buyerAddress": buyer_address,
+            "amount": payment_amount
+        })
+
+    return TransactionResponse(
+        success=True,
+        transaction_hash=tx.hex(),
+        gas_used=receipt.gasUsed,
+        block_number=receipt.blockNumber
+    )
+
+# ---------------- Bulk Registration / Transfer ----------------
+
+CSV_CONTENT_TYPES = ("text/csv", "application/csv", "text/plain")
+
+async def read_bulk_rows(request: Request) -> Tuple[list, dict]:
+    """Rows plus any accompanying fields from a JSON body, a CSV body or a multipart CSV upload"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == "application/json":
+        try:
+            body = await request.json()
+        except ValueError:  # JSONDecodeError, or a body that is not UTF-8
+            raise HTTPException(status_code=400, detail="Request body is not valid JSON")
+        if isinstance(body, list):
+            return body, {}
+        if isinstance(body, dict) and isinstance(body.get("rows"), list):
+            return body["rows"], body
+        raise HTTPException(status_code=400, detail='JSON body must be a list of rows or {"rows": [...]}')
+    if content_type == "multipart/form-data":
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Upload the CSV as the 'file' field")
+        raw = await upload.read()
+        fields = {key: value for key, value in form.items() if key != "file"}
+    elif content_type in CSV_CONTENT_TYPES:
+        raw = await request.body()
+        fields = {}
+    else:
+        raise HTTPException(status_code=415, detail="Send rows as application/json or text/csv")
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+    rows = [
+        {key.strip(): value.strip() for key, value in row.items() if key and value is not None}
+        for row in csv.DictReader(io.StringIO(text))
+    ]
+    return rows, fields
+
+def validate_bulk_row(operation: BulkOperation, row) -> tuple:
+    """Contract batch item for one row; raises ValueError with a readable reason"""
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object")
+    # CSV leaves optional columns as empty strings
+    row = {key: value for key, value in row.items() if value != ""}
+    if operation == BulkOperation.REGISTER:
+        crop = CropRegistrationRequest(**row)
+        return registration_args(
+            crop.name, crop.quantity, crop.price, crop.batch_number, crop.harvest_date,
+            crop.expiry_date, crop.ipfs_image_hash, crop.ipfs_cert_hash, crop.farm_coords
+        )
+    transfer = CropTransferRequest(**row)
+    if not is_address(transfer.to_address):
+        raise ValueError("to_address: invalid address")
+    return (
+        transfer.crop_id, to_checksum_address(transfer.to_address),
+        transfer.note or "", transfer.ipfs_data_hash or ""
+    )
+
+def _validation_message(error: ValueError) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()
+        )
+    return str(error)
+
+@router.post("/crops:bulk", response_model=BulkResponse)
+async def bulk_crops(
+    request: Request,
+    operation: BulkOperation = BulkOperation.REGISTER,
+    sender_address: Optional[str] = None
+):
+    """Register or transfer many crops from JSON or CSV rows in a few batch transactions
+
+    Register rows use the POST /crops fields; transfer rows use crop_id,
+    to_address, note and ipfs_data_hash. Invalid rows are reported and
+    skipped; the rest are chunked to fit the block gas limit.
+    """
+    rows, fields = await read_bulk_rows(request)
+    sender_address = sender_address or fields.get("sender_address")
+    if not sender_address or not is_address(sender_address):
+        raise HTTPException(status_code=400, detail="sender_address is required")
+    if not rows:
+        raise HTTPException(status_code=400, detail="No rows submitted")
+    if len(rows) > config.BULK_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {config.BULK_MAX_ROWS} rows per request")
+
+    user_profile = user_profiles.get(sender_address.lower())
+    if user_profile is None:
+        raise HTTPException(status_code=400, detail="User not registered")
+    if operation == BulkOperation.REGISTER and user_profile.role != UserRole.FARMER:
+        raise HTTPException(status_code=403, detail="Only farmers can register crops")
+
+    results = [{"row": n, "status": "invalid"} for n in range(1, len(rows) + 1)]
+    items, item_rows = [], []
+    with span("validation"):
+        for i, row in enumerate(rows):
+            try:
+                items.append(validate_bulk_row(operation, row))
+                item_rows.append(i)
+            except ValueError as e:
+                results[i]["error"] = _validation_message(e)
+
+    transactions = []
+    if items:
+        item_results, transactions = await asyncio.to_thread(
+            bulk_service.submit, operation.value, items, to_checksum_address(sender_address)
+        )
+        for i, item_result in zip(item_rows, item_results):
+            results[i].update(item_result)
+
+    succeeded = sum(r["status"] == "succeeded" for r in results)
+    invalid = sum(r["status"] == "invalid" for r in results)
+    if succeeded:
+        with span("notify"):
+            verb = "registered" if operation == BulkOperation.REGISTER else "transferred"
+            await notification_service.notify_system_event({
+                "message": f"{succeeded} crops {verb} in bulk by {sender_address}",
+                "level": "info"
+            })
+
+    return BulkResponse(
+        operation=operation,
+        total_rows=len(rows),
+        succeeded=succeeded,
+        failed=len(rows) - succeeded - invalid,
+        invalid=invalid,
+        transactions=transactions,
+        results=results
+    )
+
 @router.get("/crops", response_model=List[CropResponse])
 async def get_all_crops():
     try:
-        contract = get_contract()
-        all_crops = contract.functions.getAllCrops().call()
-        crops = [
-            CropResponse(
-                id=c[0], name=c[1], quantity=c[2], price=c[3],
-                batch_number=c[4], harvest_date=c[5], expiry_date=c[6],
-                ipfs_image_hash=c[7] or None, ipfs_cert_hash=c[8] or None,
-                farm_coords=c[9], current_owner=c[10],
-                available=c[11], created_at=c[12],
-                status=CropStatus.AVAILABLE if c[11] else CropStatus.SOLD,
-                image_url=ipfs_service.get_file_url(c[7]) if c[7] else None,
-                cert_url=ipfs_service.get_file_url(c[8]) if c[8] else None
-            ) for c in all_crops
-        ]
-        return crops
+        crops = await asyncio.to_thread(lambda: get_gateway().get_all_crops())
+        return FastJSONResponse(crop_rows(crops))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in get_all_crops: {str(e)}")
 
 @router.get("/crops/my/{address}", response_model=List[CropResponse])
 async def get_my_crops(address: str):
-    """Get all crops owned by a specific address."""
-    try:
-        contract = get_contract()
-        my_crops = contract.functions.getCropsByOwner(address).call()
-        crops = [
-            CropResponse(
-                id=c[0], name=c[1], quantity=c[2], price=c[3],
-                batch_number=c[4], harvest_date=c[5], expiry_date=c[6],
-                ipfs_image_hash=c[7] or None, ipfs_cert_hash=c[8] or None,
-                farm_coords=c[9], current_owner=c[10],
-                available=c[11], created_at=c[12],
-                status=CropStatus.AVAILABLE if c[11] else CropStatus.SOLD,
-                image_url=ipfs_service.get_file_url(c[7]) if c[7] else None,
-                cert_url=ipfs_service.get_file_url(c[8]) if c[8] else None
-            ) for c in my_crops
-        ]
-        return crops
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error in get_my_crops: {str(e)}")
+    """Get all crops currently owned by a specific address (from the local owner index)."""
+    if not is_address(address):
+        raise HTTPException(status_code=400, detail="Invalid address")
+    with span("index_lookup"):
+        my_crops = crop_store.get_crops_by_owner(to_checksum_address(address))
+    return FastJSONResponse(crop_rows(my_crops))
 
 @router.get("/crops/available", response_model=List[CropResponse])
 async def get_available_crops():
     try:
-        contract = get_contract()
-        available = contract.functions.getAvailableCrops().call()
-        crops = [
-            CropResponse(
-                id=c[0], name=c[1], quantity=c[2], price=c[3],
-                batch_number=c[4], harvest_date=c[5], expiry_date=c[6],
-                ipfs_image_hash=c[7] or None, ipfs_cert_hash=c[8] or None,
-                farm_coords=c[9], current_owner=c[10],
-                available=c[11], created_at=c[12],
-                status=CropStatus.AVAILABLE,
-                image_url=ipfs_service.get_file_url(c[7]) if c[7] else None,
-                cert_url=ipfs_service.get_file_url(c[8]) if c[8] else None
-            ) for c in available
-        ]
-        return crops
+        available = await asyncio.to_thread(lambda: get_gateway().get_available_crops())
+        return FastJSONResponse(crop_rows(available, status=CropStatus.AVAILABLE.value))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in get_available_crops: {str(e)}")
+
+def _page_after(cursor: Optional[str], types: tuple) -> Optional[tuple]:
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor, types)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _page_offset(cursor: Optional[str]) -> int:
+    (offset,) = _page_after(cursor, (int,)) or (0,)
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+@router.get("/crops/search", response_model=CropSearchResponse)
+async def search_crops(
+    q: str = Query(..., min_length=1, max_length=100),
+    contract: Optional[CropContract] = None,
+    limit: int = Query(config.INDEX_PAGE_SIZE, ge=1, le=config.INDEX_PAGE_MAX),
+    cursor: Optional[str] = None
+):
+    """Crops of both contracts by exact batch number or (partial, misspelt) name, best match first"""
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Search query must not be blank")
+    offset = _page_offset(cursor)
+    with span("index_lookup"):
+        # The first search after a restart builds the name index from SQLite
+        total, page = await asyncio.to_thread(
+            crop_store.search, q, limit, offset,
+            contract.value if contract else None, config.SEARCH_MIN_SIMILARITY
+        )
+    results = []
+    for crop_contract, score, crop in page:
+        row = crop_row(crop)
+        row.update(contract=crop_contract, score=score)
+        results.append(row)
+    return FastJSONResponse({
+        "query": q,
+        "total": total,
+        "results": results,
+        "next_cursor": encode_cursor((offset + limit,)) if offset + limit < total else None,
+        "indexed_block": crop_store.last_block(),
+    })
+
+@router.get("/crops/query", response_model=CropQueryResponse)
+async def query_crops(
+    contract: Optional[CropContract] = None,
+    owner: Optional[str] = None,
+    name: Optional[str] = Query(None, max_length=100),
+    available: Optional[bool] = None,
+    price_min: Optional[float] = None,
+    price_max: Optional[float] = None,
+    quantity_min: Optional[int] = None,
+    quantity_max: Optional[int] = None,
+    harvest_from: Optional[int] = None,
+    harvest_to: Optional[int] = None,
+    expiry_from: Optional[int] = None,
+    expiry_to: Optional[int] = None,
+    sort: CropSortField = CropSortField.CREATED_AT,
+    order: SortOrder = SortOrder.DESC,
+    limit: int = Query(config.INDEX_PAGE_SIZE, ge=1, le=config.INDEX_PAGE_MAX),
+    cursor: Optional[str] = None
+):
+    """Crops of both contracts filtered by price, quantity and date ranges, sorted by any of them
+
+    Ranges are inclusive unix timestamps / amounts; aggregates cover every
+    match, not just the page. Served from the columnar copy of the index.
+    """
+    if owner is not None:
+        if not is_address(owner):
+            raise HTTPException(status_code=400, detail="Invalid address")
+        owner = to_checksum_address(owner)
+    offset = _page_offset(cursor)
+    ranges = {
+        column: (low, high)
+        for column, low, high in (
+            ("price", price_min, price_max),
+            ("quantity", quantity_min, quantity_max),
+            ("harvest_date", harvest_from, harvest_to),
+            ("expiry_date", expiry_from, expiry_to),
+        )
+        if low is not None or high is not None
+    }
+    with span("index_lookup"):
+        # The first query after a restart loads the columns from SQLite
+        total, page, aggregates = await asyncio.to_thread(
+            crop_store.query_crops, limit, offset,
+            sort=sort.value, descending=order == SortOrder.DESC, ranges=ranges,
+            contract=contract.value if contract else None, owner=owner,
+            name_key=normalize(name) if name else None, available=available
+        )
+    results = []
+    for crop_contract, crop in page:
+        row = crop_row(crop)
+        row["contract"] = crop_contract
+        results.append(row)
+    return FastJSONResponse({
+        "total": total,
+        "results": results,
+        "aggregates": aggregates,
+        "next_cursor": encode_cursor((offset + limit,)) if offset + limit < total else None,
+        "indexed_block": crop_store.last_block(),
+    })
+
+@router.get("/crops/nearby", response_model=CropNearbyResponse)
+async def get_nearby_crops(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(..., gt=0, le=config.GEO_MAX_RADIUS_KM),
+    contract: Optional[CropContract] = None,
+    limit: int = Query(config.INDEX_PAGE_SIZE, ge=1, le=config.INDEX_PAGE_MAX),
+    cursor: Optional[str] = None
+):
+    """Crops whose farm lies within radius_km of a point (e.g. a distribution center), nearest first"""
+    offset = _page_offset(cursor)
+    with span("index_lookup"):
+        total, page = await asyncio.to_thread(
+            crop_store.crops_near, lat, lng, radius_km, limit, offset, contract.value if contract else None
+        )
+    results = []
+    for crop_contract, distance, crop in page:
+        row = crop_row(crop)
+        row.update(contract=crop_contract, distance_km=round(distance, 3))
+        results.append(row)
+    return FastJSONResponse({
+        "total": total,
+        "results": results,
+        "next_cursor": encode_cursor((offset + limit,)) if offset + limit < total else None,
+        "indexed_block": crop_store.last_block(),
+    })
+
+@router.get("/crops/within", response_model=CropAreaResponse)
+async def get_crops_within(
+    south: float = Query(..., ge=-90, le=90),
+    west: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    contract: Optional[CropContract] = None,
+    limit: int = Query(config.INDEX_PAGE_SIZE, ge=1, le=config.INDEX_PAGE_MAX),
+    cursor: Optional[str] = None
+):
+    """Crops whose farm lies inside a bounding box; west > east crosses the antimeridian"""
+    if south > north:
+        raise HTTPException(status_code=400, detail="south must not be greater than north")
+    offset = _page_offset(cursor)
+    with span("index_lookup"):
+        total, page = await asyncio.to_thread(
+            crop_store.crops_within, south, west, north, east, limit, offset,
+            contract.value if contract else None
+        )
+    results = []
+    for crop_contract, crop in page:
+        row = crop_row(crop)
+        row["contract"] = crop_contract
+        results.append(row)
+    return FastJSONResponse({
+        "total": total,
+        "results": results,
+        "next_cursor": encode_cursor((offset + limit,)) if offset + limit < total else None,
+        "indexed_block": crop_store.last_block(),
+    })
+
+# ---------------- Crop History (served from the local index) ----------------
+
+@router.post("/crops/history:batch", response_model=CropHistoryBatchResponse)
+async def get_crop_histories(request: CropHistoryBatchRequest):
+    """Histories for many crops at once; ids not yet indexed are listed in missing"""
+    if len(request.crop_ids) > config.HISTORY_BATCH_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {config.HISTORY_BATCH_MAX} crop ids per request"
+        )
+    with span("index_lookup"):
+        histories = crop_store.get_histories(request.crop_ids)
+    return FastJSONResponse({
+        "histories": {str(crop_id): history for crop_id, history in histories.items()},
+        "missing": [crop_id for crop_id in dict.fromkeys(request.crop_ids) if crop_id not in histories],
+        "indexed_block": crop_store.last_block(),
+    })
+
+@router.get("/crops/{crop_id}/history", response_model=CropHistoryResponse)
+async def get_crop_history(crop_id: int):
+    with span("index_lookup"):
+        histories = crop_store.get_histories([crop_id])
+    if crop_id not in histories:
+        raise HTTPException(status_code=404, detail="Crop not found")
+    return FastJSONResponse({"crop_id": crop_id, "history": histories[crop_id]})
+
+# ---------------- Unified Crop Index (enhanced + legacy contracts) ----------------
+
+@router.get("/index/crops", response_model=CropPage)
+async def list_indexed_crops(
+    contract: Optional[CropContract] = None,
+    owner: Optional[str] = None,
+    available: Optional[bool] = None,
+    limit: int = Query(config.INDEX_PAGE_SIZE, ge=1, le=config.INDEX_PAGE_MAX),
+    cursor: Optional[str] = None
+):
+    """Crops of both contracts in registration order, one page at a time, from the local index
+
+    Pass next_cursor from a response as cursor to get the following page.
+    """
+    if owner is not None:
+        if not is_address(owner):
+            raise HTTPException(status_code=400, detail="Invalid address")
+        owner = to_checksum_address(owner)
+    after = _page_after(cursor, (int, str, int))
+    with span("index_lookup"):
+        page = crop_store.page_crops(limit + 1, after, contract.value if contract else None, owner, available)
+    rows = []
+    for (_, crop_contract, _), crop in page[:limit]:
+        row = crop_row(crop)
+        row["contract"] = crop_contract
+        rows.append(row)
+    return FastJSONResponse({
+        "crops": rows,
+        "next_cursor": encode_cursor(page[limit - 1][0]) if len(page) > limit else None,
+        "indexed_block": crop_store.last_block(),
+    })
+
+@router.get("/index/crops/{contract}/{crop_id}/history", response_model=CropHistoryPage)
+async def get_indexed_crop_history(
+    contract: CropContract,
+    crop_id: int,
+    limit: int = Query(config.INDEX_PAGE_SIZE, ge=1, le=config.INDEX_PAGE_MAX),
+    cursor: Optional[str] = None
+):
+    after = _page_after(cursor, (int, int))
+    with span("index_lookup"):
+        if not crop_store.has_crop(crop_id, contract.value):
+            raise HTTPException(status_code=404, detail="Crop not found")
+        page = crop_store.page_history(crop_id, contract.value, limit + 1, after)
+    return FastJSONResponse({
+        "contract": contract.value,
+        "crop_id": crop_id,
+        "history": [entry for _, entry in page[:limit]],
+        "next_cursor": encode_cursor(page[limit - 1][0]) if len(page) > limit else None,
+        "indexed_block": crop_store.last_block(),
+    })
@@ -16,6 +16,10 @@ class CropStatus(str, Enum):
     TRANSFERRED = "transferred"
     EXPIRED = "expired"
 
+class CropContract(str, Enum):
+    ENHANCED = "enhanced"
+    LEGACY = "legacy"
+
 class UserRegisterRequest(BaseModel):
     address: str = Field(..., min_length=42, max_length=42)
     name: str = Field(..., min_length=2, max_length=50)
@@ -52,6 +56,12 @@ class CropTransferRequest(BaseModel):
     note: Optional[str] = Field(None, max_length=500)
     ipfs_data_hash: Optional[str] = None
 
+class CropTransferBody(BaseModel):
+    from_address: str = Field(..., min_length=42, max_length=42)
+    to_address: str = Field(..., min_length=42, max_length=42)
+    note: Optional[str] = Field(None, max_length=500)
+    ipfs_data_hash: Optional[str] = None
+
 class CropPurchaseRequest(BaseModel):
     crop_id: int = Field(..., gt=0)
 
@@ -61,6 +71,7 @@ class TransferEvent(BaseModel):
     timestamp: int
     note: str
     ipfs_data_hash: Optional[str] = None
+    transaction_hash: Optional[str] = None
 
 class CropResponse(BaseModel):
     id: int
@@ -80,10 +91,87 @@ class CropResponse(BaseModel):
     image_url: Optional[str] = None
     cert_url: Optional[str] = None
 
+class IndexedCrop(CropResponse):
+    contract: CropContract  # crop ids are unique per contract only
+
+class CropPage(BaseModel):
+    crops: List[IndexedCrop]
+    next_cursor: Optional[str] = None  # pass as cursor for the next page; None on the last one
+    indexed_block: int
+
+class CropSearchResult(IndexedCrop):
+    score: float
+
+class CropSearchResponse(BaseModel):
+    query: str
+    total: int
+    results: List[CropSearchResult]
+    next_cursor: Optional[str] = None
+    indexed_block: int
+
+class CropSortField(str, Enum):
+    CREATED_AT = "created_at"
+    PRICE = "price"
+    QUANTITY = "quantity"
+    HARVEST_DATE = "harvest_date"
+    EXPIRY_DATE = "expiry_date"
+
+class SortOrder(str, Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+class CropAggregates(BaseModel):
+    # Over every match, not just the page; only count when nothing matched
+    count: int
+    available: Optional[int] = None
+    quantity_total: Optional[int] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    price_mean: Optional[float] = None
+    harvest_date_min: Optional[int] = None
+    expiry_date_max: Optional[int] = None
+
+class CropQueryResponse(BaseModel):
+    total: int
+    results: List[IndexedCrop]
+    aggregates: CropAggregates
+    next_cursor: Optional[str] = None
+    indexed_block: int
+
+class NearbyCrop(IndexedCrop):
+    distance_km: float
+
+class CropNearbyResponse(BaseModel):
+    total: int
+    results: List[NearbyCrop]
+    next_cursor: Optional[str] = None
+    indexed_block: int
+
+class CropAreaResponse(BaseModel):
+    total: int
+    results: List[IndexedCrop]
+    next_cursor: Optional[str] = None
+    indexed_block: int
+
+class CropHistoryPage(BaseModel):
+    contract: CropContract
+    crop_id: int
+    history: List[TransferEvent]
+    next_cursor: Optional[str] = None
+    indexed_block: int
+
 class CropHistoryResponse(BaseModel):
     crop_id: int
     history: List[TransferEvent]
 
+class CropHistoryBatchRequest(BaseModel):
+    crop_ids: List[int] = Field(..., min_length=1)
+
+class CropHistoryBatchResponse(BaseModel):
+    histories: Dict[int, List[TransferEvent]]
+    missing: List[int] = []
+    indexed_block: int
+
 class FileUploadResponse(BaseModel):
     success: bool
     ipfs_hash: str
@@ -97,6 +185,33 @@ class TransactionResponse(BaseModel):
     block_number: int
     error: Optional[str] = None
 
+class BulkOperation(str, Enum):
+    REGISTER = "register"
+    TRANSFER = "transfer"
+
+class BulkRowResult(BaseModel):
+    row: int  # 1-based position in the submitted rows
+    status: str  # succeeded / failed / invalid
+    crop_id: Optional[int] = None
+    transaction_hash: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkTransaction(BaseModel):
+    transaction_hash: str
+    rows: int
+    gas_used: int
+    block_number: int
+    success: bool
+
+class BulkResponse(BaseModel):
+    operation: BulkOperation
+    total_rows: int
+    succeeded: int
+    failed: int
+    invalid: int
+    transactions: List[BulkTransaction]
+    results: List[BulkRowResult]
+
 class UserProfileResponse(BaseModel):
     address: str
     name: str
@@ -2,7 +2,6 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, Depends
 from typing import Optional
 import logging
 from ..websocket_service import websocket_endpoint, notification_service
-from ..blockchain import get_contract
 
 logger = logging.getLogger(__name__)
 
@@ -75,12 +74,13 @@ async def notify_system_event(event_data: dict):
 @router.get("/notifications/stats")
 async def get_notification_stats():
     """Get WebSocket connection statistics"""
-    from .websocket_service import manager
+    from ..websocket_service import manager
     
     return {
         "total_connections": manager.get_connection_count(),
         "connections_by_role": manager.get_connections_by_role(),
-        "active_users": list(manager.active_connections.keys())
+        "active_users": list(manager.active_connections.keys()),
+        "send_queues": manager.get_queue_stats()
     }
 
 @router.post("/notifications/test")
@@ -0,0 +1,201 @@
+"""
+Web3 provider spreading JSON-RPC calls over several nodes.
+
+Reads go to the healthy node with the lowest rolling latency; if it has
+not answered by its own latency percentile (RPC_HEDGE_PERCENTILE), the
+same call is also sent to the next node and the first answer wins.
+Reads of a specific block (eth_getLogs up to toBlock, a block or state
+at a given number) only go to nodes whose head has reached it, so a node
+that is a few blocks behind cannot answer with truncated logs. Writes,
+and anything tied to the node's accounts or pending state, go to the
+primary. Each node sits behind a circuit breaker, so a node that is
+down or timing out is skipped until its cooldown has passed.
+
+A JSON-RPC error in the response (a revert, an unknown block) is an
+answer, not a node failure; only transport errors and timeouts count.
+"""
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence
+
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+
+from . import metrics
+from .utils.resilience import CircuitBreaker, RollingLatency
+
+logger = logging.getLogger(__name__)
+
+# Methods that depend on which node serves them
+PRIMARY_METHODS = frozenset({
+    "eth_sendTransaction", "eth_sendRawTransaction", "eth_sign", "eth_signTransaction",
+    "eth_signTypedData", "eth_signTypedData_v4", "eth_accounts", "eth_coinbase",
+    "eth_estimateGas", "eth_getTransactionCount",
+})
+PRIMARY_PREFIXES = ("personal_", "miner_", "admin_", "txpool_", "hardhat_", "evm_", "anvil_")
+# Position of the block parameter in reads that name one
+BLOCK_PARAMS = {
+    "eth_getBlockByNumber": 0, "eth_getBlockTransactionCountByNumber": 0,
+    "eth_getTransactionByBlockNumberAndIndex": 0, "eth_call": 1, "eth_getBalance": 1,
+    "eth_getCode": 1, "eth_getStorageAt": 2,
+}
+
+RPC_HEDGES = metrics.Counter(
+    "rpc_hedged_requests_total", "Reads re-sent to another node after the hedge delay"
+)
+RPC_LAGGING_SKIPS = metrics.Counter(
+    "rpc_lagging_node_skips_total", "Reads of a block not sent to a node whose head is below it",
+    ["node"]
+)
+RPC_NODE_FAILURES = metrics.Counter(
+    "rpc_node_failures_total", "Transport failures and timeouts by RPC node",
+    ["node"]
+)
+
+
+class RPCNodeUnavailable(ConnectionError):
+    """No node could serve the call (all failed or circuit-broken)"""
+
+
+class RPCNode:
+    def __init__(self, url: str, timeout: float, failure_threshold: int, cooldown: float):
+        self.url = url
+        self.provider = Web3.HTTPProvider(url, request_kwargs={"timeout": timeout})
+        self.breaker = CircuitBreaker(failure_threshold, cooldown)
+        self.latency = RollingLatency()
+        self.head: Optional[int] = None
+
+    def request(self, method: str, params):
+        started = time.perf_counter()
+        try:
+            response = self.provider.make_request(method, params)
+        except Exception as e:
+            was_open = self.breaker.opened_at is not None
+            self.breaker.record_failure()
+            RPC_NODE_FAILURES.labels(self.url).inc()
+            if not was_open and self.breaker.opened_at is not None:
+                logger.warning(f"RPC node {self.url} circuit opened after {self.breaker.failures} failures: {e}")
+            raise
+        self.latency.observe(time.perf_counter() - started)
+        self.breaker.record_success()
+        if method == "eth_blockNumber" and "result" in response:
+            self.head = int(response["result"], 16)
+        return response
+
+    def has_block(self, block_number: int) -> bool:
+        """Whether the node has reached block_number; asks for its head only when the last one seen is lower"""
+        if self.head is None or self.head < block_number:
+            self.request("eth_blockNumber", [])
+        return self.head is not None and self.head >= block_number
+
+    def snapshot(self) -> dict:
+        p90 = self.latency.percentile(0.9)
+        return {
+            "url": self.url,
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "ewma_ms": round(self.latency.ewma * 1000, 2) if self.latency.ewma is not None else None,
+            "p90_ms": round(p90 * 1000, 2) if p90 is not None else None,
+        }
+
+
+class MultiEndpointProvider(JSONBaseProvider):
+    def __init__(self, urls: Sequence[str], primary: Optional[str] = None, hedge_percentile: float = 0.9,
+                 hedge_min_delay: float = 0.05, timeout: float = 10.0, failure_threshold: int = 3,
+                 cooldown: float = 10.0, max_workers: int = 16):
+        super().__init__()
+        if not urls:
+            raise ValueError("MultiEndpointProvider needs at least one RPC URL")
+        self.nodes = [RPCNode(url, timeout, failure_threshold, cooldown) for url in urls]
+        self.primary = next((node for node in self.nodes if node.url == primary), self.nodes[0])
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rpc")
+
+    def __str__(self):
+        return f"MultiEndpointProvider({', '.join(node.url for node in self.nodes)})"
+
+    @staticmethod
+    def is_primary_method(method: str) -> bool:
+        return method in PRIMARY_METHODS or method.startswith(PRIMARY_PREFIXES)
+
+    def make_request(self, method, params):
+        if self.is_primary_method(method):
+            if not self.primary.breaker.allow():
+                raise RPCNodeUnavailable(f"Primary RPC node {self.primary.url} is circuit-broken")
+            return self.primary.request(method, params)
+        return self._read(method, params)
+
+    @staticmethod
+    def required_block(method: str, params) -> Optional[int]:
+        """The block a read is about, when it names one by number"""
+        if method == "eth_getLogs":
+            block = params[0].get("toBlock") if params and isinstance(params[0], dict) else None
+        else:
+            position = BLOCK_PARAMS.get(method)
+            block = params[position] if position is not None and len(params) > position else None
+        if isinstance(block, int):
+            return block
+        if isinstance(block, str) and block.startswith("0x"):
+            return int(block, 16)
+        return None  # "latest", "pending", a block hash, or no block at all
+
+    def _has_block(self, node: RPCNode, block_number: Optional[int]) -> bool:
+        if block_number is None:
+            return True
+        try:
+            if node.has_block(block_number):
+                return True
+        except Exception:
+            return False
+        RPC_LAGGING_SKIPS.labels(node.url).inc()
+        return False
+
+    def ranked_nodes(self) -> List[RPCNode]:
+        """Nodes that may take a call, fastest first (untried nodes first, to measure them)"""
+        healthy = [node for node in self.nodes if node.breaker.available()]
+        return sorted(healthy, key=lambda node: node.latency.ewma or 0.0)
+
+    def _hedge_delay(self, node: RPCNode) -> float:
+        return max(self.hedge_min_delay, node.latency.percentile(self.hedge_percentile) or 0.0)
+
+    def _read(self, method, params):
+        candidates = iter(self.ranked_nodes())
+        required = self.required_block(method, params)
+        pending: Dict[object, RPCNode] = {}
+        last_error: Optional[Exception] = None
+
+        def launch() -> Optional[RPCNode]:
+            for node in candidates:
+                if self._has_block(node, required) and node.breaker.allow():
+                    pending[self._executor.submit(node.request, method, params)] = node
+                    return node
+            return None
+
+        waiting_on = launch()
+        while pending:
+            done, _ = wait(pending, timeout=self._hedge_delay(waiting_on), return_when=FIRST_COMPLETED)
+            if not done:
+                hedge = launch()
+                if hedge is not None:
+                    RPC_HEDGES.inc()
+                    waiting_on = hedge
+                else:
+                    # Nothing left to hedge to; the node timeout bounds this wait
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.pop(future)
+                try:
+                    # Slower duplicates finish in the background and only feed the stats
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+                    if not pending:
+                        waiting_on = launch() or waiting_on
+        if last_error is None and required is not None:
+            last_error = f"none is circuit-closed and at block {required}"
+        raise RPCNodeUnavailable(f"No RPC node could serve {method}: {last_error or 'all circuit-broken'}")
+
+    def snapshot(self) -> List[dict]:
+        return [dict(node.snapshot(), primary=node is self.primary) for node in self.nodes]
@@ -0,0 +1,80 @@
+import base64
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+from fastapi.responses import Response
+
+from .crop_codec import Crop
+from .ipfs_service import ipfs_service
+from .routes.models import CropStatus
+from .tracing import span
+
+AVAILABLE = CropStatus.AVAILABLE.value
+SOLD = CropStatus.SOLD.value
+
+
+def crop_row(c: Crop, status: Optional[str] = None) -> Dict[str, Any]:
+    """Build a CropResponse-shaped dict from a Crop record
+
+    Contract results go through crop_codec.unpack_crops first.
+    """
+    image_hash = c.ipfs_image_hash or None
+    cert_hash = c.ipfs_cert_hash or None
+    return {
+        "id": c.id,
+        "name": c.name,
+        "quantity": c.quantity,
+        "price": c.price,
+        "batch_number": c.batch_number,
+        "harvest_date": c.harvest_date,
+        "expiry_date": c.expiry_date,
+        "ipfs_image_hash": image_hash,
+        "ipfs_cert_hash": cert_hash,
+        "farm_coords": c.farm_coords,
+        "current_owner": c.current_owner,
+        "available": c.available,
+        "created_at": c.created_at,
+        "status": status or (AVAILABLE if c.available else SOLD),
+        "image_url": ipfs_service.get_file_url(image_hash) if image_hash else None,
+        "cert_url": ipfs_service.get_file_url(cert_hash) if cert_hash else None,
+    }
+
+
+def crop_rows(crops: Iterable[Crop], status: Optional[str] = None) -> List[Dict[str, Any]]:
+    return [crop_row(c, status) for c in crops]
+
+
+def encode_cursor(key: tuple) -> str:
+    """Opaque page cursor for a keyset position"""
+    return base64.urlsafe_b64encode(orjson.dumps(list(key))).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: tuple) -> tuple:
+    """Keyset position from encode_cursor; ValueError when it is not one"""
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types) or not all(
+        type(value) is kind for value, kind in zip(values, types)
+    ):
+        raise ValueError("Invalid cursor")
+    return tuple(values)
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded once with orjson
+
+    Returning it from a route skips FastAPI's response_model validation, so
+    build content from already trusted data (e.g. crop_rows). Integers
+    beyond 64 bits (large wei amounts) fall back to the stdlib encoder.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        with span("encode"):
+            try:
+                return orjson.dumps(content)
+            except orjson.JSONEncodeError:
+                return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
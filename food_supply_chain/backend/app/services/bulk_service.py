@@ -0,0 +1,123 @@
+"""
+Chunked batch registration and transfer of crops.
+
+Valid rows are packed into registerCrops / transferCrops calls sized to a
+fraction of the block gas limit. A chunk whose gas estimate reverts is
+bisected until the offending rows are isolated, so one bad row does not
+sink its neighbours. All chunk transactions are sent before any receipt is
+awaited, and results are reported per input row.
+"""
+import logging
+from typing import Dict, List, Sequence, Tuple
+
+from .. import config
+from ..fees import fee_oracle
+from ..blockchain import estimate_gas, transact_function, wait_for_transaction_receipt
+from ..contract_gateway import get_gateway
+
+logger = logging.getLogger(__name__)
+
+# operation -> (batch function, event emitted per item)
+OPERATIONS = {
+    "register": ("registerCrops", "CropRegistered"),
+    "transfer": ("transferCrops", "CropTransferred"),
+}
+GAS_HEADROOM = 1.2
+
+
+def _revert_reason(error: Exception) -> str:
+    message = getattr(error, "message", None) or str(error)
+    return message.replace("execution reverted: ", "")
+
+
+def plan_chunks(batch_fn, items: Sequence[tuple], sender: str, gas_budget: int,
+                max_batch: int) -> Tuple[List[Tuple[List[int], int]], Dict[int, str]]:
+    """Split items into (indices, gas estimate) chunks that fit gas_budget
+
+    Returns the chunks and {index: revert reason} for items that fail on
+    their own.
+    """
+    from web3.exceptions import ContractLogicError
+
+    chunks: List[Tuple[List[int], int]] = []
+    rejected: Dict[int, str] = {}
+    size = fitted_size = min(len(items), max_batch)
+    start = 0
+    while start < len(items):
+        indices = list(range(start, min(start + size, len(items))))
+        try:
+            gas = estimate_gas(batch_fn([items[i] for i in indices]), {"from": sender})
+        except (ContractLogicError, ValueError) as e:
+            # ValueError: nodes that report reverts or gas caps as RPC errors
+            if len(indices) == 1:
+                rejected[indices[0]] = _revert_reason(e)
+                start += 1
+                size = fitted_size
+            else:
+                size = max(1, len(indices) // 2)
+            continue
+        if gas > gas_budget and len(indices) > 1:
+            size = max(1, min(len(indices) - 1, len(indices) * gas_budget // gas))
+            continue
+        chunks.append((indices, gas))
+        start += len(indices)
+        # Size the next chunk from the observed gas per row
+        size = fitted_size = max(1, min(max_batch, int(gas_budget * len(indices) / gas)))
+    return chunks, rejected
+
+
+def submit(operation: str, items: Sequence[tuple], sender: str) -> Tuple[List[dict], List[dict]]:
+    """Send items in as few transactions as fit; returns (per-item results, transactions)
+
+    Item results are {"status": "succeeded"|"failed", "crop_id",
+    "transaction_hash", "error"} in input order.
+    """
+    from web3.logs import DISCARD
+
+    fn_name, event_name = OPERATIONS[operation]
+    gateway = get_gateway()
+    batch_fn = gateway.functions[fn_name]
+    block_gas_limit = gateway.w3.eth.get_block("latest")["gasLimit"]
+    gas_budget = int(block_gas_limit * config.BULK_GAS_FRACTION)
+
+    results = [{"status": "failed", "crop_id": None, "transaction_hash": None, "error": None} for _ in items]
+    chunks, rejected = plan_chunks(batch_fn, items, sender, gas_budget, config.BULK_MAX_BATCH)
+    for index, reason in rejected.items():
+        results[index]["error"] = reason
+
+    fee_params = fee_oracle.fee_params()
+    sent = []
+    for indices, gas in chunks:
+        call = batch_fn([items[i] for i in indices])
+        try:
+            tx_hash = transact_function(call, {
+                "from": sender, "gas": min(int(gas * GAS_HEADROOM), block_gas_limit), **fee_params
+            })
+        except Exception as e:
+            logger.warning(f"{fn_name} chunk of {len(indices)} rows was not sent: {e}")
+            for i in indices:
+                results[i]["error"] = f"Transaction not sent: {e}"
+            continue
+        sent.append((indices, tx_hash))
+
+    transactions = []
+    event = gateway.events[event_name]
+    for indices, tx_hash in sent:
+        receipt = wait_for_transaction_receipt(tx_hash, function=fn_name)
+        transactions.append({
+            "transaction_hash": tx_hash.hex(),
+            "rows": len(indices),
+            "gas_used": receipt.gasUsed,
+            "block_number": receipt.blockNumber,
+            "success": receipt.status == 1,
+        })
+        logs = event.process_receipt(receipt, errors=DISCARD) if receipt.status == 1 else []
+        for position, i in enumerate(indices):
+            results[i]["transaction_hash"] = tx_hash.hex()
+            if receipt.status != 1:
+                results[i]["error"] = "Blockchain transaction failed"
+                continue
+            results[i]["status"] = "succeeded"
+            if position < len(logs):
+                results[i]["crop_id"] = logs[position].args.cropId
+    return results, transactions
@@ -0,0 +1,115 @@
+import random
+import threading
+import time
+
+import pytest
+
+from app.backfill import LogBackfill, is_range_error
+
+
+class FakeNode:
+    """get_logs over one event per block, refusing ranges wider than max_range"""
+
+    def __init__(self, max_range=None, jitter: float = 0.0, failures: int = 0):
+        self.max_range = max_range
+        self.jitter = jitter
+        self.failures = failures
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def fetch(self, from_block: int, to_block: int):
+        with self._lock:
+            self.requests.append((from_block, to_block))
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("connection reset by peer")
+        if self.jitter:
+            time.sleep(random.random() * self.jitter)
+        if self.max_range is not None and to_block - from_block + 1 > self.max_range:
+            raise ValueError({"code": -32005, "message": f"query returned more than {self.max_range} results"})
+        return [{"block_number": n} for n in range(from_block, to_block + 1)], f"0x{to_block:064x}"
+
+
+class Applied:
+    """apply() callback recording each flush"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, events, last_block, last_block_hash):
+        assert last_block_hash == f"0x{last_block:064x}"
+        self.calls.append((list(events), last_block))
+
+    def blocks(self):
+        return [event["block_number"] for events, _ in self.calls for event in events]
+
+
+@pytest.fixture
+def applied():
+    return Applied()
+
+
+@pytest.mark.parametrize("error", [
+    ValueError({"code": -32005, "message": "limit exceeded"}),
+    ValueError({"code": -32000, "message": "query returned more than 10000 results"}),
+    ValueError("block range is too wide"),
+    ValueError("Log response size exceeded."),
+    TimeoutError(),
+])
+def test_range_errors_are_recognised(error):
+    assert is_range_error(error)
+
+
+@pytest.mark.parametrize("error", [
+    ValueError({"code": -32000, "message": "header not found"}),
+    ConnectionError("connection reset by peer"),
+    ValueError(),
+])
+def test_other_errors_are_not_range_errors(error):
+    assert not is_range_error(error)
+
+
+def test_refused_ranges_are_halved_until_they_fit(applied):
+    node = FakeNode(max_range=10)
+    backfill = LogBackfill(node.fetch, applied, workers=2, initial_span=64, target_logs=1000)
+    assert backfill.run(1, 200) == 200
+    assert applied.blocks() == list(range(1, 201))
+    assert backfill.splits > 0
+    assert all(to_block - from_block < 10 for from_block, to_block in node.requests[-5:])
+
+
+def test_out_of_order_results_are_applied_in_block_order(applied):
+    node = FakeNode(jitter=0.005)
+    backfill = LogBackfill(node.fetch, applied, workers=4, initial_span=5, max_span=5, flush_events=1)
+    assert backfill.run(10, 109) == 100
+    assert applied.blocks() == list(range(10, 110))
+    last_blocks = [last_block for _, last_block in applied.calls]
+    assert last_blocks == sorted(last_blocks) and last_blocks[-1] == 109
+    assert backfill.progress()["applied_block"] == 109
+
+
+def test_span_grows_while_results_are_sparse(applied):
+    node = FakeNode()
+    backfill = LogBackfill(node.fetch, applied, workers=1, initial_span=10, max_span=80, target_logs=1000)
+    backfill.run(0, 999)
+    spans = [to_block - from_block + 1 for from_block, to_block in node.requests]
+    assert spans[:4] == [10, 20, 40, 80]
+    assert max(spans) == 80
+    assert applied.blocks() == list(range(1000))
+
+
+def test_transient_errors_are_retried(applied):
+    node = FakeNode(failures=2)
+    backfill = LogBackfill(node.fetch, applied, workers=1, initial_span=50)
+    assert backfill.run(1, 100) == 100
+    assert backfill.retries == 2
+    assert applied.blocks() == list(range(1, 101))
+
+
+def test_gives_up_after_max_retries(applied):
+    node = FakeNode(max_range=0)
+    backfill = LogBackfill(node.fetch, applied, workers=1, initial_span=4, max_retries=2)
+    # Single blocks cannot be split further, so range errors are retried like any other
+    with pytest.raises(ValueError):
+        backfill.run(1, 4)
+    assert applied.calls == []
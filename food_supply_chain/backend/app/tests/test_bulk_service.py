@@ -0,0 +1,158 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from hexbytes import HexBytes
+from starlette.requests import Request
+from web3.exceptions import ContractLogicError
+
+from app import config
+from app.routes.enhanced_crop_routes import read_bulk_rows
+from app.services import bulk_service
+from app.services.bulk_service import plan_chunks, submit
+
+SENDER = "0x" + "11" * 20
+ROW_GAS = 100_000
+BASE_GAS = 21_000
+
+
+class FakeNode:
+    """eth_estimateGas / send / receipt for batch calls over integer rows
+
+    A row in bad reverts its whole batch; a row in heavy costs ten rows' gas.
+    """
+
+    def __init__(self, bad=(), heavy=(), failing=(), unsent=()):
+        self.bad = set(bad)
+        self.heavy = set(heavy)
+        self.failing = set(failing)
+        self.unsent = set(unsent)
+        self.estimates = []
+        self.sent = []
+        self.next_crop_id = 100
+
+    def batch_fn(self, rows):
+        return SimpleNamespace(fn_name="registerCrops", rows=list(rows))
+
+    def estimate_gas(self, call, transaction):
+        self.estimates.append(call.rows)
+        bad = self.bad.intersection(call.rows)
+        if bad:
+            raise ContractLogicError(f"execution reverted: Row {min(bad)} is invalid")
+        return BASE_GAS + sum(ROW_GAS * (10 if row in self.heavy else 1) for row in call.rows)
+
+    def transact(self, call, transaction):
+        if self.unsent.intersection(call.rows):
+            raise ValueError("nonce too low")
+        self.sent.append((call.rows, transaction["gas"]))
+        return HexBytes(len(self.sent).to_bytes(32, "big"))
+
+    def receipt(self, tx_hash, function=None):
+        rows = self.sent[int.from_bytes(tx_hash, "big") - 1][0]
+        return SimpleNamespace(rows=rows, status=0 if self.failing.intersection(rows) else 1,
+                               gasUsed=BASE_GAS + ROW_GAS * len(rows), blockNumber=7)
+
+    def process_receipt(self, receipt, errors=None):
+        logs = []
+        for _ in receipt.rows:
+            logs.append(SimpleNamespace(args=SimpleNamespace(cropId=self.next_crop_id)))
+            self.next_crop_id += 1
+        return logs
+
+
+@pytest.fixture
+def node(monkeypatch):
+    node = FakeNode()
+    monkeypatch.setattr(bulk_service, "estimate_gas", node.estimate_gas)
+    monkeypatch.setattr(bulk_service, "transact_function", node.transact)
+    monkeypatch.setattr(bulk_service, "wait_for_transaction_receipt", node.receipt)
+    monkeypatch.setattr(bulk_service.fee_oracle, "fee_params", lambda: {"maxFeePerGas": 2, "maxPriorityFeePerGas": 1})
+    monkeypatch.setattr(bulk_service, "get_gateway", lambda: SimpleNamespace(
+        functions={"registerCrops": node.batch_fn},
+        events={"CropRegistered": SimpleNamespace(process_receipt=node.process_receipt)},
+        w3=SimpleNamespace(eth=SimpleNamespace(get_block=lambda block: {"gasLimit": 2_000_000})),
+    ))
+    monkeypatch.setattr(config, "BULK_GAS_FRACTION", 0.5)
+    monkeypatch.setattr(config, "BULK_MAX_BATCH", 500)
+    return node
+
+
+def planned(chunks):
+    return [indices for indices, _ in chunks]
+
+
+def test_chunks_fill_the_gas_budget(node):
+    chunks, rejected = plan_chunks(node.batch_fn, list(range(25)), SENDER, 1_000_000, 500)
+    assert rejected == {}
+    assert planned(chunks) == [list(range(0, 9)), list(range(9, 18)), list(range(18, 25))]
+    assert all(gas <= 1_000_000 for _, gas in chunks)
+
+
+def test_chunks_respect_the_batch_limit(node):
+    chunks, _ = plan_chunks(node.batch_fn, list(range(10)), SENDER, 10_000_000, 4)
+    assert planned(chunks) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+
+def test_reverting_rows_are_bisected_out(node):
+    node.bad = {3, 250}
+    chunks, rejected = plan_chunks(node.batch_fn, list(range(400)), SENDER, 10_000_000, 500)
+    assert rejected == {3: "Row 3 is invalid", 250: "Row 250 is invalid"}
+    rows = [i for indices in planned(chunks) for i in indices]
+    assert rows == [i for i in range(400) if i not in (3, 250)]
+    # Isolating a row takes a logarithmic number of estimates, not one per row
+    assert len(node.estimates) < 50
+
+
+def test_an_over_budget_row_is_sent_on_its_own(node):
+    node.heavy = {2}
+    chunks, rejected = plan_chunks(node.batch_fn, list(range(6)), SENDER, 500_000, 500)
+    assert rejected == {}
+    assert [2] in planned(chunks)
+    assert all(gas <= 500_000 for indices, gas in chunks if indices != [2])
+    assert sorted(i for indices in planned(chunks) for i in indices) == list(range(6))
+
+
+def test_submit_maps_events_back_to_rows(node):
+    node.bad = {1}
+    results, transactions = submit("register", list(range(12)), SENDER)
+    # Bisection leaves row 0 in a chunk of its own
+    assert [t["rows"] for t in transactions] == [1, 8, 2]
+    assert results[1] == {"status": "failed", "crop_id": None, "transaction_hash": None,
+                          "error": "Row 1 is invalid"}
+    ok = [i for i in range(12) if i != 1]
+    assert [results[i]["crop_id"] for i in ok] == list(range(100, 111))
+    assert all(results[i]["status"] == "succeeded" for i in ok)
+    assert {results[i]["transaction_hash"] for i in ok} == {t["transaction_hash"] for t in transactions}
+    # Transactions get headroom over their estimate
+    assert node.sent[0][1] == int((BASE_GAS + ROW_GAS) * bulk_service.GAS_HEADROOM)
+
+
+def test_submit_reports_failed_and_unsent_chunks(node):
+    node.failing = {0}
+    node.unsent = {10}
+    results, transactions = submit("register", list(range(12)), SENDER)
+    assert [t["success"] for t in transactions] == [False]
+    assert all(r["error"] == "Blockchain transaction failed" and r["transaction_hash"] for r in results[:9])
+    assert all(r["error"].startswith("Transaction not sent") and r["transaction_hash"] is None
+               for r in results[9:])
+    assert all(r["status"] == "failed" and r["crop_id"] is None for r in results)
+
+
+def request_with(body: bytes, content_type: str) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request({"type": "http", "method": "POST", "headers": [(b"content-type", content_type.encode())]},
+                   receive)
+
+
+@pytest.mark.parametrize("body, content_type", [
+    (b'{"rows": [', "application/json"),
+    (b"\xff\xfe not utf-8", "application/json"),
+    (b"name,quantity\n\xffTomato,1\n", "text/csv"),
+])
+def test_unreadable_bulk_bodies_are_bad_requests(body, content_type):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(read_bulk_rows(request_with(body, content_type)))
+    assert error.value.status_code == 400
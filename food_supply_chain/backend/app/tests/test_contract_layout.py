@@ -0,0 +1,82 @@
+"""The backend codec against the Crop layout in the contract source
+
+The compiled artifact is not checked in, so the struct and argument
+lists are read from EnhancedFoodSupplyChain.sol and ABI-encoded with
+eth_abi, the way the node would return them.
+"""
+import re
+from pathlib import Path
+
+import pytest
+from eth_abi import decode, encode
+
+from app.crop_codec import (
+    CropInput, TransferInput, cid_to_digest, registered_crop, registration_args, unpack_crop
+)
+
+SOURCE = Path(__file__).resolve().parents[3] / "contracts" / "EnhancedFoodSupplyChain.sol"
+CID = "QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG"
+OWNER = "0x" + "11" * 20
+
+
+def fields(declarations: str):
+    """[(type, name)] from a struct body or parameter list"""
+    declarations = re.sub(r"//[^\n]*", "", declarations)
+    return [
+        (parts[0], parts[-1].lstrip("_"))
+        for parts in (item.split() for item in re.split(r"[;,]", declarations))
+        if parts
+    ]
+
+
+@pytest.fixture(scope="module")
+def source() -> str:
+    return SOURCE.read_text()
+
+
+def struct(source: str, name: str):
+    return fields(re.search(rf"struct {name} \{{(.*?)\}}", source, re.S).group(1))
+
+
+def params(source: str, function: str):
+    return fields(re.search(rf"function {function}\((.*?)\)", source, re.S).group(1))
+
+
+def snake_case(name: str) -> str:
+    return re.sub(r"(?<=[a-z0-9])([A-Z])", r"_\1", name).lower()
+
+
+def test_crop_input_matches_the_struct_and_register_crop(source):
+    layout = struct(source, "CropInput")
+    assert [snake_case(name) for _, name in layout] == list(CropInput._fields)
+    assert params(source, "registerCrop") == layout
+
+    values = registration_args("Tomato", 2 ** 128 - 1, 25, "B-1", 2 ** 64 - 1, 2 ** 64 - 1, CID, None,
+                               "-90,180")
+    types = [abi_type for abi_type, _ in layout]
+    assert decode(types, encode(types, values)) == tuple(values)
+
+
+def test_transfer_input_matches_the_struct_and_transfer_crop(source):
+    layout = struct(source, "TransferInput")
+    assert [snake_case(name) for _, name in layout] == ["crop_id", "to", "note", "ipfs_data_hash"]
+    assert len(layout) == len(TransferInput._fields)
+    assert params(source, "transferCrop") == layout
+
+
+def test_unpack_crop_reads_the_struct_in_declaration_order(source):
+    layout = struct(source, "Crop")
+    values = {
+        "id": 7, "harvestDate": 1_700_000_000, "expiryDate": 1_800_000_000, "createdAt": 1_700_000_100,
+        "quantity": 2 ** 100, "price": 25, "currentOwner": OWNER, "available": True,
+        "latE6": -33_868_800, "lngE6": 151_209_300, "ipfsImageDigest": cid_to_digest(CID),
+        "ipfsCertDigest": b"\x00" * 32, "name": "Tomato", "batchNumber": "B-1",
+    }
+    assert sorted(name for _, name in layout) == sorted(values)
+
+    crop_type = "(" + ",".join(abi_type for abi_type, _ in layout) + ")"
+    returned = decode([crop_type], encode([crop_type], [tuple(values[name] for _, name in layout)]))[0]
+    crop = unpack_crop(returned)
+    assert crop == registered_crop(7, registration_args(
+        "Tomato", 2 ** 100, 25, "B-1", 1_700_000_000, 1_800_000_000, CID, None, "-33.8688,151.2093"
+    ), OWNER, 1_700_000_100)
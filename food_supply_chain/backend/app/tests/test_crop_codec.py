@@ -0,0 +1,84 @@
+import pytest
+
+from app.crop_codec import (
+    EMPTY_DIGEST, CropEncodingError, cid_to_digest, digest_to_cid, format_coords, parse_coords,
+    registered_crop, registration_args, unpack_crop
+)
+
+CID = "QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG"
+OWNER = "0x" + "11" * 20
+
+
+def test_cid_round_trip():
+    digest = cid_to_digest(CID)
+    assert len(digest) == 32
+    assert digest_to_cid(digest) == CID
+
+
+@pytest.mark.parametrize("cid", [None, ""])
+def test_empty_cid_is_the_zero_digest(cid):
+    assert cid_to_digest(cid) == EMPTY_DIGEST
+    assert digest_to_cid(EMPTY_DIGEST) is None
+
+
+@pytest.mark.parametrize("cid", [
+    "bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi",  # CIDv1
+    "Qm0OIl",  # not base58
+    "QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPb",  # truncated
+])
+def test_unsupported_cids_are_rejected(cid):
+    with pytest.raises(CropEncodingError):
+        cid_to_digest(cid)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("12.9716,77.5946", (12_971_600, 77_594_600)),
+    (" -33.8688 , 151.2093 ", (-33_868_800, 151_209_300)),
+    ("90,-180", (90_000_000, -180_000_000)),
+    ("0.0000004,0.0000006", (0, 1)),
+])
+def test_parse_coords(text, expected):
+    assert parse_coords(text) == expected
+
+
+@pytest.mark.parametrize("lat_e6, lng_e6, text", [
+    (12_971_600, 77_594_600, "12.9716,77.5946"),
+    (-500_000, 1, "-0.5,0.000001"),
+    (0, 0, "0,0"),
+])
+def test_format_coords(lat_e6, lng_e6, text):
+    assert format_coords(lat_e6, lng_e6) == text
+    assert parse_coords(text) == (lat_e6, lng_e6)
+
+
+@pytest.mark.parametrize("text", [
+    "", "12.97", "1,2,3", "north,east", "90.000001,0", "0,-180.5",
+    "inf,0", "0,-inf", "1e400,0", "nan,0",
+])
+def test_invalid_coords_are_rejected(text):
+    with pytest.raises(CropEncodingError):
+        parse_coords(text)
+
+
+def test_registration_round_trip():
+    values = registration_args("Tomato", 10, 2 ** 100, "B-1", 1_700_000_000, 1_800_000_000, CID, None,
+                               "12.9716,77.5946")
+    assert values.ipfs_image_digest == cid_to_digest(CID)
+    assert values.ipfs_cert_digest == EMPTY_DIGEST
+    crop = registered_crop(7, values, OWNER, 1_700_000_100)
+    assert crop.ipfs_image_hash == CID
+    assert crop.ipfs_cert_hash is None
+    assert crop.farm_coords == "12.9716,77.5946"
+    assert crop.price == 2 ** 100
+    assert crop.available
+
+
+def test_unpack_crop_maps_solidity_field_order():
+    packed = (7, 1_700_000_000, 1_800_000_000, 1_700_000_100, 10, 25, OWNER, False,
+              -1_000_000, 2_500_000, cid_to_digest(CID), EMPTY_DIGEST, "Tomato", "B-1")
+    crop = unpack_crop(packed)
+    assert (crop.id, crop.name, crop.batch_number) == (7, "Tomato", "B-1")
+    assert (crop.quantity, crop.price, crop.current_owner, crop.available) == (10, 25, OWNER, False)
+    assert (crop.harvest_date, crop.expiry_date, crop.created_at) == (1_700_000_000, 1_800_000_000, 1_700_000_100)
+    assert crop.farm_coords == "-1,2.5"
+    assert (crop.ipfs_image_hash, crop.ipfs_cert_hash) == (CID, None)
@@ -0,0 +1,102 @@
+import pytest
+
+from app.crop_codec import ENHANCED, LEGACY
+from app.crop_columns import MAX_INT64, CropColumns
+
+ALICE = "0x" + "aa" * 20
+BOB = "0x" + "bb" * 20
+
+# (contract, crop_id, price, quantity, harvest_date, expiry_date, created_at, available, owner, name_key)
+ROWS = [
+    (ENHANCED, 1, 30, 5, 100, 900, 1_000, True, ALICE, "tomato"),
+    (ENHANCED, 2, 10, 50, 200, 800, 1_001, True, BOB, "potato"),
+    (LEGACY, 1, 20, 7, 0, 0, 1_002, False, ALICE, "tomato"),
+    (ENHANCED, 3, 20, 9, 300, 700, 1_003, True, ALICE, "onion"),
+    (ENHANCED, 4, 40, 1, 400, 600, 1_004, True, BOB, "tomato"),
+]
+
+
+@pytest.fixture(params=["from_rows", "append"])
+def columns(request):
+    if request.param == "from_rows":
+        return CropColumns.from_rows(ROWS)
+    columns = CropColumns(capacity=2)
+    for row in ROWS:
+        columns.append(*row)
+    return columns
+
+
+def test_default_order_is_newest_first(columns):
+    result = columns.query(10)
+    assert result.total == 5
+    assert result.keys == [(ENHANCED, 4), (ENHANCED, 3), (LEGACY, 1), (ENHANCED, 2), (ENHANCED, 1)]
+
+
+def test_ties_keep_registration_order(columns):
+    # Crops 3 and legacy 1 share a price; the page boundary falls between them
+    assert columns.query(2, sort="price", descending=False).keys == [(ENHANCED, 2), (LEGACY, 1)]
+    assert columns.query(2, 1, sort="price", descending=False).keys == [(LEGACY, 1), (ENHANCED, 3)]
+
+
+def test_filters_combine(columns):
+    result = columns.query(10, contract=ENHANCED, owner=ALICE, name_key="tomato")
+    assert result.keys == [(ENHANCED, 1)]
+    assert columns.query(10, available=False).keys == [(LEGACY, 1)]
+    assert columns.query(10, owner="0x" + "cc" * 20).total == 0
+
+
+def test_ranges_are_inclusive_and_open_ended(columns):
+    result = columns.query(10, sort="harvest_date", descending=False,
+                           ranges={"price": (20, 30), "harvest_date": (100, None)})
+    assert result.keys == [(ENHANCED, 1), (ENHANCED, 3)]
+    assert columns.query(10, ranges={"expiry_date": (None, 700)}).total == 3
+
+
+def test_pages_past_the_end_still_count_matches(columns):
+    result = columns.query(10, offset=10)
+    assert (result.total, result.keys) == (5, [])
+    assert result.aggregates["count"] == 5
+
+
+def test_aggregates_cover_every_match(columns):
+    aggregates = columns.query(1, name_key="tomato").aggregates
+    assert aggregates == {
+        "count": 3, "available": 2, "quantity_total": 13, "price_min": 20.0, "price_max": 40.0,
+        "price_mean": 30.0, "harvest_date_min": 0, "expiry_date_max": 900,
+    }
+    assert columns.query(1, name_key="cabbage").aggregates == {"count": 0}
+
+
+def test_transfers_and_purchases_update_rows_in_place(columns):
+    columns.apply([
+        {"event": "CropTransferred", "contract": ENHANCED, "crop_id": 1, "to_address": BOB},
+        {"event": "CropPurchased", "contract": ENHANCED, "crop_id": 3, "to_address": BOB},
+        {"event": "CropTransferred", "contract": LEGACY, "crop_id": 9, "to_address": BOB},
+    ])
+    assert columns.query(10, owner=BOB, sort="created_at", descending=False).keys == [
+        (ENHANCED, 1), (ENHANCED, 2), (ENHANCED, 3), (ENHANCED, 4)
+    ]
+    assert columns.query(10, available=False).keys == [(ENHANCED, 3), (LEGACY, 1)]
+
+
+def test_quantity_total_is_exact_beyond_int64():
+    rows = [row[:3] + (quantity,) + row[4:] for row, quantity in zip(ROWS, [2 ** 100, 5, MAX_INT64, MAX_INT64, 1])]
+    appended = CropColumns()
+    for row in rows:
+        appended.append(*row)
+    # SQLite hands uint256 values beyond int64 back as text
+    loaded = CropColumns.from_rows([row[:3] + (str(row[3]),) + row[4:] for row in rows])
+    for columns in (appended, loaded):
+        assert columns.query(1).aggregates["quantity_total"] == 2 ** 100 + 2 * MAX_INT64 + 6
+        assert columns.query(1, contract=LEGACY).aggregates["quantity_total"] == MAX_INT64
+        # The clamped column still sorts and filters
+        assert columns.query(1, sort="quantity").keys == [(ENHANCED, 1)]
+        assert columns.query(10, ranges={"quantity": (MAX_INT64, None)}).total == 3
+
+
+def test_re_registration_replaces_an_exact_quantity():
+    columns = CropColumns()
+    columns.append(*ROWS[0][:3], 2 ** 100, *ROWS[0][4:])
+    columns.append(*ROWS[0][:3], 3, *ROWS[0][4:])
+    result = columns.query(10)
+    assert (result.total, result.aggregates["quantity_total"]) == (1, 3)
@@ -0,0 +1,132 @@
+import random
+
+import pytest
+
+from app.crop_codec import ENHANCED, LEGACY, format_coords
+from app.crop_geo import GeoIndex, _lng_ranges, distance_km, parse
+
+
+def index_of(*positions) -> GeoIndex:
+    """GeoIndex of enhanced crops 1, 2, ... at the given (lat, lng) positions"""
+    index = GeoIndex()
+    for crop_id, (lat, lng) in enumerate(positions, start=1):
+        index.add(ENHANCED, crop_id, format_coords(round(lat * 1e6), round(lng * 1e6)))
+    return index
+
+
+def box_ids(index: GeoIndex, south, west, north, east):
+    return [point[3] for point in index.within_box(south, west, north, east)]
+
+
+def radius_ids(index: GeoIndex, lat, lng, radius_km):
+    return sorted(point[3] for _, point in index.within_radius(lat, lng, radius_km))
+
+
+@pytest.fixture(scope="module")
+def scattered():
+    """2000 random crops and their indexed positions, for comparing against a full scan"""
+    rng = random.Random(7)
+    positions = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(2000)]
+    index = index_of(*positions)
+    points = {crop_id: parse(format_coords(round(lat * 1e6), round(lng * 1e6)))
+              for crop_id, (lat, lng) in enumerate(positions, start=1)}
+    return index, points
+
+
+@pytest.mark.parametrize("text", ["", "12.97", "north,east", "91,0", "nan,0", "inf,0", "1e400,0"])
+def test_unusable_coordinates_are_not_indexed(text):
+    assert parse(text) is None
+    index = GeoIndex()
+    assert not index.add(ENHANCED, 1, text)
+    assert len(index) == 0
+
+
+def test_crops_are_indexed_once_per_contract():
+    index = GeoIndex()
+    assert index.add(ENHANCED, 1, "12.9716,77.5946")
+    assert not index.add(ENHANCED, 1, "12.9716,77.5946")
+    assert index.add(LEGACY, 1, "12.9716,77.5946")
+    assert len(index) == 2
+
+
+@pytest.mark.parametrize("west, east, expected", [
+    (-10, 10, [(-10, 10)]),
+    (170, -170, [(170, 180), (-180, -170)]),
+    (-190, -170, [(170, 180), (-180, -170)]),
+    (170, 190, [(170, 180), (-180, -170)]),
+    (-200, 200, [(-180, 180)]),
+])
+def test_lng_ranges_split_at_the_antimeridian(west, east, expected):
+    assert _lng_ranges(west, east) == expected
+
+
+def test_box_across_the_antimeridian():
+    index = index_of((0, 179.5), (0, -179.5), (0, 180), (0, -180), (0, 0), (0, 170.5))
+    assert box_ids(index, -1, 179, 1, -179) == [1, 2, 3, 4]
+    assert box_ids(index, -1, -179, 1, 179) == [5, 6]
+
+
+def test_points_on_cell_edges():
+    index = index_of((0.25, 0.25), (0.5, 0.5), (90, 180), (-90, -180), (0.2499, 0.2499))
+    assert box_ids(index, 0.25, 0.25, 0.25, 0.25) == [1]
+    assert box_ids(index, 0.25, 0.25, 0.5, 0.5) == [1, 2]
+    assert box_ids(index, 0, 0, 0.25, 0.25) == [1, 5]
+    assert box_ids(index, 89.9, 179.9, 90, 180) == [3]
+    assert box_ids(index, -90, -180, -89.9, -179.9) == [4]
+
+
+def test_large_boxes_walk_the_occupied_cells():
+    # Few occupied cells: the world-sized box takes the fallback path
+    index = index_of((10, 10), (-45, 100), (60, -120))
+    assert len(index.cells) == 3
+    assert box_ids(index, -90, -180, 90, 180) == [1, 2, 3]
+    assert box_ids(index, -50, 0, 50, 180) == [1, 2]
+    assert box_ids(index, -50, 170, 70, -100) == [3]
+
+
+def test_both_cell_walks_agree_with_a_full_scan(scattered):
+    index, points = scattered
+    rng = random.Random(3)
+    for _ in range(60):
+        # Small boxes visit their own cells, large ones walk the occupied cells
+        size = rng.choice([5, 30, 360])
+        south = rng.uniform(-90, 90)
+        north = min(90, south + rng.uniform(0, size / 2))
+        west = rng.uniform(-180, 180)
+        east = (west + rng.uniform(0, size) + 180) % 360 - 180
+        expected = [
+            crop_id for crop_id, (lat, lng) in points.items()
+            if south <= lat <= north and (west <= lng <= east if west <= east else lng >= west or lng <= east)
+        ]
+        assert box_ids(index, south, west, north, east) == expected
+
+
+def test_radius_results_are_nearest_first():
+    index = index_of((12.97, 77.59), (13.0, 77.6), (12.0, 77.0), (28.6, 77.2))
+    matches = index.within_radius(12.97, 77.59, 150)
+    assert [point[3] for _, point in matches] == [1, 2, 3]
+    assert [distance for distance, _ in matches] == sorted(distance for distance, _ in matches)
+    assert matches[0][0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_radius_across_the_antimeridian():
+    index = index_of((0, 179.9), (0, -179.9), (0, 179))
+    assert radius_ids(index, 0, 180, 15) == [1, 2]
+    assert radius_ids(index, 0, -179.95, 120) == [1, 2, 3]
+
+
+def test_radius_covering_a_pole():
+    # Points at 89.5 N on opposite meridians are ~111 km apart across the pole
+    index = index_of((89.5, 0), (89.5, 180), (89.5, 90), (88, 0), (-89.5, 0))
+    assert radius_ids(index, 89.5, 0, 120) == [1, 2, 3]
+    assert radius_ids(index, 90, 0, 300) == [1, 2, 3, 4]
+    assert radius_ids(index, -90, 0, 100) == [5]
+
+
+@pytest.mark.parametrize("lat, lng, radius_km", [
+    (85, 10, 1500), (-80, -170, 2500), (0, 179, 800), (45, 0, 50), (10, 10, 20000),
+])
+def test_radius_agrees_with_a_full_scan(scattered, lat, lng, radius_km):
+    index, points = scattered
+    expected = [crop_id for crop_id, (plat, plng) in points.items() if distance_km(lat, lng, plat, plng) <= radius_km]
+    assert radius_ids(index, lat, lng, radius_km) == expected
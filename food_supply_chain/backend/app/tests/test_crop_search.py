@@ -0,0 +1,117 @@
+import pytest
+
+from app.crop_codec import ENHANCED, LEGACY, Crop
+from app.crop_search import BATCH_SCORE
+from app.crop_store import CropStore
+
+FARMER = "0x" + "11" * 20
+
+
+def registrations(crops, contract: str = ENHANCED, first_block: int = 1):
+    """CropRegistered events for (crop_id, name, batch_number) entries, one block each"""
+    return [{
+        "event": "CropRegistered", "contract": contract, "crop_id": crop_id, "block_number": block,
+        "log_index": 0, "timestamp": 1_700_000_000, "transaction_hash": "0x" + "00" * 32, "farmer": FARMER,
+        "crop": Crop(crop_id, name, 10, 25, batch_number, 0, 0, None, None, "", FARMER, True, 1_700_000_000),
+    } for block, (crop_id, name, batch_number) in enumerate(crops, start=first_block)]
+
+
+def register(store: CropStore, crops, contract: str = ENHANCED):
+    events = registrations(crops, contract, store.last_block() + 1)
+    store.apply_events(events, events[-1]["block_number"], "0x" + "00" * 32)
+
+
+def keys(page):
+    return [(contract, crop.id) for contract, _, crop in page]
+
+
+@pytest.fixture
+def store():
+    store = CropStore()
+    register(store, [
+        (1, "Tomato", "B-1"),
+        (2, "Cherry Tomatoes", "B-2"),
+        (3, "Potato", "B-3"),
+        (4, "Tomato", "B-4"),
+        (5, "Tomato", "B-1"),
+    ])
+    register(store, [(1, "Tomato", ""), (2, "Onion", "")], contract=LEGACY)
+    return store
+
+
+def test_exact_name_ranks_above_prefix_matches(store):
+    total, page = store.search("tomato", 10)
+    assert total == 5
+    # Exact name first, newest crop first within it; then the word prefix match
+    assert keys(page) == [(LEGACY, 1), (ENHANCED, 5), (ENHANCED, 4), (ENHANCED, 1), (ENHANCED, 2)]
+    assert page[0][1] > page[-1][1]
+
+
+def test_prefix_query_matches_word_starts(store):
+    total, page = store.search("tom", 10)
+    assert total == 5
+    assert {crop.name for _, _, crop in page} == {"Tomato", "Cherry Tomatoes"}
+    # Queries too short for trigrams only match word starts
+    assert store.search("ma", 10) == (0, [])
+
+
+def test_misspelt_query_falls_back_to_trigrams(store):
+    total, page = store.search("tomatto", 10)
+    assert total == 5
+    assert {crop.name for _, _, crop in page} == {"Tomato", "Cherry Tomatoes"}
+    assert store.search("tomatto", 10, min_similarity=0.9) == (0, [])
+
+
+def test_batch_number_matches_come_first(store):
+    total, page = store.search("b-1", 10)
+    assert total == 2
+    assert keys(page) == [(ENHANCED, 5), (ENHANCED, 1)]
+    assert all(score >= BATCH_SCORE for _, score, _ in page)
+
+
+def test_batch_matching_a_name_is_not_listed_twice():
+    store = CropStore()
+    register(store, [(1, "Tomato", "tomato"), (2, "Tomato", ""), (3, "Tomato", "tomato")])
+    total, page = store.search("Tomato", 10)
+    assert total == 3
+    assert keys(page) == [(ENHANCED, 3), (ENHANCED, 1), (ENHANCED, 2)]
+    assert store.search("Tomato", 1, offset=2)[1] == page[2:]
+
+
+def test_pages_concatenate_to_the_full_ranking(store):
+    total, everything = store.search("tomato", 10)
+    pages = []
+    for offset in range(0, total, 2):
+        page_total, page = store.search("tomato", 2, offset)
+        assert page_total == total
+        pages.extend(page)
+    assert pages == everything
+
+
+def test_new_crops_do_not_shift_an_older_name_tier(store):
+    before = store.search("cherry", 10)[1]
+    register(store, [(6, "Tomato", "")])
+    assert store.search("cherry", 10)[1] == before
+
+
+def test_contract_filter(store):
+    total, page = store.search("tomato", 10, contract=LEGACY)
+    assert (total, keys(page)) == (1, [(LEGACY, 1)])
+    assert store.search("onion", 10, contract=ENHANCED) == (0, [])
+
+
+@pytest.mark.parametrize("query", ["", " ", "\t\n"])
+def test_blank_queries_match_nothing(store, query):
+    # Legacy crops have an empty batch number, which a blank query must not match
+    assert store.search(query, 10) == (0, [])
+
+
+def test_batch_exclusions_are_not_bound_parameters():
+    store = CropStore()
+    # Far more batch matches than one SQL statement can list one by one
+    crops = [(i, "Rice", "rice" if i % 3 else "") for i in range(1, 30_001)]
+    store.apply_events(registrations(crops), len(crops), "0x" + "00" * 32)
+    total, page = store.search("rice", 5, offset=20_000)
+    assert total == 30_000
+    # The 20000 batch matches come first, then the plain name matches newest first
+    assert [crop.id for _, _, crop in page] == [30_000, 29_997, 29_994, 29_991, 29_988]
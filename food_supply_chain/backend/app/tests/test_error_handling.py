@@ -0,0 +1,118 @@
+from fastapi import HTTPException
+
+from app.utils.error_handling import ErrorAggregator, RateLimiter
+
+
+def test_allows_up_to_limit_then_denies():
+    limiter = RateLimiter(default_limit=3, default_window=60)
+    results = [limiter.check("client", now=0.0) for _ in range(4)]
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results[:3]] == [2, 1, 0]
+    assert results[3].retry_after == 60.0
+
+
+def test_previous_window_is_weighted_by_overlap():
+    limiter = RateLimiter(default_limit=10, default_window=60)
+    for _ in range(10):
+        assert limiter.check("client", now=1.0).allowed
+    # At the start of the next window the whole previous window still overlaps
+    denied = limiter.check("client", now=60.0)
+    assert not denied.allowed
+    assert 0 < denied.retry_after <= 60
+    # Half-way through only half of it does: 5 more fit
+    allowed = [limiter.check("client", now=90.0).allowed for _ in range(6)]
+    assert allowed == [True] * 5 + [False]
+
+
+def test_windows_older_than_one_window_are_forgotten():
+    limiter = RateLimiter(default_limit=2, default_window=60)
+    limiter.check("client", now=0.0)
+    limiter.check("client", now=0.0)
+    assert not limiter.check("client", now=10.0).allowed
+    assert limiter.check("client", now=130.0).allowed
+    assert limiter.check("client", now=130.0).remaining == 0
+
+
+def test_check_without_consuming():
+    limiter = RateLimiter(default_limit=2, default_window=60)
+    for _ in range(5):
+        assert limiter.check("client", now=0.0, consume=False).remaining == 2
+    assert limiter.check("client", now=0.0).remaining == 1
+
+
+def test_keys_are_limited_separately():
+    limiter = RateLimiter(default_limit=1, default_window=60)
+    assert limiter.check("a", now=0.0).allowed
+    assert not limiter.check("a", now=0.0).allowed
+    assert limiter.check("b", now=0.0).allowed
+
+
+def test_least_recently_seen_key_is_evicted():
+    limiter = RateLimiter(default_limit=1, default_window=60, max_keys=2)
+    limiter.check("a", now=0.0)
+    limiter.check("b", now=0.0)
+    limiter.check("a", now=1.0)  # a is now the most recently seen
+    limiter.check("c", now=2.0)
+    assert list(limiter.requests) == ["a", "c"]
+    # An evicted key starts over
+    assert limiter.check("b", now=3.0).allowed
+
+
+def _raise(message: str):
+    raise ValueError(message)
+
+
+def _raise_elsewhere(message: str):
+    raise ValueError(message)
+
+
+def _caught(function, *args) -> Exception:
+    try:
+        function(*args)
+    except Exception as e:
+        return e
+
+
+def test_fingerprint_ignores_the_message():
+    first = ErrorAggregator.fingerprint(_caught(_raise, "tx 0xaaa failed"))
+    second = ErrorAggregator.fingerprint(_caught(_raise, "tx 0xbbb failed"))
+    assert first == second
+    assert first.startswith("ValueError:")
+
+
+def test_fingerprint_depends_on_where_the_error_was_raised():
+    assert (ErrorAggregator.fingerprint(_caught(_raise, "x"))
+            != ErrorAggregator.fingerprint(_caught(_raise_elsewhere, "x")))
+
+
+def test_fingerprint_includes_http_status():
+    def fail(status):
+        raise HTTPException(status_code=status, detail="nope")
+
+    assert (ErrorAggregator.fingerprint(_caught(fail, 400))
+            != ErrorAggregator.fingerprint(_caught(fail, 404)))
+
+
+def test_samples_tracebacks_and_alerts_once_per_window():
+    aggregator = ErrorAggregator(window=60, threshold=3, traceback_samples=1)
+    outcomes = [aggregator.record(_caught(_raise, f"error {i}"), now=float(i)) for i in range(5)]
+    assert [should_log for _, should_log, _ in outcomes] == [True, False, False, False, False]
+    assert [crossed for _, _, crossed in outcomes] == [False, False, True, False, False]
+    stats = outcomes[-1][0]
+    assert stats.total == 5
+    assert stats.last_message == "error 4"
+
+    # A new window logs again and reports what the last one suppressed
+    stats, should_log, crossed = aggregator.record(_caught(_raise, "later"), now=100.0)
+    assert should_log and not crossed
+    assert stats.suppressed == 4
+    assert stats.window_count == 1
+    assert stats.total == 6
+
+
+def test_fingerprints_are_bounded():
+    aggregator = ErrorAggregator(max_fingerprints=1)
+    aggregator.record(_caught(_raise, "x"), now=0.0)
+    aggregator.record(_caught(_raise_elsewhere, "x"), now=1.0)
+    assert len(aggregator.entries) == 1
+    assert aggregator.summary()[0]["fingerprint"] == ErrorAggregator.fingerprint(_caught(_raise_elsewhere, "x"))
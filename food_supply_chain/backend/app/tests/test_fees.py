@@ -0,0 +1,99 @@
+import pytest
+from eth_abi import encode
+
+from app import fees
+from app.fees import GasEstimateCache
+
+OWNER = "0x" + "11" * 20
+CID = "QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG"
+
+
+class TransferCall:
+    """transferCrop as the cache sees it: a selector plus ABI-encoded arguments"""
+    fn_name = "transferCrop"
+
+    def __init__(self, note: str, ipfs_data_hash: str = CID, selector: str = "0x12345678"):
+        self.selector = selector
+        self.args = encode(["uint256", "address", "string", "string"], [1, OWNER, note, ipfs_data_hash])
+
+    def _encode_transaction_data(self) -> str:
+        return self.selector + self.args.hex()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def estimates(monkeypatch):
+    """Gas estimates handed out in order; each call to estimate_gas is recorded"""
+    calls = []
+    results = iter(range(100_000, 10_000_000, 1_000))
+
+    def estimate_gas(contract_function, transaction):
+        calls.append(contract_function)
+        return next(results)
+
+    monkeypatch.setattr(fees, "estimate_gas", estimate_gas)
+    return calls
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(fees.time, "monotonic", clock)
+    return clock
+
+
+def test_calls_of_the_same_word_count_share_an_entry(estimates):
+    cache = GasEstimateCache(headroom=1.0)
+    assert cache.gas_limit(TransferCall("a"), {}) == 100_000
+    assert cache.gas_limit(TransferCall("a" * 32), {}) == 100_000
+    assert len(estimates) == 1
+
+
+def test_longer_arguments_are_estimated_again(estimates):
+    cache = GasEstimateCache(headroom=1.0)
+    short, long = TransferCall(""), TransferCall("n" * 200)
+    # 260 vs 484 bytes of calldata: the same power-of-two size, 7 more words
+    assert (len(short.args) + 4).bit_length() == (len(long.args) + 4).bit_length()
+    assert cache.key(long)[1] - cache.key(short)[1] == 7
+    assert cache.gas_limit(short, {}) == 100_000
+    assert cache.gas_limit(long, {}) == 101_000
+    assert len(estimates) == 2
+
+
+def test_functions_do_not_share_entries(estimates):
+    cache = GasEstimateCache(headroom=1.0)
+    cache.gas_limit(TransferCall("a"), {})
+    assert cache.gas_limit(TransferCall("a", selector="0x87654321"), {}) == 101_000
+
+
+def test_headroom_is_applied_to_the_estimate(estimates):
+    assert GasEstimateCache(headroom=1.25).gas_limit(TransferCall("a"), {}) == 125_000
+
+
+def test_entries_expire_and_can_be_invalidated(estimates, clock):
+    cache = GasEstimateCache(ttl=10, headroom=1.0)
+    cache.gas_limit(TransferCall("a"), {})
+    clock.now += 11
+    assert cache.gas_limit(TransferCall("a"), {}) == 101_000
+    assert len(estimates) == 2
+
+    cache.invalidate(TransferCall("a"))
+    assert cache.gas_limit(TransferCall("a"), {}) == 102_000
+    assert len(estimates) == 3
+
+
+def test_oldest_entry_is_evicted_when_full(estimates):
+    cache = GasEstimateCache(headroom=1.0, max_entries=2)
+    for note in ("", "n" * 32, "n" * 64):
+        cache.gas_limit(TransferCall(note), {})
+    cache.gas_limit(TransferCall("n" * 64), {})
+    assert len(estimates) == 3
+    cache.gas_limit(TransferCall(""), {})
+    assert len(estimates) == 4
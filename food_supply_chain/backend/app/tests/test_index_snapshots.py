@@ -0,0 +1,173 @@
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+import pytest
+from hexbytes import HexBytes
+
+from app import indexer as indexer_module
+from app.crop_codec import ENHANCED, Crop
+from app.crop_store import CropStore
+from app.index_snapshots import SnapshotStore, normalize_hash
+from app.indexer import ContractIndexer
+
+FARMER = "0x" + "11" * 20
+CONTRACT = "0x" + "22" * 20
+
+
+def block_hash(block_number: int, fork: str = "a") -> str:
+    return "0x" + (fork * 2 + f"{block_number:062x}")[:64]
+
+
+def sync_to(store: CropStore, last_block: int, fork: str = "a") -> CropStore:
+    """Index one crop per block up to last_block, as if synced from the given fork"""
+    store.set_sources(f"{ENHANCED}:{CONTRACT}")
+    for n in range(max(store.last_block() + 1, 1), last_block + 1):
+        crop = Crop(n, f"Tomato {n}", 10, 25, f"B-{n}", 0, 0, None, None, "", FARMER, True, 1_700_000_000)
+        store.apply_events([{
+            "event": "CropRegistered", "contract": ENHANCED, "crop_id": n, "block_number": n, "log_index": 0,
+            "timestamp": 1_700_000_000, "transaction_hash": "0x" + "00" * 32, "farmer": FARMER, "crop": crop,
+        }], n, block_hash(n, fork))
+    return store
+
+
+def set_schema_version(path: str, version: str):
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE sync_state SET value = ? WHERE key = 'schema_version'", (version,))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def snapshots(tmp_path):
+    return SnapshotStore(str(tmp_path / "snapshots"), keep=3)
+
+
+class FakeChain:
+    """The parts of web3.eth the indexer reads, for a chain without crop events"""
+
+    def __init__(self, head: int = 0, fork: str = "a"):
+        self.block_number = head
+        self.fork = fork
+
+    def get_block(self, block_number):
+        assert block_number <= self.block_number
+        return {"hash": HexBytes(block_hash(block_number, self.fork))}
+
+    def get_logs(self, params):
+        assert params["toBlock"] <= self.block_number
+        return []
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    chain = FakeChain()
+    gateway = SimpleNamespace(address=CONTRACT, contract=SimpleNamespace(address=CONTRACT), topics={}, events={},
+                              w3=SimpleNamespace(eth=chain))
+    monkeypatch.setattr(indexer_module, "get_gateway", lambda: gateway)
+    monkeypatch.setattr(indexer_module, "get_legacy_gateway", lambda: None)
+    return chain
+
+
+def test_save_names_snapshots_by_block_and_prunes(tmp_path):
+    snapshots = SnapshotStore(str(tmp_path), keep=2)
+    assert snapshots.save(CropStore()) is None
+    for n in (3, 5, 7):
+        saved = snapshots.save(sync_to(CropStore(), n))
+        assert (saved.block_number, saved.block_hash) == (n, block_hash(n)[2:])
+    assert [snapshot.block_number for snapshot in snapshots.list()] == [7, 5]
+
+
+def test_restore_latest_skips_snapshots_off_the_chain(snapshots):
+    for n in (3, 5):
+        snapshots.save(sync_to(CropStore(), n))
+    snapshots.save(sync_to(CropStore(), 7, fork="b"))
+    # Block 7 was reorged away and the node has not reached block 9 yet
+    chain = {n: block_hash(n) for n in range(1, 9)}
+
+    store = CropStore()
+    assert snapshots.restore_latest(store, chain.get).block_number == 5
+    assert (store.last_block(), store.last_block_hash()) == (5, block_hash(5))
+    assert store.crop_count() == 5
+    assert store.get_crop(5).batch_number == "B-5"
+
+
+def test_restore_latest_skips_unreadable_snapshots(snapshots):
+    snapshots.save(sync_to(CropStore(), 3))
+    set_schema_version(snapshots.save(sync_to(CropStore(), 5)).path, "0")
+
+    store = CropStore()
+    assert snapshots.restore_latest(store, block_hash).block_number == 3
+    assert store.crop_count() == 3
+
+
+def test_file_index_snapshots_without_taking_the_store_lock(tmp_path):
+    store = sync_to(CropStore(str(tmp_path / "index.sqlite")), 4)
+    path = str(tmp_path / "copy.sqlite")
+    done = threading.Event()
+    with store._lock:
+        # Held as by a long query or event batch on another thread
+        threading.Thread(target=lambda: (store.snapshot_to(path), done.set())).start()
+        assert done.wait(5)
+    restored = CropStore()
+    restored.restore_from(path)
+    assert (restored.last_block(), restored.crop_count()) == (4, 4)
+
+
+def test_restore_from_rejects_other_schema_versions(tmp_path):
+    path = str(tmp_path / "old.sqlite")
+    sync_to(CropStore(), 2).snapshot_to(path)
+    set_schema_version(path, "0")
+
+    store = sync_to(CropStore(), 1)
+    with pytest.raises(ValueError):
+        store.restore_from(path)
+    assert store.last_block() == 1
+
+
+def test_reorg_rolls_back_to_the_newest_snapshot_on_the_chain(chain, snapshots):
+    snapshots.save(sync_to(CropStore(), 3))
+    store = sync_to(CropStore(), 5, fork="b")
+    chain.block_number = 8
+    ContractIndexer(store, snapshots=snapshots, snapshot_blocks=100).sync_once()
+    # Crops 4 and 5 were on the abandoned fork; sync resumed after the snapshot
+    assert store.crop_count() == 3
+    assert store.last_block() == 8
+    assert normalize_hash(store.last_block_hash()) == block_hash(8)[2:]
+
+
+def test_reorg_without_a_snapshot_starts_over(chain):
+    store = sync_to(CropStore(), 5, fork="b")
+    chain.block_number = 6
+    ContractIndexer(store).sync_once()
+    assert store.crop_count() == 0
+    assert store.last_block() == 6
+
+
+def test_lagging_node_is_not_a_reorg(chain):
+    store = sync_to(CropStore(), 5)
+    chain.block_number = 4
+    assert ContractIndexer(store).sync_once() == 0
+    assert store.last_block() == 5
+    assert store.crop_count() == 5
+
+
+def test_shrunk_chain_rolls_back_to_a_snapshot_on_it(chain, snapshots):
+    # The node was reset to an older state of the same chain
+    snapshots.save(sync_to(CropStore(), 3))
+    store = sync_to(CropStore(), 20)
+    chain.block_number = 4
+    ContractIndexer(store, snapshots=snapshots, snapshot_blocks=100, max_node_lag=5).sync_once()
+    assert store.crop_count() == 3
+    assert store.last_block() == 4
+
+
+def test_restarted_chain_starts_over(chain, snapshots):
+    # A dev chain restarted at the same contract address shares no blocks with the index
+    snapshots.save(sync_to(CropStore(), 3))
+    store = sync_to(CropStore(), 20)
+    chain.block_number, chain.fork = 2, "b"
+    ContractIndexer(store, snapshots=snapshots, max_node_lag=5).sync_once()
+    assert store.crop_count() == 0
+    assert store.last_block() == 2
+    assert normalize_hash(store.last_block_hash()) == block_hash(2, "b")[2:]
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from app import config, metrics
+from app.ipfs_service import IPFSService
+
+CID = "QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG"
+OTHER_CID = "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o"
+
+
+class FakeBackend:
+    """Uploads answer with cid after delay; pins are recorded"""
+
+    def __init__(self, cid=CID, delay: float = 0.0):
+        self.cid = cid
+        self.delay = delay
+        self.uploads = 0
+        self.pinned = []
+        self.pin_done = threading.Event()
+
+    def upload(self, file_bytes: bytes, file_name: str):
+        self.uploads += 1
+        time.sleep(self.delay)
+        return self.cid
+
+    def pin(self, ipfs_hash: str) -> bool:
+        self.pinned.append(ipfs_hash)
+        self.pin_done.set()
+        return True
+
+
+@pytest.fixture
+def backends():
+    return {"local": FakeBackend(), "pinata": FakeBackend()}
+
+
+@pytest.fixture
+def service(monkeypatch, backends):
+    monkeypatch.setattr(config, "IPFS_BACKENDS", ["local", "pinata"])
+    monkeypatch.setattr(config, "IPFS_HEDGE_SECONDS", 0.05)
+    service = IPFSService()
+    service._uploaders = {name: backend.upload for name, backend in backends.items()}
+    service._pinners = {name: backend.pin for name, backend in backends.items()}
+    yield service
+    service._get_executor().shutdown(wait=True)
+
+
+def upload(service: IPFSService):
+    return service._hedged("upload", lambda backend: (service._uploaders[backend], (b"data", "crop.jpg")))
+
+
+def test_a_prompt_answer_is_not_hedged(service, backends):
+    hedges = metrics.IPFS_HEDGES.value("upload")
+    assert upload(service)[:2] == (CID, "local")
+    assert backends["pinata"].uploads == 0
+    assert metrics.IPFS_HEDGES.value("upload") == hedges
+
+
+def test_a_slow_backend_is_hedged_and_left_in_flight(service, backends):
+    backends["local"].delay = 0.5
+    hedges = metrics.IPFS_HEDGES.value("upload")
+    result, winner, in_flight = upload(service)
+    assert (result, winner) == (CID, "pinata")
+    assert list(in_flight.values()) == ["local"]
+    assert metrics.IPFS_HEDGES.value("upload") == hedges + 1
+
+
+def test_a_failed_backend_moves_on_without_waiting(service, backends):
+    backends["local"].cid = None
+    service.hedge_after = 1.0
+    started = time.perf_counter()
+    result, winner, in_flight = upload(service)
+    assert (result, winner, in_flight) == (CID, "pinata", {})
+    assert time.perf_counter() - started < 0.5
+    assert service.health["local"][0].failures == 1
+
+
+def test_all_backends_failing_gives_no_result(service, backends):
+    for backend in backends.values():
+        backend.cid = None
+    assert upload(service) == (None, None, {})
+
+
+def test_untried_backends_get_a_pin(service, backends):
+    service._replicate_from(CID, "local", {})
+    assert backends["pinata"].pin_done.wait(1)
+    assert backends["pinata"].pinned == [CID]
+    assert backends["local"].pinned == []
+
+
+@pytest.mark.parametrize("cid, pinned", [(CID, []), (OTHER_CID, [CID]), (None, [CID])])
+def test_an_upload_in_flight_counts_as_the_copy_only_if_it_agrees(service, backends, cid, pinned):
+    backends["local"].cid, backends["local"].delay = cid, 0.2
+    result, winner, in_flight = upload(service)
+    assert (result, winner) == (CID, "pinata")
+    service._replicate_from(result, winner, in_flight)
+    for future in in_flight:
+        future.result()
+    backends["local"].pin_done.wait(0.5 if pinned else 0.1)
+    assert backends["local"].pinned == pinned
+
+
+@pytest.mark.parametrize("use_pinata, backends_config, gateway", [
+    (False, ["local"], "https://ipfs.io"),
+    (True, ["pinata"], "https://gateway.pinata.cloud"),
+    (False, ["pinata"], "https://gateway.pinata.cloud"),
+    (True, ["local", "pinata"], "https://gateway.pinata.cloud"),
+    (False, ["local", "pinata"], "https://ipfs.io"),
+    (True, ["local"], "https://ipfs.io"),
+])
+def test_file_urls_follow_the_preferred_backend(monkeypatch, use_pinata, backends_config, gateway):
+    monkeypatch.setattr(config, "USE_PINATA", use_pinata)
+    monkeypatch.setattr(config, "IPFS_BACKENDS", backends_config)
+    assert IPFSService().get_file_url(CID) == f"{gateway}/ipfs/{CID}"
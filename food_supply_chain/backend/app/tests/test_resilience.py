@@ -0,0 +1,78 @@
+import pytest
+
+from app.utils import resilience
+from app.utils.resilience import CircuitBreaker, RollingLatency
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=10)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.available()
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=10)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10)
+    breaker.record_failure()
+    clock[0] += 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.available()
+    assert breaker.allow()
+    # The probe is claimed: nobody else gets through until it reports back
+    assert not breaker.available()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_for_a_full_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=10)
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] += 15
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock[0] += 9
+    assert breaker.state == CircuitBreaker.OPEN
+    clock[0] += 1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_percentiles_cover_the_last_window_only():
+    latency = RollingLatency(window=10)
+    assert latency.percentile(0.5) is None
+    for value in range(100):
+        latency.observe(float(value))
+    assert len(latency.samples) == 10
+    assert latency.percentile(0.0) == 90.0
+    assert latency.percentile(0.9) == 99.0
+    assert latency.percentile(1.0) == 99.0
+
+
+def test_ewma_follows_recent_samples():
+    latency = RollingLatency(alpha=0.5)
+    latency.observe(1.0)
+    assert latency.ewma == 1.0
+    latency.observe(3.0)
+    assert latency.ewma == 2.0
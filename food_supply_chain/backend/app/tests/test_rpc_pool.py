@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from app.rpc_pool import RPC_HEDGES, MultiEndpointProvider, RPCNodeUnavailable
+from app.utils.resilience import CircuitBreaker
+
+
+class FakeNode:
+    """JSON-RPC over an in-memory chain of head + 1 blocks"""
+
+    def __init__(self, name: str, head: int = 100, delay: float = 0.0):
+        self.name = name
+        self.head = head
+        self.delay = delay
+        self.down = False
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def make_request(self, method, params):
+        with self._lock:
+            self.calls.append(method)
+        if self.delay:
+            time.sleep(self.delay)
+        if self.down:
+            raise ConnectionError(f"{self.name} refused the connection")
+        if method == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": 1, "result": hex(self.head)}
+        if method == "eth_getLogs":
+            to_block = int(params[0]["toBlock"], 16)
+            return {"jsonrpc": "2.0", "id": 1, "result": list(range(min(to_block, self.head) + 1))}
+        if method == "eth_call":
+            return {"jsonrpc": "2.0", "id": 1, "error": {"code": 3, "message": "execution reverted"}}
+        return {"jsonrpc": "2.0", "id": 1, "result": self.name}
+
+
+@pytest.fixture
+def pool():
+    provider = MultiEndpointProvider(["http://a", "http://b"], primary="http://b", hedge_min_delay=0.02,
+                                     failure_threshold=1, cooldown=60)
+    fast, slow = provider.nodes
+    fast.provider, slow.provider = FakeNode("a"), FakeNode("b")
+    # a has answered faster so far
+    fast.latency.observe(0.001)
+    slow.latency.observe(0.005)
+    return provider
+
+
+def served_by(provider: MultiEndpointProvider, method: str, params=()):
+    return provider.make_request(method, list(params))["result"]
+
+
+def test_reads_go_to_the_fastest_node(pool):
+    assert served_by(pool, "eth_chainId") == "a"
+    assert pool.nodes[1].provider.calls == []
+
+
+@pytest.mark.parametrize("method", ["eth_sendTransaction", "eth_estimateGas", "eth_accounts", "hardhat_mine"])
+def test_writes_and_account_calls_go_to_the_primary(pool, method):
+    assert served_by(pool, method) == "b"
+    assert pool.nodes[0].provider.calls == []
+
+
+def test_a_circuit_broken_primary_is_not_replaced(pool):
+    pool.nodes[1].breaker.record_failure()
+    with pytest.raises(RPCNodeUnavailable):
+        pool.make_request("eth_sendRawTransaction", ["0x00"])
+    assert served_by(pool, "eth_chainId") == "a"
+
+
+def test_slow_reads_are_hedged_to_the_next_node(pool):
+    pool.nodes[0].provider.delay = 0.5
+    hedges = RPC_HEDGES.value()
+    started = time.perf_counter()
+    assert served_by(pool, "eth_chainId") == "b"
+    assert time.perf_counter() - started < 0.4
+    assert RPC_HEDGES.value() == hedges + 1
+
+
+def test_failed_reads_move_on_and_open_the_circuit(pool):
+    pool.nodes[0].provider.down = True
+    assert served_by(pool, "eth_chainId") == "b"
+    assert pool.nodes[0].breaker.state == CircuitBreaker.OPEN
+    assert served_by(pool, "eth_chainId") == "b"
+    assert pool.nodes[0].provider.calls == ["eth_chainId"]
+
+
+def test_rpc_errors_are_answers_not_failures(pool):
+    response = pool.make_request("eth_call", [{"to": "0x00"}, "latest"])
+    assert response["error"]["message"] == "execution reverted"
+    assert pool.nodes[0].breaker.failures == 0
+    assert pool.nodes[1].provider.calls == []
+
+
+def test_block_reads_skip_nodes_behind_the_block(pool):
+    pool.nodes[0].provider.head = 98
+    # The logs up to block 100 come from b, not the truncated 0..98 on a
+    logs = served_by(pool, "eth_getLogs", [{"fromBlock": "0x0", "toBlock": hex(100)}])
+    assert logs == list(range(101))
+    assert pool.nodes[0].provider.calls == ["eth_blockNumber"]
+    assert served_by(pool, "eth_getBlockByNumber", [hex(99), False]) == "b"
+
+
+def test_known_heads_are_not_asked_again(pool):
+    assert served_by(pool, "eth_blockNumber") == hex(100)
+    assert served_by(pool, "eth_getLogs", [{"fromBlock": "0x0", "toBlock": hex(90)}]) == list(range(91))
+    assert served_by(pool, "eth_getBlockByNumber", ["latest", False]) == "a"
+    assert pool.nodes[0].provider.calls == ["eth_blockNumber", "eth_getLogs", "eth_getBlockByNumber"]
+
+
+def test_a_block_no_node_has_reached_is_unavailable(pool):
+    with pytest.raises(RPCNodeUnavailable, match="at block 101"):
+        pool.make_request("eth_getLogs", [{"fromBlock": "0x0", "toBlock": hex(101)}])
+
+
+@pytest.mark.parametrize("method, params, block", [
+    ("eth_getLogs", [{"fromBlock": "0x1", "toBlock": "0x10"}], 16),
+    ("eth_getLogs", [{"fromBlock": "0x1", "toBlock": "latest"}], None),
+    ("eth_getLogs", [{"blockHash": "0x" + "00" * 32}], None),
+    ("eth_getBlockByNumber", ["0x2a", False], 42),
+    ("eth_call", [{"to": "0x00"}, "0x7"], 7),
+    ("eth_call", [{"to": "0x00"}], None),
+    ("eth_getStorageAt", ["0x00", "0x0", "pending"], None),
+    ("eth_chainId", [], None),
+])
+def test_required_block(method, params, block):
+    assert MultiEndpointProvider.required_block(method, params) == block
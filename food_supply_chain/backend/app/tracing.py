@@ -0,0 +1,112 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTrace:
+    """Accumulated span durations for one request
+
+    Spans with the same name (e.g. several eth_calls) are summed.
+    """
+    __slots__ = ("started", "spans")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, List[float]] = {}  # name -> [seconds, count]
+
+    def add(self, name: str, seconds: float):
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        parts = [f"{name};dur={entry[0] * 1000:.1f}" for name, entry in self.spans.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str):
+    """Time a block as a named phase of the current request, if any"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
+
+
+class TracedJSONResponse(JSONResponse):
+    """JSONResponse that records its encoding time as the 'encode' span"""
+
+    def render(self, content) -> bytes:
+        with span("encode"):
+            return super().render(content)
+
+
+class TracingMiddleware:
+    """ASGI middleware exposing per-request spans
+
+    Adds a Server-Timing header with every recorded span and logs a
+    breakdown of requests slower than SLOW_REQUEST_SECONDS.
+    """
+
+    def __init__(self, app: ASGIApp, slow_request_seconds: float = None):
+        self.app = app
+        self.slow_request_seconds = (
+            config.SLOW_REQUEST_SECONDS if slow_request_seconds is None else slow_request_seconds
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_trace.reset(token)
+            elapsed = trace.elapsed()
+            if elapsed >= self.slow_request_seconds:
+                logger.warning(
+                    "Slow request %s %s took %.3fs: %s",
+                    scope["method"], scope["path"], elapsed,
+                    ", ".join(
+                        f"{name}={entry[0]:.3f}s" + (f" (x{entry[1]})" if entry[1] > 1 else "")
+                        for name, entry in trace.spans.items()
+                    ) or "no spans"
+                )
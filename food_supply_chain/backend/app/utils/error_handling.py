@@ -1,47 +1,206 @@
 import logging
-from typing import Dict, Any, Optional
+import queue
+import time
+import zlib
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
 from fastapi import HTTPException, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import traceback
 import sys
-from datetime import datetime
+
+from .. import config
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+STACK_SIGNATURE_DEPTH = 8
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller
+
+    Records are handed over unformatted (the listener thread formats them)
+    and dropped, not waited on, when the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class ErrorStats:
+    """Counters for one error fingerprint"""
+    __slots__ = (
+        "fingerprint", "error_type", "last_message", "first_seen", "last_seen",
+        "total", "window_start", "window_count", "window_sampled", "suppressed"
+    )
+
+    def __init__(self, fingerprint: str, error_type: str, now: float):
+        self.fingerprint = fingerprint
+        self.error_type = error_type
+        self.last_message = ""
+        self.first_seen = now
+        self.last_seen = now
+        self.total = 0
+        self.window_start = now
+        self.window_count = 0
+        self.window_sampled = 0
+        self.suppressed = 0  # occurrences not logged in the previous window
+
+
+class ErrorAggregator:
+    """Bounded, time-windowed error counters keyed by fingerprint
+
+    A fingerprint is the exception type plus a CRC of the innermost frames
+    of its traceback, so errors that only differ by message (tx hashes,
+    addresses) share one entry. At most max_fingerprints entries are kept,
+    least recently seen first out.
+    """
+
+    def __init__(self, max_fingerprints: int = 512, window: float = 60.0,
+                 threshold: int = 10, traceback_samples: int = 1):
+        self.entries: "OrderedDict[str, ErrorStats]" = OrderedDict()
+        self.max_fingerprints = max_fingerprints
+        self.window = window
+        self.threshold = threshold  # alert after this many errors per window
+        self.traceback_samples = traceback_samples  # logged occurrences per window
+
+    @staticmethod
+    def fingerprint(error: Exception) -> str:
+        frames = []
+        tb = error.__traceback__
+        while tb is not None:
+            code = tb.tb_frame.f_code
+            frames.append(f"{code.co_filename}:{code.co_name}:{tb.tb_lineno}")
+            tb = tb.tb_next
+        signature = "|".join(frames[-STACK_SIGNATURE_DEPTH:])
+        if isinstance(error, StarletteHTTPException):
+            signature = f"{error.status_code}|{signature}"
+        return f"{type(error).__name__}:{zlib.crc32(signature.encode()):08x}"
+
+    def record(self, error: Exception, now: float = None) -> Tuple[ErrorStats, bool, bool]:
+        """Count an error; returns (stats, should_log, threshold_crossed)"""
+        now = time.time() if now is None else now
+        key = self.fingerprint(error)
+        stats = self.entries.get(key)
+        if stats is None:
+            stats = ErrorStats(key, type(error).__name__, now)
+            self.entries[key] = stats
+            if len(self.entries) > self.max_fingerprints:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+
+        if now - stats.window_start >= self.window:
+            stats.suppressed = stats.window_count - stats.window_sampled
+            stats.window_start = now
+            stats.window_count = 0
+            stats.window_sampled = 0
+
+        stats.total += 1
+        stats.window_count += 1
+        stats.last_seen = now
+        stats.last_message = str(getattr(error, "detail", None) or error)[:200]
+
+        should_log = stats.window_sampled < self.traceback_samples
+        if should_log:
+            stats.window_sampled += 1
+        return stats, should_log, stats.window_count == self.threshold
+
+    def summary(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most frequent fingerprints in their current window"""
+        top = sorted(self.entries.values(), key=lambda s: s.window_count, reverse=True)[:limit]
+        return [
+            {
+                "fingerprint": s.fingerprint,
+                "error_type": s.error_type,
+                "last_message": s.last_message,
+                "total": s.total,
+                "window_count": s.window_count,
+                "first_seen": s.first_seen,
+                "last_seen": s.last_seen,
+            }
+            for s in top
+        ]
+
+
 class ErrorHandler:
     """Centralized error handling for the application"""
     
     def __init__(self):
-        self.error_counts = {}
-        self.error_threshold = 10  # Alert after 10 similar errors
-    
-    def log_error(self, error: Exception, context: Dict[str, Any] = None):
-        """Log error with context information"""
-        error_type = type(error).__name__
-        error_message = str(error)
-        
-        # Count error occurrences
-        error_key = f"{error_type}:{error_message}"
-        self.error_counts[error_key] = self.error_counts.get(error_key, 0) + 1
-        
-        # Log error details
-        log_data = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "error_type": error_type,
-            "error_message": error_message,
-            "context": context or {},
-            "count": self.error_counts[error_key],
-            "traceback": traceback.format_exc()
-        }
-        
-        logger.error(f"Error occurred: {log_data}")
-        
-        # Alert if error threshold exceeded
-        if self.error_counts[error_key] >= self.error_threshold:
-            logger.critical(f"Error threshold exceeded for {error_key}: {self.error_counts[error_key]} occurrences")
+        self.aggregator = ErrorAggregator(
+            max_fingerprints=config.ERROR_MAX_FINGERPRINTS,
+            window=config.ERROR_WINDOW_SECONDS,
+            threshold=config.ERROR_ALERT_THRESHOLD,
+            traceback_samples=config.ERROR_TRACEBACK_SAMPLES,
+        )
+        self._queue_handler: Optional[DroppingQueueHandler] = None
+        self._queue_listener: Optional[QueueListener] = None
+
+    def start_log_queue(self, queue_size: int = None):
+        """Route this module's log records through a background thread"""
+        if self._queue_listener is not None:
+            return
+        handlers = list(logging.getLogger().handlers)
+        if not handlers:
+            handlers = [logging.StreamHandler()]
+            handlers[0].setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        log_queue = queue.Queue(maxsize=queue_size or config.ERROR_LOG_QUEUE_SIZE)
+        self._queue_handler = DroppingQueueHandler(log_queue)
+        self._queue_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        logger.addHandler(self._queue_handler)
+        logger.propagate = False
+        self._queue_listener.start()
+
+    def stop_log_queue(self):
+        """Flush queued records and restore direct logging"""
+        if self._queue_listener is None:
+            return
+        self._queue_listener.stop()
+        logger.removeHandler(self._queue_handler)
+        logger.propagate = True
+        self._queue_listener = None
+        self._queue_handler = None
+
+    def log_error(self, error: Exception, context: Dict[str, Any] = None,
+                  level: int = logging.ERROR, include_traceback: bool = True):
+        """Log error with context information
+
+        Only the first occurrences of a fingerprint in each window are
+        written (with a traceback when include_traceback is set); the rest
+        are just counted and reported as suppressed on the next sample.
+        """
+        stats, should_log, threshold_crossed = self.aggregator.record(error)
+
+        if should_log and logger.isEnabledFor(level):
+            tb = ""
+            if include_traceback:
+                tb = "\n" + "".join(traceback.format_exception(type(error), error, error.__traceback__))
+            logger.log(
+                level, "Error %s (%s): %s context=%s total=%d suppressed_last_window=%d%s",
+                stats.fingerprint, stats.error_type, stats.last_message,
+                context or {}, stats.total, stats.suppressed, tb
+            )
+
+        # Alert once per window when the threshold is reached
+        if threshold_crossed:
+            logger.critical(
+                "Error threshold exceeded for %s (%s): %d occurrences in %ss",
+                stats.fingerprint, stats.error_type, stats.window_count, self.aggregator.window
+            )
     
     def handle_validation_error(self, error: RequestValidationError) -> JSONResponse:
         """Handle FastAPI validation errors"""
@@ -55,7 +214,8 @@ class ErrorHandler:
                 "type": err["type"]
             })
         
-        self.log_error(error, {"validation_errors": errors})
+        self.log_error(error, {"validation_errors": errors},
+                       level=logging.WARNING, include_traceback=False)
         
         return JSONResponse(
             status_code=422,
@@ -69,7 +229,13 @@ class ErrorHandler:
     
     def handle_http_exception(self, error: StarletteHTTPException) -> JSONResponse:
         """Handle HTTP exceptions"""
-        self.log_error(error, {"status_code": error.status_code})
+        # Client errors are expected traffic; only server errors get tracebacks
+        server_error = error.status_code >= 500
+        self.log_error(
+            error, {"status_code": error.status_code},
+            level=logging.ERROR if server_error else logging.WARNING,
+            include_traceback=server_error
+        )
         
         return JSONResponse(
             status_code=error.status_code,
@@ -293,49 +459,81 @@ class Sanitizer:
         return coords.strip()
 
 # Rate limiting utilities
+class RateLimitResult(NamedTuple):
+    """Outcome of a rate limiter check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float   # seconds until the current window rolls over
+    retry_after: float   # seconds until a denied request may succeed
+
+
 class RateLimiter:
-    """Simple rate limiting for API endpoints"""
-    
-    def __init__(self):
-        self.requests = {}
-        self.default_limit = 100  # requests per minute
-        self.default_window = 60  # seconds
-    
-    def is_allowed(self, key: str, limit: int = None, window: int = None) -> bool:
-        """Check if request is allowed"""
+    """Sliding-window-counter rate limiter for API endpoints
+
+    Each key only keeps the start of its current fixed window plus the
+    request counts of the current and previous window. The previous count is
+    weighted by how much of it still overlaps the sliding window, so checks
+    are O(1) per key. Keys are kept in LRU order and the least recently seen
+    ones are evicted once max_keys is reached.
+    """
+
+    def __init__(self, default_limit: int = 100, default_window: int = 60, max_keys: int = 10000):
+        # key -> [window_start, current_count, previous_count]
+        self.requests: "OrderedDict[str, list]" = OrderedDict()
+        self.default_limit = default_limit  # requests per window
+        self.default_window = default_window  # seconds
+        self.max_keys = max_keys
+
+    def _get_state(self, key: str, window: int, now: float) -> list:
+        window_start = now - (now % window)
+        state = self.requests.get(key)
+        if state is None:
+            state = [window_start, 0, 0]
+            self.requests[key] = state
+            if len(self.requests) > self.max_keys:
+                self.requests.popitem(last=False)
+        else:
+            self.requests.move_to_end(key)
+            if state[0] != window_start:
+                # Roll forward; anything older than one window no longer overlaps
+                state[2] = state[1] if window_start - state[0] == window else 0
+                state[1] = 0
+                state[0] = window_start
+        return state
+
+    def check(self, key: str, limit: int = None, window: int = None,
+              now: float = None, consume: bool = True) -> RateLimitResult:
+        """Check a request against the limit, counting it if allowed"""
         limit = limit or self.default_limit
         window = window or self.default_window
-        
-        now = datetime.utcnow().timestamp()
-        
-        if key not in self.requests:
-            self.requests[key] = []
-        
-        # Remove old requests
-        self.requests[key] = [req_time for req_time in self.requests[key] if now - req_time < window]
-        
-        # Check if under limit
-        if len(self.requests[key]) >= limit:
-            return False
-        
-        # Add current request
-        self.requests[key].append(now)
-        return True
-    
+        now = time.monotonic() if now is None else now
+
+        state = self._get_state(key, window, now)
+        elapsed = now - state[0]
+        estimated = state[2] * (1 - elapsed / window) + state[1]
+        reset_after = window - elapsed
+
+        if estimated + 1 > limit:
+            if state[2] and state[1] + 1 <= limit:
+                # Wait until enough of the previous window has slid out
+                retry_after = window * (1 - (limit - 1 - state[1]) / state[2]) - elapsed
+            else:
+                retry_after = reset_after
+            return RateLimitResult(False, limit, 0, reset_after, max(retry_after, 0.0))
+
+        if consume:
+            state[1] += 1
+            estimated += 1
+        return RateLimitResult(True, limit, max(0, int(limit - estimated)), reset_after, 0.0)
+
+    def is_allowed(self, key: str, limit: int = None, window: int = None) -> bool:
+        """Check if request is allowed"""
+        return self.check(key, limit, window).allowed
+
     def get_remaining_requests(self, key: str, limit: int = None, window: int = None) -> int:
         """Get remaining requests for the time window"""
-        limit = limit or self.default_limit
-        window = window or self.default_window
-        
-        now = datetime.utcnow().timestamp()
-        
-        if key not in self.requests:
-            return limit
-        
-        # Remove old requests
-        self.requests[key] = [req_time for req_time in self.requests[key] if now - req_time < window]
-        
-        return max(0, limit - len(self.requests[key]))
+        return self.check(key, limit, window, consume=False).remaining
 
 # Global instances
 validator = Validator()
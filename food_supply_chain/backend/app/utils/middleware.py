@@ -0,0 +1,130 @@
+import math
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .error_handling import RateLimiter
+from .. import metrics
+
+# (methods, path prefix, route class); the first matching rule wins
+DEFAULT_ROUTE_RULES: Tuple[Tuple[Set[str], str, str], ...] = (
+    ({"POST"}, "/api/crops/history:batch", "read"),
+    ({"POST", "PUT", "PATCH", "DELETE"}, "/api/crops", "chain_write"),
+    ({"POST"}, "/api/upload", "upload"),
+    ({"POST", "PUT", "PATCH", "DELETE"}, "/", "write"),
+    ({"GET", "HEAD"}, "/", "read"),
+)
+
+EXEMPT_PATHS = ("/health", "/ready", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying per-route-class rate limits per client
+
+    Every response carries RateLimit-Limit / RateLimit-Remaining /
+    RateLimit-Reset headers; rejected requests get a 429 with Retry-After.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limits: Dict[str, Tuple[int, int]],
+        limiter: Optional[RateLimiter] = None,
+        rules: Iterable[Tuple[Set[str], str, str]] = DEFAULT_ROUTE_RULES,
+        exempt_paths: Iterable[str] = EXEMPT_PATHS,
+    ):
+        self.app = app
+        self.limits = limits
+        self.limiter = limiter or RateLimiter()
+        self.rules = tuple(rules)
+        self.exempt_paths = tuple(exempt_paths)
+
+    def classify(self, method: str, path: str) -> Optional[str]:
+        if path.startswith(self.exempt_paths):
+            return None
+        for methods, prefix, route_class in self.rules:
+            if method in methods and path.startswith(prefix):
+                return route_class if route_class in self.limits else None
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self.classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit, window = self.limits[route_class]
+        client = scope.get("client")
+        key = f"{route_class}:{client[0] if client else 'unknown'}"
+        result = self.limiter.check(key, limit, window)
+
+        rate_headers = {
+            "RateLimit-Limit": str(result.limit),
+            "RateLimit-Remaining": str(result.remaining),
+            "RateLimit-Reset": str(math.ceil(result.reset_after)),
+            "RateLimit-Policy": f"{limit};w={window}",
+        }
+
+        if not result.allowed:
+            rate_headers["Retry-After"] = str(math.ceil(result.retry_after))
+            response = JSONResponse(
+                status_code=429,
+                content={
+                    "success": False,
+                    "error": "Rate Limit Exceeded",
+                    "message": f"Too many {route_class} requests, retry later",
+                    "status_code": 429
+                },
+                headers=rate_headers,
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in rate_headers.items():
+                    headers.append(name, value)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template
+
+    The route template (e.g. /api/users/{address}) rather than the raw path
+    is used as label so that label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            metrics.HTTP_REQUEST_LATENCY.labels(
+                scope["method"], route.path if route is not None else "unmatched", status
+            ).observe(time.perf_counter() - started)
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import blockchain
+from . import config
+from .ipfs_service import ipfs_service
+from .routes import enhanced_crop_routes
+
+logger = logging.getLogger(__name__)
+
+
+def _connect_blockchain():
+    """Import web3, connect and, for eth_tester, deploy the contract"""
+    blockchain.get_web3()
+    if config.BLOCKCHAIN_PROVIDER == "eth_tester":
+        blockchain.deploy_in_process_contract()
+
+
+def _connect_ipfs():
+    if "local" in ipfs_service.backends and ipfs_service.connect() is None:
+        raise RuntimeError(f"IPFS node at {config.IPFS_URL} is unreachable")
+
+
+# name -> blocking callable; each runs in a worker thread alongside the others
+WARMUPS: List[Tuple[str, Callable[[], object]]] = [
+    ("user_profiles", enhanced_crop_routes.load_data),
+    ("contract_artifact", blockchain.load_artifact),
+    ("blockchain", _connect_blockchain),
+    ("ipfs", _connect_ipfs),
+]
+
+
+class StartupReport:
+    """Wall-clock timings of the import and startup phases"""
+
+    def __init__(self, import_seconds: Optional[float] = None):
+        self.import_seconds = import_seconds
+        self.warmups: Dict[str, dict] = {}
+        self.warmup_seconds: Optional[float] = None
+        self.total_seconds: Optional[float] = None
+        self._started = time.perf_counter()
+
+    def record(self, name: str, status: str, seconds: float, error: Optional[str] = None):
+        entry = {"status": status, "seconds": round(seconds, 4)}
+        if error:
+            entry["error"] = error
+        self.warmups[name] = entry
+
+    def finish(self):
+        self.total_seconds = time.perf_counter() - self._started
+
+    def to_dict(self) -> dict:
+        return {
+            "import_seconds": round(self.import_seconds, 4) if self.import_seconds is not None else None,
+            "warmup_seconds": round(self.warmup_seconds, 4) if self.warmup_seconds is not None else None,
+            "startup_seconds": round(self.total_seconds, 4) if self.total_seconds is not None else None,
+            "warmups": self.warmups,
+        }
+
+    def summary(self) -> str:
+        phases = ", ".join(f"{name}={entry['status']} {entry['seconds']:.3f}s" for name, entry in self.warmups.items())
+        return (
+            f"Startup in {self.total_seconds or 0:.3f}s "
+            f"(imports {self.import_seconds or 0:.3f}s, warmups {self.warmup_seconds or 0:.3f}s: {phases})"
+        )
+
+
+async def _run_warmup(report: StartupReport, name: str, func, timeout: float):
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(asyncio.to_thread(func), timeout)
+        report.record(name, "ok", time.perf_counter() - started)
+    except asyncio.TimeoutError:
+        # The worker thread keeps going; first use waits on the same lock
+        logger.warning(f"Warmup {name} still running after {timeout}s, continuing startup")
+        report.record(name, "timeout", time.perf_counter() - started)
+    except Exception as e:
+        logger.warning(f"Warmup {name} failed: {e}")
+        report.record(name, "error", time.perf_counter() - started, str(e))
+
+
+async def run_warmups(report: StartupReport, timeout: float = config.WARMUP_TIMEOUT_SECONDS):
+    """Run every warmup concurrently; failures and timeouts are reported, not raised"""
+    started = time.perf_counter()
+    await asyncio.gather(*(_run_warmup(report, name, func, timeout) for name, func in WARMUPS))
+    report.warmup_seconds = time.perf_counter() - started
@@ -1,14 +1,33 @@
 import asyncio
 import json
 import logging
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 from fastapi import WebSocket, WebSocketDisconnect
 from datetime import datetime
 
+from . import config
+from . import metrics
+
 logger = logging.getLogger(__name__)
 
+DROPPED_MESSAGES = metrics.Counter(
+    "websocket_dropped_messages_total", "Messages dropped because a client's send queue was full"
+)
+
+class ClientConnection:
+    """A websocket plus its outbound queue and writer task"""
+    __slots__ = ("websocket", "user_address", "user_role", "queue", "writer", "dropped")
+
+    def __init__(self, websocket: WebSocket, user_address: str, user_role: str, queue_size: int):
+        self.websocket = websocket
+        self.user_address = user_address
+        self.user_role = user_role
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.dropped = 0
+
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, queue_size: int = None):
         # Store active connections by user address
         self.active_connections: Dict[str, List[WebSocket]] = {}
         # Store connections by role for broadcasting
@@ -19,6 +38,10 @@ class ConnectionManager:
             'customer': set(),
             'admin': set()
         }
+        # Per-connection outbound queues; slow clients never stall a broadcast
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self.queue_size = queue_size or config.WS_SEND_QUEUE_SIZE
+        self.dropped_messages = 0
 
     async def connect(self, websocket: WebSocket, user_address: str, user_role: str = None):
         await websocket.accept()
@@ -28,8 +51,12 @@ class ConnectionManager:
         
         self.active_connections[user_address].append(websocket)
         
-        if user_role:
+        if user_role in self.connections_by_role:
             self.connections_by_role[user_role].add(websocket)
+
+        client = ClientConnection(websocket, user_address, user_role, self.queue_size)
+        client.writer = asyncio.create_task(self._write_loop(client))
+        self.clients[websocket] = client
         
         logger.info(f"User {user_address} connected with role {user_role}")
         
@@ -52,45 +79,57 @@ class ConnectionManager:
             if not self.active_connections[user_address]:
                 del self.active_connections[user_address]
         
-        if user_role:
+        if user_role in self.connections_by_role:
             self.connections_by_role[user_role].discard(websocket)
+
+        client = self.clients.pop(websocket, None)
+        if client and client.writer and client.writer is not asyncio.current_task():
+            client.writer.cancel()
         
         logger.info(f"User {user_address} disconnected")
 
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
+    async def _write_loop(self, client: ClientConnection):
         try:
-            await websocket.send_text(json.dumps(message))
+            while True:
+                text = await client.queue.get()
+                await client.websocket.send_text(text)
+        except asyncio.CancelledError:
+            pass
         except Exception as e:
-            logger.error(f"Error sending personal message: {e}")
+            logger.error(f"Error sending message to user {client.user_address}: {e}")
+            # Remove failed connection
+            self.disconnect(client.websocket, client.user_address, client.user_role)
+
+    def _enqueue(self, websocket: WebSocket, text: str):
+        client = self.clients.get(websocket)
+        if client is None:
+            return
+        try:
+            client.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            client.dropped += 1
+            self.dropped_messages += 1
+            DROPPED_MESSAGES.inc()
+
+    async def send_personal_message(self, message: dict, websocket: WebSocket):
+        self._enqueue(websocket, json.dumps(message))
 
     async def send_to_user(self, message: dict, user_address: str):
         if user_address in self.active_connections:
+            text = json.dumps(message)
             for connection in self.active_connections[user_address]:
-                try:
-                    await connection.send_text(json.dumps(message))
-                except Exception as e:
-                    logger.error(f"Error sending message to user {user_address}: {e}")
+                self._enqueue(connection, text)
 
     async def broadcast_to_role(self, message: dict, role: str):
         if role in self.connections_by_role:
-            for connection in self.connections_by_role[role].copy():
-                try:
-                    await connection.send_text(json.dumps(message))
-                except Exception as e:
-                    logger.error(f"Error broadcasting to role {role}: {e}")
-                    # Remove failed connection
-                    self.connections_by_role[role].discard(connection)
+            text = json.dumps(message)
+            for connection in self.connections_by_role[role]:
+                self._enqueue(connection, text)
 
     async def broadcast_to_all(self, message: dict):
-        for user_address, connections in self.active_connections.items():
-            for connection in connections.copy():
-                try:
-                    await connection.send_text(json.dumps(message))
-                except Exception as e:
-                    logger.error(f"Error broadcasting to all: {e}")
-                    # Remove failed connection
-                    if connection in connections:
-                        connections.remove(connection)
+        text = json.dumps(message)
+        for connection in self.clients:
+            self._enqueue(connection, text)
 
     def get_connection_count(self) -> int:
         total = 0
@@ -101,9 +140,30 @@ class ConnectionManager:
     def get_connections_by_role(self) -> Dict[str, int]:
         return {role: len(connections) for role, connections in self.connections_by_role.items()}
 
+    def get_queue_stats(self) -> Dict[str, int]:
+        depths = [client.queue.qsize() for client in self.clients.values()]
+        return {
+            "queued_messages": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "dropped_messages": self.dropped_messages
+        }
+
 # Global connection manager instance
 manager = ConnectionManager()
 
+metrics.Gauge(
+    "websocket_connections", "Open WebSocket connections by role", ["role"],
+    callback=lambda: {(role,): count for role, count in manager.get_connections_by_role().items()}
+)
+metrics.Gauge(
+    "websocket_send_queue_depth", "Queued outbound WebSocket messages (total and deepest queue)",
+    ["stat"],
+    callback=lambda: {
+        ("total",): manager.get_queue_stats()["queued_messages"],
+        ("max",): manager.get_queue_stats()["max_queue_depth"],
+    }
+)
+
 class NotificationService:
     def __init__(self):
         self.manager = manager
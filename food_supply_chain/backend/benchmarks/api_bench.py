@@ -0,0 +1,228 @@
+"""
+End-to-end API benchmark against an in-process (or local) chain.
+
+Seeds EnhancedFoodSupplyChain with increasing numbers of crops (1k / 10k /
+100k by default), then drives the app in-process through httpx's ASGI
+transport and records throughput, tail latency and RSS per endpoint and
+dataset size. Results are machine readable; --baseline compares against a
+previously saved run and exits non-zero on regressions.
+
+By default the chain runs in-process (BLOCKCHAIN_PROVIDER=eth_tester) and
+the compiled contract is deployed on first use; --chain rpc uses the node
+and contract configured for the app (RPC_URL / CONTRACT_ADDRESS) instead.
+Run from the backend directory:
+    python -m benchmarks.api_bench --sizes 1000,10000 --output run.json
+    python -m benchmarks.api_bench --sizes 1000 --baseline run.json
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from .common import (
+    compare_results, environment_info, latency_summary, load_report,
+    read_peak_rss_bytes, read_rss_bytes, write_report
+)
+
+ENDPOINTS = ("crops", "crops_available", "upload", "users_register")
+HIGHER_IS_BETTER = ("requests_per_second",)
+SEED_CONFIRM_EVERY = 500
+BENCH_IMAGE_CID = "QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG"
+
+
+def log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def seed_crops(target: int):
+    """Register crops from the first node account until cropCount reaches target"""
+    from app.contract_gateway import get_gateway
+    from app.crop_codec import registration_args
+
+    gateway = get_gateway()
+    w3 = gateway.w3
+    account = w3.eth.accounts[0]
+    current = gateway.crop_count()
+    if current >= target:
+        return current
+
+    farmer_role = gateway.call("FARMER_ROLE")
+    if not gateway.call("hasRole", farmer_role, account):
+        w3.eth.wait_for_transaction_receipt(
+            gateway.function("grantFarmerRole", account).transact({"from": account})
+        )
+
+    now = int(time.time())
+
+    def register(i: int):
+        lat = -60 + (i * 7919 % 120000) / 1000
+        lng = -170 + (i * 104729 % 340000) / 1000
+        return gateway.function("registerCrop", *registration_args(
+            f"Bench Crop {i}", 100 + i % 900, 10 ** 15 + i, f"BENCH-{i:07d}",
+            now, now + 7 * 24 * 3600, BENCH_IMAGE_CID, "", f"{lat:.4f},{lng:.4f}"
+        ))
+
+    gas = int(register(current + 1).estimate_gas({"from": account}) * 1.3)
+    log(f"Seeding crops {current + 1}..{target}")
+    started = time.perf_counter()
+    tx = None
+    for i in range(current + 1, target + 1):
+        tx = register(i).transact({"from": account, "gas": gas})
+        if i % SEED_CONFIRM_EVERY == 0:
+            w3.eth.wait_for_transaction_receipt(tx, timeout=600)
+            log(f"  {i}/{target} crops ({i - current} in {time.perf_counter() - started:.1f}s)")
+    if tx is not None:
+        w3.eth.wait_for_transaction_receipt(tx, timeout=600)
+    return gateway.crop_count()
+
+
+async def drive(client, make_request: Callable[[object, int], Awaitable], requests: int,
+                concurrency: int) -> Dict[str, float]:
+    """Issue requests from concurrent workers and summarize the results"""
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while (i := next(counter)) < requests:
+            started = time.perf_counter()
+            try:
+                response = await make_request(client, i)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    summary = latency_summary(latencies)
+    summary.update({
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "rss_bytes": read_rss_bytes(),
+    })
+    return summary
+
+
+def make_requests(run_id: str) -> Dict[str, Callable[[object, int], Awaitable]]:
+    image = b"\x89PNG\r\n\x1a\n" + os.urandom(4096)
+
+    async def crops(client, i):
+        return await client.get("/api/crops")
+
+    async def crops_available(client, i):
+        return await client.get("/api/crops/available")
+
+    async def upload(client, i):
+        return await client.post("/api/upload", files={"file": (f"bench-{i}.png", image, "image/png")})
+
+    async def users_register(client, i):
+        return await client.post("/api/users/register", json={
+            "address": "0x" + f"{run_id}{i:x}".rjust(40, "0")[-40:],
+            "name": f"Bench User {i}",
+            "email": f"bench{i}@example.com",
+            "role": ("farmer", "distributor", "retailer", "customer")[i % 4],
+        })
+
+    return {
+        "crops": crops,
+        "crops_available": crops_available,
+        "upload": upload,
+        "users_register": users_register,
+    }
+
+
+async def run_benchmark(args) -> dict:
+    import httpx
+    from app.main import app
+
+    requests_by_name = make_requests(f"{int(time.time()) & 0xffffffff:08x}")
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in args.sizes:
+            seeded = seed_crops(size)
+            for name in args.endpoints:
+                # Warm caches and code paths before measuring
+                await drive(client, requests_by_name[name], min(args.warmup, args.requests), 1)
+                log(f"Measuring {name} with {seeded} crops")
+                metrics = await drive(client, requests_by_name[name], args.requests, args.concurrency)
+                results.append({"key": f"{name}@{size}", "endpoint": name, "crops": seeded, "metrics": metrics})
+
+    return {
+        "benchmark": "api_bench",
+        "environment": environment_info(),
+        "config": {
+            "sizes": args.sizes,
+            "endpoints": args.endpoints,
+            "chain": args.chain,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+        "rss": {"final_bytes": read_rss_bytes(), "peak_bytes": read_peak_rss_bytes()},
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end API benchmark")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        type=lambda v: sorted(int(x) for x in v.split(",")),
+                        help="comma separated crop counts to seed and measure at")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        type=lambda v: [x for x in v.split(",") if x],
+                        help=f"subset of {', '.join(ENDPOINTS)}")
+    parser.add_argument("--chain", choices=["inprocess", "rpc"], default="inprocess",
+                        help="in-process py-evm chain or the node at RPC_URL")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and size")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--baseline", help="compare against a previously saved report")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed relative slowdown before a metric counts as a regression")
+    args = parser.parse_args(argv)
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, backend_dir)
+    # Every request comes from one client, and user registrations must not
+    # land in the real user_profiles.json
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    if args.chain == "inprocess":
+        os.environ["BLOCKCHAIN_PROVIDER"] = "eth_tester"
+    os.chdir(tempfile.mkdtemp(prefix="api-bench-"))
+
+    report = asyncio.run(run_benchmark(args))
+    exit_code = 0
+    if args.baseline:
+        comparisons = compare_results(
+            report["results"], load_report(args.baseline)["results"], args.tolerance, HIGHER_IS_BETTER
+        )
+        report["comparison"] = {
+            "baseline": args.baseline,
+            "tolerance": args.tolerance,
+            "metrics": comparisons,
+            "regressions": sum(c["regression"] for c in comparisons),
+        }
+        exit_code = 1 if report["comparison"]["regressions"] else 0
+    write_report(report, args.output)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
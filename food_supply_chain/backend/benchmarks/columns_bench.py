@@ -0,0 +1,138 @@
+"""
+Columnar crop query latency and memory at index sizes SQLite struggles with.
+
+Loads generated crops straight into CropColumns (as CropStore does from
+its crops table) and times range filters, sorts and aggregates of the
+kind GET /api/crops/query serves, plus incremental registrations:
+
+    python -m benchmarks.columns_bench
+    python -m benchmarks.columns_bench --crops 5000000 --output columns.json --baseline old.json
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+from .common import compare_results, environment_info, latency_summary, load_report, write_report
+
+NAMES = ["tomato", "organic tomato", "basmati rice", "wheat", "sweet corn", "potato", "mango", "banana"]
+DAY = 86400
+START = 1_700_000_000
+
+# name -> CropColumns.query keyword arguments
+QUERIES = {
+    "latest": {},
+    "price_range": {"sort": "price", "descending": False, "ranges": {"price": (1000, 2000)}},
+    "harvest_window": {"sort": "harvest_date", "ranges": {"harvest_date": (START, START + 30 * DAY)}},
+    "expiring_available": {"sort": "expiry_date", "descending": False, "available": True,
+                           "ranges": {"expiry_date": (START + 200 * DAY, START + 210 * DAY)}},
+    "name_and_quantity": {"sort": "quantity", "name_key": "organic tomato", "ranges": {"quantity": (500, None)}},
+}
+
+
+def log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def rows(crops: int, seed: int):
+    from app.crop_codec import ENHANCED, LEGACY
+
+    rng = random.Random(seed)
+    owners = ["0x%040x" % i for i in range(1, 5001)]
+    for i in range(1, crops + 1):
+        harvest = START + rng.randrange(365) * DAY
+        yield (LEGACY if i % 10 == 0 else ENHANCED, i, rng.randrange(10, 10000), rng.randrange(1, 1000),
+               harvest, harvest + rng.randrange(5, 60) * DAY, START + i, rng.random() < 0.8,
+               rng.choice(owners), rng.choice(NAMES))
+
+
+def registration(crop_id: int) -> dict:
+    from app.crop_codec import ENHANCED, Crop
+
+    crop = Crop(crop_id, "Wheat", 10, 100, f"B{crop_id}", START, START + DAY, None, None, "", "0x" + "11" * 20,
+                True, START + crop_id)
+    return {"event": "CropRegistered", "contract": ENHANCED, "crop_id": crop_id, "crop": crop}
+
+
+def run(args) -> dict:
+    from app.crop_columns import CropColumns
+
+    started = time.perf_counter()
+    columns = CropColumns.from_rows(list(rows(args.crops, args.seed)))
+    load_seconds = time.perf_counter() - started
+    bytes_per_crop = columns.nbytes() / columns.size
+    log(f"Loaded {args.crops} crops in {load_seconds:.2f}s, {bytes_per_crop:.1f} bytes per crop")
+
+    results = []
+    for key, kwargs in QUERIES.items():
+        samples: List[float] = []
+        matches = 0
+        for i in range(args.warmup + args.queries):
+            started = time.perf_counter()
+            result = columns.query(args.limit, (i % 5) * args.limit, **kwargs)
+            elapsed = time.perf_counter() - started
+            if i >= args.warmup:
+                samples.append(elapsed)
+                matches += result.total
+        metrics: Dict[str, float] = latency_summary(samples)
+        metrics["mean_matches"] = round(matches / args.queries, 1)
+        log(f"{key}: p50 {metrics['p50_ms']}ms p99 {metrics['p99_ms']}ms")
+        results.append({"key": key, "metrics": metrics})
+
+    next_id = args.crops + 1
+    samples = []
+    for _ in range(args.queries):
+        events = [registration(next_id + i) for i in range(100)]
+        next_id += 100
+        started = time.perf_counter()
+        columns.apply(events)
+        samples.append(time.perf_counter() - started)
+    metrics = latency_summary(samples)
+    log(f"apply 100 registrations: p50 {metrics['p50_ms']}ms")
+    results.append({"key": "apply_100", "metrics": metrics})
+    return {
+        "benchmark": "columns_bench",
+        "environment": environment_info(),
+        "config": {"crops": args.crops, "queries": args.queries, "limit": args.limit},
+        "load_seconds": round(load_seconds, 3),
+        "bytes_per_crop": round(bytes_per_crop, 1),
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar crop query latency on a synthetic index")
+    parser.add_argument("--crops", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--baseline", help="compare against a previously saved report")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed relative slowdown before a metric counts as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    report = run(args)
+    exit_code = 0
+    if args.baseline:
+        comparisons = compare_results(report["results"], load_report(args.baseline)["results"], args.tolerance)
+        report["comparison"] = {
+            "baseline": args.baseline,
+            "metrics": comparisons,
+            "regressions": sum(c["regression"] for c in comparisons),
+        }
+        exit_code = 1 if report["comparison"]["regressions"] else 0
+    write_report(report, args.output)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
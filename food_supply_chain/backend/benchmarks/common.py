@@ -0,0 +1,115 @@
+import json
+import math
+import os
+import platform
+import resource
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """Summarize latencies given in seconds as milliseconds"""
+    ordered = sorted(samples)
+    count = len(ordered)
+    return {
+        "count": count,
+        "mean_ms": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p90_ms": round(percentile(ordered, 90) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+def _read_proc_status(pid: int, field: str) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def read_rss_bytes(pid: Optional[int] = None) -> Optional[int]:
+    """Current resident set size of a process (Linux only)"""
+    return _read_proc_status(pid or os.getpid(), "VmRSS")
+
+
+def read_peak_rss_bytes(pid: Optional[int] = None) -> Optional[int]:
+    """Peak resident set size of a process (Linux only)"""
+    return _read_proc_status(pid or os.getpid(), "VmHWM")
+
+
+def raise_fd_limit(wanted: int) -> int:
+    """Raise the soft open-file limit so thousands of sockets can be opened"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+    if target > soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        return target
+    return soft
+
+
+def environment_info() -> Dict[str, str]:
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": str(os.cpu_count()),
+    }
+
+
+def write_report(report: dict, output: Optional[str] = None):
+    """Print a report as JSON and optionally save it to a file"""
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+
+
+def load_report(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(current: List[dict], baseline: List[dict], tolerance: float,
+                    higher_is_better: Iterable[str] = ()) -> List[dict]:
+    """Compare result entries ({"key": ..., "metrics": {...}}) against a baseline
+
+    Metrics are lower-is-better unless named in higher_is_better. A change
+    worse than tolerance (a fraction, e.g. 0.1 for 10%) is flagged.
+    """
+    higher_is_better = set(higher_is_better)
+    baseline_by_key = {entry["key"]: entry["metrics"] for entry in baseline}
+    comparisons = []
+    for entry in current:
+        old_metrics = baseline_by_key.get(entry["key"])
+        if old_metrics is None:
+            continue
+        for metric, new in entry["metrics"].items():
+            old = old_metrics.get(metric)
+            if not isinstance(new, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (new - old) / old
+            worse = -change if metric in higher_is_better else change
+            comparisons.append({
+                "key": entry["key"],
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change_pct": round(change * 100, 2),
+                "regression": worse > tolerance,
+            })
+    return comparisons
@@ -0,0 +1,147 @@
+"""
+Gas and eth_call payload benchmark for the Crop storage layout.
+
+Deploys a compiled EnhancedFoodSupplyChain artifact to an in-process
+py-evm chain, registers crops and records registerCrop gas, the raw
+ABI-encoded size of getCrop / getAllCrops results and the time to decode
+them into API rows. Both the packed layout and the original all-uint256 /
+string layout are understood (detected from the artifact's ABI), so a
+baseline can be taken from an artifact compiled before the change:
+
+    python -m benchmarks.crop_layout_bench --artifact old.json --output unpacked.json
+    python -m benchmarks.crop_layout_bench --baseline unpacked.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+from .common import compare_results, environment_info, load_report, write_report
+
+IMAGE_CID = "QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG"
+CERT_CID = "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o"
+
+
+def log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def default_artifact() -> str:
+    from app.blockchain import ARTIFACT_PATH
+    return str(ARTIFACT_PATH)
+
+
+def deploy(artifact_path: str, gas_limit: int):
+    from eth_tester import EthereumTester, PyEVMBackend
+    from web3 import Web3
+
+    with open(artifact_path) as f:
+        artifact = json.load(f)
+    genesis = PyEVMBackend.generate_genesis_params(overrides={"gas_limit": gas_limit})
+    w3 = Web3(Web3.EthereumTesterProvider(EthereumTester(PyEVMBackend(genesis_parameters=genesis))))
+    account = w3.eth.accounts[0]
+    factory = w3.eth.contract(abi=artifact["abi"], bytecode=artifact["bytecode"])
+    receipt = w3.eth.wait_for_transaction_receipt(factory.constructor().transact({"from": account}))
+    contract = w3.eth.contract(address=receipt.contractAddress, abi=artifact["abi"])
+    w3.eth.wait_for_transaction_receipt(contract.functions.grantFarmerRole(account).transact({"from": account}))
+    return w3, contract, account
+
+
+def is_packed(contract) -> bool:
+    register = next(abi for abi in contract.abi if abi.get("name") == "registerCrop")
+    return "_farmCoords" not in {arg["name"] for arg in register["inputs"]}
+
+
+def make_args(packed: bool, i: int, now: int) -> tuple:
+    from app.crop_codec import registration_args
+
+    values = (
+        f"Layout Crop {i}", 100 + i % 900, 10 ** 15 + i, f"LAYOUT-{i:07d}", now, now + 7 * 24 * 3600,
+        IMAGE_CID, CERT_CID if i % 2 else "", f"{12 + i % 70 / 7:.4f},{77 + i % 90 / 9:.4f}",
+    )
+    return registration_args(*values) if packed else values
+
+
+def raw_call_size(w3, contract, fn_name: str, *args) -> int:
+    data = contract.encodeABI(fn_name=fn_name, args=list(args))
+    return len(w3.eth.call({"to": contract.address, "data": data}))
+
+
+def run(args) -> dict:
+    from app.crop_codec import Crop, unpack_crops
+    from app.serialization import crop_rows
+
+    w3, contract, account = deploy(args.artifact, args.gas_limit)
+    packed = is_packed(contract)
+    layout = "packed" if packed else "unpacked"
+    log(f"Registering {args.crops} crops with the {layout} layout")
+
+    now = int(time.time())
+    gas_used: List[int] = []
+    for i in range(1, args.crops + 1):
+        tx = contract.functions.registerCrop(*make_args(packed, i, now)).transact({"from": account, "gas": 2_000_000})
+        gas_used.append(w3.eth.wait_for_transaction_receipt(tx).gasUsed)
+
+    all_crops_bytes = raw_call_size(w3, contract, "getAllCrops")
+    rounds = max(1, args.decode_rounds)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        crops = contract.functions.getAllCrops().call()
+        # The unpacked struct is already in Crop field order
+        rows = crop_rows(unpack_crops(crops) if packed else [Crop._make(c) for c in crops])
+    decode_seconds = (time.perf_counter() - started) / rounds
+
+    metrics: Dict[str, float] = {
+        "register_gas_first": gas_used[0],
+        "register_gas_mean": round(sum(gas_used[1:] or gas_used) / len(gas_used[1:] or gas_used), 1),
+        "get_crop_bytes": raw_call_size(w3, contract, "getCrop", 1),
+        "get_all_crops_bytes": all_crops_bytes,
+        "get_all_crops_bytes_per_crop": round(all_crops_bytes / args.crops, 1),
+        "get_all_crops_call_and_decode_ms": round(decode_seconds * 1000, 3),
+    }
+    return {
+        "benchmark": "crop_layout_bench",
+        "environment": environment_info(),
+        "config": {"artifact": args.artifact, "crops": args.crops, "layout": layout},
+        "sample_row": rows[0],
+        # Keyed without the layout so packed and unpacked runs compare directly
+        "results": [{"key": f"crops@{args.crops}", "layout": layout, "metrics": metrics}],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Crop storage layout gas/payload benchmark")
+    parser.add_argument("--artifact", help="compiled contract JSON (defaults to the app's artifact)")
+    parser.add_argument("--crops", type=int, default=200)
+    parser.add_argument("--decode-rounds", type=int, default=5)
+    parser.add_argument("--gas-limit", type=int, default=300_000_000)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--baseline", help="compare against a previously saved report")
+    parser.add_argument("--tolerance", type=float, default=0.0,
+                        help="allowed relative increase before a metric counts as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    args.artifact = args.artifact or default_artifact()
+
+    report = run(args)
+    exit_code = 0
+    if args.baseline:
+        comparisons = compare_results(report["results"], load_report(args.baseline)["results"], args.tolerance)
+        report["comparison"] = {
+            "baseline": args.baseline,
+            "metrics": comparisons,
+            "regressions": sum(c["regression"] for c in comparisons),
+        }
+        exit_code = 1 if report["comparison"]["regressions"] else 0
+    write_report(report, args.output)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
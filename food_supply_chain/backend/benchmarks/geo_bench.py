@@ -0,0 +1,118 @@
+"""
+Nearby-crop query latency of the spatial index against a linear scan.
+
+Fills a GeoIndex with generated farms spread over India (as CropStore
+does from its crops table) and times radius and bounding-box queries
+around random distribution centers, next to a scan that parses and
+measures every crop's coordinates the way a query without the index would:
+
+    python -m benchmarks.geo_bench
+    python -m benchmarks.geo_bench --crops 1000000 --output geo.json --baseline old.json
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+from .common import compare_results, environment_info, latency_summary, load_report, write_report
+
+# Rough bounding box of India
+SOUTH, NORTH, WEST, EAST = 8.0, 32.0, 68.0, 90.0
+
+
+def log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def run(args) -> dict:
+    from app.crop_codec import ENHANCED
+    from app.crop_geo import GeoIndex, distance_km, parse
+
+    rng = random.Random(args.seed)
+    coords = [f"{rng.uniform(SOUTH, NORTH):.6f},{rng.uniform(WEST, EAST):.6f}" for _ in range(args.crops)]
+    started = time.perf_counter()
+    geo = GeoIndex()
+    for crop_id, farm_coords in enumerate(coords, 1):
+        geo.add(ENHANCED, crop_id, farm_coords)
+    build_seconds = time.perf_counter() - started
+    log(f"Indexed {args.crops} crops in {build_seconds:.2f}s ({len(geo.cells)} cells)")
+
+    def scan(lat, lng, radius_km):
+        matches = []
+        for farm_coords in coords:
+            position = parse(farm_coords)
+            if distance_km(lat, lng, *position) <= radius_km:
+                matches.append(position)
+        return matches
+
+    def box(lat, lng, radius_km):
+        half = radius_km / 111.0
+        return geo.within_box(lat - half, lng - half, lat + half, lng + half)
+
+    cases = [
+        ("radius_50km", lambda lat, lng: geo.within_radius(lat, lng, 50), args.queries),
+        ("radius_200km", lambda lat, lng: geo.within_radius(lat, lng, 200), args.queries),
+        ("box_100km", lambda lat, lng: box(lat, lng, 50), args.queries),
+        ("scan_50km", lambda lat, lng: scan(lat, lng, 50), args.scans),
+    ]
+    results = []
+    for key, query, count in cases:
+        samples: List[float] = []
+        matches = 0
+        for i in range(args.warmup + count):
+            lat, lng = rng.uniform(SOUTH, NORTH), rng.uniform(WEST, EAST)
+            started = time.perf_counter()
+            found = query(lat, lng)
+            elapsed = time.perf_counter() - started
+            if i >= args.warmup:
+                samples.append(elapsed)
+                matches += len(found)
+        metrics: Dict[str, float] = latency_summary(samples)
+        metrics["mean_matches"] = round(matches / count, 1)
+        log(f"{key}: p50 {metrics['p50_ms']}ms p99 {metrics['p99_ms']}ms")
+        results.append({"key": key, "metrics": metrics})
+    return {
+        "benchmark": "geo_bench",
+        "environment": environment_info(),
+        "config": {"crops": args.crops, "queries": args.queries, "scans": args.scans},
+        "build_seconds": round(build_seconds, 3),
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Nearby-crop query latency on a synthetic index")
+    parser.add_argument("--crops", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--scans", type=int, default=5, help="linear-scan queries for comparison")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--baseline", help="compare against a previously saved report")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed relative slowdown before a metric counts as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    report = run(args)
+    exit_code = 0
+    if args.baseline:
+        comparisons = compare_results(report["results"], load_report(args.baseline)["results"], args.tolerance)
+        report["comparison"] = {
+            "baseline": args.baseline,
+            "metrics": comparisons,
+            "regressions": sum(c["regression"] for c in comparisons),
+        }
+        exit_code = 1 if report["comparison"]["regressions"] else 0
+    write_report(report, args.output)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
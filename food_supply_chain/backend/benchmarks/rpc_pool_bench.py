@@ -0,0 +1,153 @@
+"""
+Read latency through the multi-node RPC provider against stand-in nodes.
+
+Starts local JSON-RPC stand-ins (each answers eth_blockNumber after a
+configurable delay, with occasional slow outliers or outright failures)
+and issues the same reads through a single-node HTTPProvider and through
+MultiEndpointProvider, reporting latency percentiles and errors:
+
+    python -m benchmarks.rpc_pool_bench
+    python -m benchmarks.rpc_pool_bench --output rpc.json --baseline old.json
+
+Stand-in profiles are "name:delay_ms:slow_ratio:fail_ratio"; the first
+is the primary and the node the single-node run uses.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from .common import compare_results, environment_info, latency_summary, load_report, write_report
+
+DEFAULT_NODES = ["flaky:20:0.05:0.0", "steady:30:0.0:0.0", "down:5:0.0:1.0"]
+SLOW_DELAY = 1.0
+
+
+def log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def start_stand_in(delay: float, slow_ratio: float, fail_ratio: float, seed: int) -> ThreadingHTTPServer:
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with lock:
+                roll = rng.random()
+            if roll < fail_ratio:
+                self.send_response(503)
+                self.end_headers()
+                return
+            time.sleep(SLOW_DELAY if roll < fail_ratio + slow_ratio else delay)
+            body = json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": "0x10"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(provider, requests: int, warmup: int) -> Dict[str, float]:
+    samples: List[float] = []
+    errors = 0
+    for i in range(warmup + requests):
+        started = time.perf_counter()
+        try:
+            response = provider.make_request("eth_blockNumber", [])
+            ok = "result" in response
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+        if i < warmup:
+            continue
+        if ok:
+            samples.append(elapsed)
+        else:
+            errors += 1
+    summary = latency_summary(samples)
+    summary["errors"] = errors
+    return summary
+
+
+def run(args) -> dict:
+    from web3 import Web3
+    from app.rpc_pool import MultiEndpointProvider
+
+    urls = []
+    for seed, spec in enumerate(args.nodes):
+        name, delay_ms, slow_ratio, fail_ratio = spec.split(":")
+        server = start_stand_in(float(delay_ms) / 1000, float(slow_ratio), float(fail_ratio), seed)
+        urls.append(f"http://127.0.0.1:{server.server_address[1]}")
+        log(f"Stand-in {name} at {urls[-1]}")
+
+    results = []
+    single = Web3.HTTPProvider(urls[0], request_kwargs={"timeout": args.timeout})
+    log(f"Single node: {args.requests} reads")
+    results.append({"key": "single", "metrics": measure(single, args.requests, args.warmup)})
+
+    pool = MultiEndpointProvider(urls, timeout=args.timeout, hedge_percentile=args.hedge_percentile,
+                                 hedge_min_delay=args.hedge_min_ms / 1000)
+    log(f"Pool of {len(urls)}: {args.requests} reads")
+    metrics = measure(pool, args.requests, args.warmup)
+    from app.rpc_pool import RPC_HEDGES
+    metrics["hedged"] = RPC_HEDGES.value()
+    results.append({"key": "pool", "metrics": metrics})
+    return {
+        "benchmark": "rpc_pool_bench",
+        "environment": environment_info(),
+        "config": {"nodes": args.nodes, "requests": args.requests, "hedge_percentile": args.hedge_percentile},
+        "nodes": pool.snapshot(),
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-node RPC routing benchmark with stand-in nodes")
+    parser.add_argument("--nodes", nargs="+", default=DEFAULT_NODES)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--hedge-percentile", type=float, default=0.9)
+    parser.add_argument("--hedge-min-ms", type=float, default=50.0)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--baseline", help="compare against a previously saved report")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed relative slowdown before a metric counts as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    report = run(args)
+    exit_code = 0
+    if args.baseline:
+        comparisons = compare_results(report["results"], load_report(args.baseline)["results"], args.tolerance)
+        report["comparison"] = {
+            "baseline": args.baseline,
+            "metrics": comparisons,
+            "regressions": sum(c["regression"] for c in comparisons),
+        }
+        exit_code = 1 if report["comparison"]["regressions"] else 0
+    write_report(report, args.output)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
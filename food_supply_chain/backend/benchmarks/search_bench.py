@@ -0,0 +1,137 @@
+"""
+Crop search latency against a synthetic crop index.
+
+Fills an in-memory CropStore with generated crops of both contracts
+(through apply_events, as the indexer does, so the search postings are
+built the same way) and times CropStore.search for each kind of query:
+
+    python -m benchmarks.search_bench
+    python -m benchmarks.search_bench --crops 200000 --output search.json --baseline old.json
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+from .common import compare_results, environment_info, latency_summary, load_report, write_report
+
+PRODUCE = ["Tomato", "Cherry Tomatoes", "Basmati Rice", "Wheat", "Sweet Corn", "Potato", "Red Onion",
+           "Green Chilli", "Mango", "Banana", "Organic Spinach", "Carrot", "Cauliflower", "Soybean"]
+VARIETY = ["Organic", "Premium", "Hybrid", "Local", "Export Grade", "Heirloom", ""]
+# Some names carry a village, so the index holds thousands of distinct names
+VILLAGES = [f"{prefix}{suffix}" for prefix in ("Rampur", "Kalyan", "Sundar", "Hosa", "Nava", "Devi")
+            for suffix in ("pura", "gaon", "halli", "nagar", "wadi", "palli", "kheda", "garh", "kere", "ganj")]
+FARMER = "0x" + "11" * 20
+
+
+def log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def build_store(crops: int, seed: int):
+    from app.crop_codec import ENHANCED, LEGACY, Crop, legacy_crop
+    from app.crop_store import CropStore
+
+    rng = random.Random(seed)
+    store = CropStore()
+    events = []
+    for i in range(1, crops + 1):
+        name = f"{rng.choice(VARIETY)} {rng.choice(PRODUCE)}".strip()
+        if rng.random() < 0.3:
+            name += f" from {rng.choice(VILLAGES)}"
+        if i % 10 == 0:
+            contract, crop = LEGACY, legacy_crop(i, name, 10, 100, FARMER, 1_700_000_000 + i)
+        else:
+            contract = ENHANCED
+            crop = Crop(i, name, 10, 100, f"BATCH-{i:07d}", 1_700_000_000, 1_800_000_000, None, None,
+                        "12.97,77.59", FARMER, True, 1_700_000_000 + i)
+        events.append({"event": "CropRegistered", "contract": contract, "crop_id": i, "block_number": i,
+                       "log_index": 0, "timestamp": crop.created_at, "transaction_hash": "0x", "farmer": FARMER,
+                       "crop": crop})
+    started = time.perf_counter()
+    for i in range(0, len(events), 5000):
+        chunk = events[i:i + 5000]
+        store.apply_events(chunk, chunk[-1]["block_number"], "00")
+    return store, time.perf_counter() - started
+
+
+def queries(kind: str, crops: int, rng: random.Random) -> str:
+    if kind == "batch":
+        return f"batch-{rng.randrange(1, crops):07d}"
+    if kind == "prefix":
+        return rng.choice(PRODUCE).split()[-1][:3]
+    if kind == "words":
+        return rng.choice(PRODUCE)
+    # fuzzy: drop one letter from a produce name
+    word = rng.choice(PRODUCE).split()[-1]
+    cut = rng.randrange(len(word))
+    return word[:cut] + word[cut + 1:]
+
+
+def run(args) -> dict:
+    store, build_seconds = build_store(args.crops, args.seed)
+    distinct = store._conn.execute("SELECT COUNT(DISTINCT name_key) FROM crop_names").fetchone()[0]
+    log(f"Indexed {args.crops} crops ({distinct} distinct names) in {build_seconds:.2f}s")
+    rng = random.Random(args.seed + 1)
+    results = []
+    for kind in ("batch", "prefix", "words", "fuzzy"):
+        samples: List[float] = []
+        matches = 0
+        for i in range(args.warmup + args.queries):
+            query = queries(kind, args.crops, rng)
+            started = time.perf_counter()
+            total, _ = store.search(query, args.limit)
+            elapsed = time.perf_counter() - started
+            if i >= args.warmup:
+                samples.append(elapsed)
+                matches += total
+        metrics: Dict[str, float] = latency_summary(samples)
+        metrics["mean_matches"] = round(matches / args.queries, 1)
+        log(f"{kind}: p50 {metrics['p50_ms']}ms p99 {metrics['p99_ms']}ms")
+        results.append({"key": kind, "metrics": metrics})
+    return {
+        "benchmark": "search_bench",
+        "environment": environment_info(),
+        "config": {"crops": args.crops, "queries": args.queries, "limit": args.limit},
+        "build_seconds": round(build_seconds, 3),
+        "distinct_names": distinct,
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Crop search latency on a synthetic index")
+    parser.add_argument("--crops", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--baseline", help="compare against a previously saved report")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed relative slowdown before a metric counts as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    report = run(args)
+    exit_code = 0
+    if args.baseline:
+        comparisons = compare_results(report["results"], load_report(args.baseline)["results"], args.tolerance)
+        report["comparison"] = {
+            "baseline": args.baseline,
+            "metrics": comparisons,
+            "regressions": sum(c["regression"] for c in comparisons),
+        }
+        exit_code = 1 if report["comparison"]["regressions"] else 0
+    write_report(report, args.output)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+WebSocket fan-out load test for ConnectionManager.
+
+Starts the backend with uvicorn (or targets an already running one with
+--url), opens thousands of /ws clients with mixed roles, fires notification
+bursts through NotificationService and reports delivery latency, throughput
+and server RSS as JSON.
+
+Run from the backend directory:
+    python -m benchmarks.ws_fanout --clients 2000 --bursts 10 --burst-size 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import websockets
+
+from .common import (
+    environment_info, latency_summary, raise_fd_limit,
+    read_peak_rss_bytes, read_rss_bytes, write_report
+)
+
+ROLES = ["farmer", "distributor", "retailer", "customer", "admin"]
+MARKER = "wsbench"
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class DeliveryStats:
+    """Collects per-message delivery latencies across all clients"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.delivered = 0
+        self.expected = 0
+        self.first_sent: Optional[float] = None
+        self.last_received: Optional[float] = None
+        self.done = asyncio.Event()
+
+    def expect(self, count: int):
+        self.expected += count
+
+    def record(self, sent_at: float, received_at: float):
+        self.latencies.append(received_at - sent_at)
+        self.delivered += 1
+        self.last_received = received_at
+        if self.delivered >= self.expected:
+            self.done.set()
+
+
+def start_server(port: int) -> subprocess.Popen:
+    """Start the backend app in a child process"""
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning", "--backlog", "4096",
+        ],
+        cwd=BACKEND_DIR,
+        # Bursts come from a single client address; don't throttle them
+        env={**os.environ, "RATE_LIMIT_ENABLED": "false"},
+    )
+
+
+def wait_until_up(base_url: str, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Backend did not come up at {base_url} within {timeout}s")
+
+
+def post_system_event(base_url: str, message: str, target_role: Optional[str]):
+    """Trigger NotificationService.notify_system_event through the HTTP API"""
+    body = {"message": message, "level": "info"}
+    if target_role:
+        body["target_role"] = target_role
+    request = urllib.request.Request(
+        f"{base_url}/notifications/system-event",
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        response.read()
+
+
+def _check_connected(results: Dict[str, int], connected: asyncio.Event):
+    if results["established"] + results["failed"] >= results["requested"]:
+        connected.set()
+
+
+async def run_client(ws_url: str, index: int, role: str, stats: DeliveryStats,
+                     connected: asyncio.Event, semaphore: asyncio.Semaphore,
+                     results: Dict[str, int]):
+    address = "0x%040x" % (index + 1)
+    uri = f"{ws_url}/ws?user_address={address}&user_role={role}"
+    try:
+        async with semaphore:
+            ws = await websockets.connect(uri, open_timeout=60, ping_interval=None, max_size=None)
+            # The server greets every client; only count it once that arrives
+            await ws.recv()
+    except Exception:
+        results["failed"] += 1
+        _check_connected(results, connected)
+        return
+    results["established"] += 1
+    results[role] += 1
+    _check_connected(results, connected)
+
+    try:
+        async for raw in ws:
+            received_at = time.time()
+            message = json.loads(raw)
+            if message.get("type") != "system_notification":
+                continue
+            text = message.get("payload", {}).get("message") or ""
+            if text.startswith(MARKER + ":"):
+                stats.record(float(text.split(":", 2)[2]), received_at)
+    except websockets.ConnectionClosed:
+        pass
+    finally:
+        await ws.close()
+
+
+async def fire_bursts(base_url: str, args, stats: DeliveryStats, by_role: Dict[str, int]) -> int:
+    loop = asyncio.get_running_loop()
+    established = sum(by_role.values())
+    sent = 0
+    for burst in range(args.bursts):
+        calls = []
+        for seq in range(args.burst_size):
+            target_role = None
+            if args.targeting == "mixed" and seq % 2:
+                target_role = ROLES[(burst + seq) % len(ROLES)]
+            stats.expect(by_role[target_role] if target_role else established)
+            sent_at = time.time()
+            if stats.first_sent is None:
+                stats.first_sent = sent_at
+            message = f"{MARKER}:{burst}.{seq}:{sent_at!r}"
+            calls.append(loop.run_in_executor(None, post_system_event, base_url, message, target_role))
+        await asyncio.gather(*calls)
+        sent += len(calls)
+        if args.interval:
+            await asyncio.sleep(args.interval)
+    return sent
+
+
+async def run_benchmark(args) -> dict:
+    raise_fd_limit(args.clients + 1024)
+
+    server = None
+    server_pid = args.server_pid
+    base_url = args.url
+    if not base_url:
+        server = start_server(args.port)
+        server_pid = server.pid
+        base_url = f"http://127.0.0.1:{args.port}"
+    ws_url = base_url.replace("http", "ws", 1)
+
+    try:
+        wait_until_up(base_url)
+        rss_baseline = read_rss_bytes(server_pid) if server_pid else None
+
+        stats = DeliveryStats()
+        results = {"requested": args.clients, "established": 0, "failed": 0}
+        results.update({role: 0 for role in ROLES})
+        connected = asyncio.Event()
+        semaphore = asyncio.Semaphore(args.connect_concurrency)
+
+        connect_started = time.perf_counter()
+        tasks = [
+            asyncio.create_task(run_client(
+                ws_url, i, ROLES[i % len(ROLES)], stats, connected, semaphore, results
+            ))
+            for i in range(args.clients)
+        ]
+        try:
+            await asyncio.wait_for(connected.wait(), timeout=args.connect_timeout)
+        except asyncio.TimeoutError:
+            pass
+        connect_seconds = time.perf_counter() - connect_started
+        rss_after_connect = read_rss_bytes(server_pid) if server_pid else None
+
+        by_role = {role: results[role] for role in ROLES}
+        sent = await fire_bursts(base_url, args, stats, by_role)
+        if stats.delivered < stats.expected:
+            stats.done.clear()
+        try:
+            await asyncio.wait_for(stats.done.wait(), timeout=args.drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+        rss_after_bursts = read_rss_bytes(server_pid) if server_pid else None
+        rss_peak = read_peak_rss_bytes(server_pid) if server_pid else None
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+    elapsed = (stats.last_received or time.time()) - (stats.first_sent or time.time())
+    return {
+        "benchmark": "ws_fanout",
+        "environment": environment_info(),
+        "config": {
+            "clients": args.clients,
+            "bursts": args.bursts,
+            "burst_size": args.burst_size,
+            "interval": args.interval,
+            "targeting": args.targeting,
+        },
+        "connections": {
+            "requested": args.clients,
+            "established": results["established"],
+            "failed": results["failed"],
+            "connect_seconds": round(connect_seconds, 3),
+            "by_role": by_role,
+        },
+        "messages": {
+            "sent": sent,
+            "expected_deliveries": stats.expected,
+            "delivered": stats.delivered,
+            "missing": max(0, stats.expected - stats.delivered),
+        },
+        "latency": latency_summary(stats.latencies),
+        "throughput": {
+            "elapsed_seconds": round(elapsed, 3),
+            "deliveries_per_second": round(stats.delivered / elapsed, 1) if elapsed > 0 else 0.0,
+            "messages_per_second": round(sent / elapsed, 1) if elapsed > 0 else 0.0,
+        },
+        "server_rss": {
+            "baseline_bytes": rss_baseline,
+            "after_connect_bytes": rss_after_connect,
+            "after_bursts_bytes": rss_after_bursts,
+            "peak_bytes": rss_peak,
+        },
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="WebSocket fan-out load test")
+    parser.add_argument("--clients", type=int, default=2000, help="number of /ws clients")
+    parser.add_argument("--bursts", type=int, default=10, help="number of notification bursts")
+    parser.add_argument("--burst-size", type=int, default=5, help="notifications per burst")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between bursts")
+    parser.add_argument("--targeting", choices=["all", "mixed"], default="mixed",
+                        help="'all' broadcasts every notification, 'mixed' alternates with role broadcasts")
+    parser.add_argument("--port", type=int, default=8765, help="port for the locally started app")
+    parser.add_argument("--url", help="target an already running app instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="pid of the app given by --url, for RSS sampling")
+    parser.add_argument("--connect-concurrency", type=int, default=200)
+    parser.add_argument("--connect-timeout", type=float, default=120.0)
+    parser.add_argument("--drain-timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,21 +13,25 @@ contract EnhancedFoodSupplyChain is AccessControl, Pausable, ReentrancyGuard {
     bytes32 public constant RETAILER_ROLE = keccak256("RETAILER_ROLE");
     bytes32 public constant CUSTOMER_ROLE = keccak256("CUSTOMER_ROLE");
 
-    // Enhanced Crop struct
+    // Enhanced Crop struct, packed into 5 fixed slots plus the two strings.
+    // IPFS CIDs are stored as the 32-byte sha2-256 digest of a CIDv0
+    // ("Qm..." = base58(0x12 0x20 || digest)); zero means none.
+    // Coordinates are degrees * 1e6.
     struct Crop {
-        uint256 id;
-        string name;
-        uint256 quantity;
-        uint256 price;
-        string batchNumber;
-        uint256 harvestDate;    // unix timestamp
-        uint256 expiryDate;     // unix timestamp
-        string ipfsImageHash;   // IPFS CID for image
-        string ipfsCertHash;    // IPFS CID for certificate
-        string farmCoords;      // GPS coordinates "lat,lng"
+        uint64 id;
+        uint64 harvestDate;     // unix timestamp
+        uint64 expiryDate;      // unix timestamp
+        uint64 createdAt;
+        uint128 quantity;
+        uint128 price;
         address currentOwner;
         bool available;
-        uint256 createdAt;
+        int32 latE6;
+        int32 lngE6;
+        bytes32 ipfsImageDigest; // IPFS image
+        bytes32 ipfsCertDigest;  // IPFS certificate
+        string name;
+        string batchNumber;
     }
 
     // Transfer event for traceability
@@ -39,11 +43,36 @@ contract EnhancedFoodSupplyChain is AccessControl, Pausable, ReentrancyGuard {
         string ipfsDataHash;    // Additional data on IPFS
     }
 
+    // Batch inputs; fields mirror registerCrop / transferCrop arguments
+    struct CropInput {
+        string name;
+        uint128 quantity;
+        uint128 price;
+        string batchNumber;
+        uint64 harvestDate;
+        uint64 expiryDate;
+        bytes32 ipfsImageDigest;
+        bytes32 ipfsCertDigest;
+        int32 latE6;
+        int32 lngE6;
+    }
+
+    struct TransferInput {
+        uint256 cropId;
+        address to;
+        string note;
+        string ipfsDataHash;
+    }
+
     // State variables
     uint256 public cropCount = 0;
     mapping(uint256 => Crop) public crops;
     mapping(uint256 => TransferEvent[]) public cropHistory;
-    mapping(address => uint256[]) public userCrops; // Crops owned by user
+    mapping(address => uint256[]) public userCrops; // Crops currently owned by user
+    mapping(uint256 => uint256) private userCropSlot; // cropId => 1-based position in its owner's userCrops
+
+    uint256 public constant MAX_PAGE_SIZE = 200;
+    uint256 public constant MAX_BATCH_SIZE = 500;
 
     // Events
     event CropRegistered(
@@ -118,43 +147,69 @@ contract EnhancedFoodSupplyChain is AccessControl, Pausable, ReentrancyGuard {
     // Enhanced crop registration
     function registerCrop(
         string memory _name,
-        uint256 _quantity,
-        uint256 _price,
+        uint128 _quantity,
+        uint128 _price,
         string memory _batchNumber,
-        uint256 _harvestDate,
-        uint256 _expiryDate,
-        string memory _ipfsImageHash,
-        string memory _ipfsCertHash,
-        string memory _farmCoords
+        uint64 _harvestDate,
+        uint64 _expiryDate,
+        bytes32 _ipfsImageDigest,
+        bytes32 _ipfsCertDigest,
+        int32 _latE6,
+        int32 _lngE6
     ) external onlyRole(FARMER_ROLE) whenNotPaused {
-        require(bytes(_name).length > 0, "Name cannot be empty");
-        require(_quantity > 0, "Quantity must be greater than 0");
-        require(_price > 0, "Price must be greater than 0");
-        require(bytes(_batchNumber).length > 0, "Batch number cannot be empty");
-        require(_harvestDate > 0, "Invalid harvest date");
-        require(_expiryDate > _harvestDate, "Expiry date must be after harvest date");
-        require(bytes(_farmCoords).length > 0, "Farm coordinates required");
-
-        cropCount++;
-        crops[cropCount] = Crop({
-            id: cropCount,
+        _registerCrop(CropInput({
             name: _name,
             quantity: _quantity,
             price: _price,
             batchNumber: _batchNumber,
             harvestDate: _harvestDate,
             expiryDate: _expiryDate,
-            ipfsImageHash: _ipfsImageHash,
-            ipfsCertHash: _ipfsCertHash,
-            farmCoords: _farmCoords,
+            ipfsImageDigest: _ipfsImageDigest,
+            ipfsCertDigest: _ipfsCertDigest,
+            latE6: _latE6,
+            lngE6: _lngE6
+        }));
+    }
+
+    // Register many crops in one transaction; reverts as a whole if any is invalid
+    function registerCrops(CropInput[] calldata _crops) external onlyRole(FARMER_ROLE) whenNotPaused {
+        require(_crops.length > 0 && _crops.length <= MAX_BATCH_SIZE, "Invalid batch size");
+        for (uint256 i = 0; i < _crops.length; i++) {
+            _registerCrop(_crops[i]);
+        }
+    }
+
+    function _registerCrop(CropInput memory _crop) private {
+        require(bytes(_crop.name).length > 0, "Name cannot be empty");
+        require(_crop.quantity > 0, "Quantity must be greater than 0");
+        require(_crop.price > 0, "Price must be greater than 0");
+        require(bytes(_crop.batchNumber).length > 0, "Batch number cannot be empty");
+        require(_crop.harvestDate > 0, "Invalid harvest date");
+        require(_crop.expiryDate > _crop.harvestDate, "Expiry date must be after harvest date");
+        require(_crop.latE6 >= -90e6 && _crop.latE6 <= 90e6, "Invalid latitude");
+        require(_crop.lngE6 >= -180e6 && _crop.lngE6 <= 180e6, "Invalid longitude");
+
+        cropCount++;
+        crops[cropCount] = Crop({
+            id: uint64(cropCount),
+            harvestDate: _crop.harvestDate,
+            expiryDate: _crop.expiryDate,
+            createdAt: uint64(block.timestamp),
+            quantity: _crop.quantity,
+            price: _crop.price,
             currentOwner: msg.sender,
             available: true,
-            createdAt: block.timestamp
+            latE6: _crop.latE6,
+            lngE6: _crop.lngE6,
+            ipfsImageDigest: _crop.ipfsImageDigest,
+            ipfsCertDigest: _crop.ipfsCertDigest,
+            name: _crop.name,
+            batchNumber: _crop.batchNumber
         });
 
-        userCrops[msg.sender].push(cropCount);
+        _addUserCrop(msg.sender, cropCount);
 
-        emit CropRegistered(cropCount, msg.sender, _name, _batchNumber);
+        emit CropRegistered(cropCount, msg.sender, _crop.name, _crop.batchNumber);
     }
 
     // Transfer crop ownership
@@ -164,6 +219,27 @@ contract EnhancedFoodSupplyChain is AccessControl, Pausable, ReentrancyGuard {
         string memory _note,
         string memory _ipfsDataHash
     ) external validCrop(_cropId) onlyOwnerOrAdmin(_cropId) whenNotPaused {
+        _transferCrop(_cropId, _to, _note, _ipfsDataHash);
+    }
+
+    // Transfer many crops in one transaction; reverts as a whole if any is invalid
+    function transferCrops(TransferInput[] calldata _transfers) external whenNotPaused {
+        require(_transfers.length > 0 && _transfers.length <= MAX_BATCH_SIZE, "Invalid batch size");
+        bool isAdmin = hasRole(ADMIN_ROLE, msg.sender);
+        for (uint256 i = 0; i < _transfers.length; i++) {
+            uint256 cropId = _transfers[i].cropId;
+            require(cropId > 0 && cropId <= cropCount, "Invalid crop ID");
+            require(crops[cropId].currentOwner == msg.sender || isAdmin, "Not owner or admin");
+            _transferCrop(cropId, _transfers[i].to, _transfers[i].note, _transfers[i].ipfsDataHash);
+        }
+    }
+
+    function _transferCrop(
+        uint256 _cropId,
+        address _to,
+        string memory _note,
+        string memory _ipfsDataHash
+    ) private {
         require(_to != address(0), "Cannot transfer to zero address");
         require(_to != crops[_cropId].currentOwner, "Cannot transfer to current owner");
         require(crops[_cropId].available, "Crop not available for transfer");
@@ -173,11 +249,10 @@ contract EnhancedFoodSupplyChain is AccessControl, Pausable, ReentrancyGuard {
         // Update ownership
         crops[_cropId].currentOwner = _to;
         
-        // Add to new owner's crops
-        userCrops[_to].push(_cropId);
-        
-        // Remove from old owner's crops (simplified - in production, use mapping)
-        
+        // Move between owners' crop lists
+        _removeUserCrop(from, _cropId);
+        _addUserCrop(_to, _cropId);
+
         // Record transfer event
         cropHistory[_cropId].push(TransferEvent({
             from: from,
@@ -190,6 +265,24 @@ contract EnhancedFoodSupplyChain is AccessControl, Pausable, ReentrancyGuard {
         emit CropTransferred(_cropId, from, _to, _note);
     }
 
+    // Owner index: O(1) add and swap-and-pop removal
+    function _addUserCrop(address _user, uint256 _cropId) private {
+        userCrops[_user].push(_cropId);
+        userCropSlot[_cropId] = userCrops[_user].length;
+    }
+
+    function _removeUserCrop(address _user, uint256 _cropId) private {
+        uint256[] storage owned = userCrops[_user];
+        uint256 index = userCropSlot[_cropId] - 1;
+        uint256 lastId = owned[owned.length - 1];
+        if (lastId != _cropId) {
+            owned[index] = lastId;
+            userCropSlot[lastId] = index + 1;
+        }
+        owned.pop();
+        delete userCropSlot[_cropId];
+    }
+
     // Purchase crop
     function buyCrop(uint256 _cropId) external payable validCrop(_cropId) nonReentrant whenNotPaused {
         Crop storage crop = crops[_cropId];
@@ -203,8 +296,9 @@ contract EnhancedFoodSupplyChain is AccessControl, Pausable, ReentrancyGuard {
         crop.available = false;
         crop.currentOwner = msg.sender;
         
-        // Add to buyer's crops
-        userCrops[msg.sender].push(_cropId);
+        // Move to buyer's crops
+        _removeUserCrop(seller, _cropId);
+        _addUserCrop(msg.sender, _cropId);
         
         // Record purchase event
         cropHistory[_cropId].push(TransferEvent({
@@ -239,6 +333,34 @@ contract EnhancedFoodSupplyChain is AccessControl, Pausable, ReentrancyGuard {
         return userCrops[_user];
     }
 
+    function getUserCropCount(address _user) external view returns (uint256) {
+        return userCrops[_user].length;
+    }
+
+    // Page through a user's current crops. Removal swaps the last crop into
+    // the freed slot, so order is not stable across transfers.
+    function getUserCropsPage(
+        address _user,
+        uint256 _offset,
+        uint256 _limit
+    ) external view returns (Crop[] memory page, uint256 total) {
+        require(_limit > 0 && _limit <= MAX_PAGE_SIZE, "Invalid page size");
+        uint256[] storage owned = userCrops[_user];
+        total = owned.length;
+        if (_offset >= total) {
+            return (new Crop[](0), total);
+        }
+
+        uint256 count = total - _offset;
+        if (count > _limit) {
+            count = _limit;
+        }
+        page = new Crop[](count);
+        for (uint256 i = 0; i < count; i++) {
+            page[i] = crops[owned[_offset + i]];
+        }
+    }
+
     function getAllCrops() external view returns (Crop[] memory) {
         Crop[] memory allCrops = new Crop[](cropCount);
         for (uint256 i = 1; i <= cropCount; i++) {
@@ -53,14 +53,15 @@ export const CONTRACT_ABI = [
   {
     "inputs": [
       {"internalType": "string", "name": "_name", "type": "string"},
-      {"internalType": "uint256", "name": "_quantity", "type": "uint256"},
-      {"internalType": "uint256", "name": "_price", "type": "uint256"},
+      {"internalType": "uint128", "name": "_quantity", "type": "uint128"},
+      {"internalType": "uint128", "name": "_price", "type": "uint128"},
       {"internalType": "string", "name": "_batchNumber", "type": "string"},
-      {"internalType": "uint256", "name": "_harvestDate", "type": "uint256"},
-      {"internalType": "uint256", "name": "_expiryDate", "type": "uint256"},
-      {"internalType": "string", "name": "_ipfsImageHash", "type": "string"},
-      {"internalType": "string", "name": "_ipfsCertHash", "type": "string"},
-      {"internalType": "string", "name": "_farmCoords", "type": "string"}
+      {"internalType": "uint64", "name": "_harvestDate", "type": "uint64"},
+      {"internalType": "uint64", "name": "_expiryDate", "type": "uint64"},
+      {"internalType": "bytes32", "name": "_ipfsImageDigest", "type": "bytes32"},
+      {"internalType": "bytes32", "name": "_ipfsCertDigest", "type": "bytes32"},
+      {"internalType": "int32", "name": "_latE6", "type": "int32"},
+      {"internalType": "int32", "name": "_lngE6", "type": "int32"}
     ],
     "name": "registerCrop",
     "outputs": [],
@@ -90,19 +91,27 @@ export const CONTRACT_ABI = [
     "inputs": [{"internalType": "uint256", "name": "_cropId", "type": "uint256"}],
     "name": "getCrop",
     "outputs": [
-      {"internalType": "uint256", "name": "", "type": "uint256"},
-      {"internalType": "string", "name": "", "type": "string"},
-      {"internalType": "uint256", "name": "", "type": "uint256"},
-      {"internalType": "uint256", "name": "", "type": "uint256"},
-      {"internalType": "string", "name": "", "type": "string"},
-      {"internalType": "uint256", "name": "", "type": "uint256"},
-      {"internalType": "uint256", "name": "", "type": "uint256"},
-      {"internalType": "string", "name": "", "type": "string"},
-      {"internalType": "string", "name": "", "type": "string"},
-      {"internalType": "string", "name": "", "type": "string"},
-      {"internalType": "address", "name": "", "type": "address"},
-      {"internalType": "bool", "name": "", "type": "bool"},
-      {"internalType": "uint256", "name": "", "type": "uint256"}
+      {
+        "components": [
+          {"internalType": "uint64", "name": "id", "type": "uint64"},
+          {"internalType": "uint64", "name": "harvestDate", "type": "uint64"},
+          {"internalType": "uint64", "name": "expiryDate", "type": "uint64"},
+          {"internalType": "uint64", "name": "createdAt", "type": "uint64"},
+          {"internalType": "uint128", "name": "quantity", "type": "uint128"},
+          {"internalType": "uint128", "name": "price", "type": "uint128"},
+          {"internalType": "address", "name": "currentOwner", "type": "address"},
+          {"internalType": "bool", "name": "available", "type": "bool"},
+          {"internalType": "int32", "name": "latE6", "type": "int32"},
+          {"internalType": "int32", "name": "lngE6", "type": "int32"},
+          {"internalType": "bytes32", "name": "ipfsImageDigest", "type": "bytes32"},
+          {"internalType": "bytes32", "name": "ipfsCertDigest", "type": "bytes32"},
+          {"internalType": "string", "name": "name", "type": "string"},
+          {"internalType": "string", "name": "batchNumber", "type": "string"}
+        ],
+        "internalType": "struct EnhancedFoodSupplyChain.Crop",
+        "name": "",
+        "type": "tuple"
+      }
     ],
     "stateMutability": "view",
     "type": "function"
@@ -113,19 +122,20 @@ export const CONTRACT_ABI = [
     "outputs": [
       {
         "components": [
-          {"internalType": "uint256", "name": "id", "type": "uint256"},
-          {"internalType": "string", "name": "name", "type": "string"},
-          {"internalType": "uint256", "name": "quantity", "type": "uint256"},
-          {"internalType": "uint256", "name": "price", "type": "uint256"},
-          {"internalType": "string", "name": "batchNumber", "type": "string"},
-          {"internalType": "uint256", "name": "harvestDate", "type": "uint256"},
-          {"internalType": "uint256", "name": "expiryDate", "type": "uint256"},
-          {"internalType": "string", "name": "ipfsImageHash", "type": "string"},
-          {"internalType": "string", "name": "ipfsCertHash", "type": "string"},
-          {"internalType": "string", "name": "farmCoords", "type": "string"},
+          {"internalType": "uint64", "name": "id", "type": "uint64"},
+          {"internalType": "uint64", "name": "harvestDate", "type": "uint64"},
+          {"internalType": "uint64", "name": "expiryDate", "type": "uint64"},
+          {"internalType": "uint64", "name": "createdAt", "type": "uint64"},
+          {"internalType": "uint128", "name": "quantity", "type": "uint128"},
+          {"internalType": "uint128", "name": "price", "type": "uint128"},
           {"internalType": "address", "name": "currentOwner", "type": "address"},
           {"internalType": "bool", "name": "available", "type": "bool"},
-          {"internalType": "uint256", "name": "createdAt", "type": "uint256"}
+          {"internalType": "int32", "name": "latE6", "type": "int32"},
+          {"internalType": "int32", "name": "lngE6", "type": "int32"},
+          {"internalType": "bytes32", "name": "ipfsImageDigest", "type": "bytes32"},
+          {"internalType": "bytes32", "name": "ipfsCertDigest", "type": "bytes32"},
+          {"internalType": "string", "name": "name", "type": "string"},
+          {"internalType": "string", "name": "batchNumber", "type": "string"}
         ],
         "internalType": "struct EnhancedFoodSupplyChain.Crop",
         "name": "",
@@ -141,19 +151,20 @@ export const CONTRACT_ABI = [
     "outputs": [
       {
         "components": [
-          {"internalType": "uint256", "name": "id", "type": "uint256"},
-          {"internalType": "string", "name": "name", "type": "string"},
-          {"internalType": "uint256", "name": "quantity", "type": "uint256"},
-          {"internalType": "uint256", "name": "price", "type": "uint256"},
-          {"internalType": "string", "name": "batchNumber", "type": "string"},
-          {"internalType": "uint256", "name": "harvestDate", "type": "uint256"},
-          {"internalType": "uint256", "name": "expiryDate", "type": "uint256"},
-          {"internalType": "string", "name": "ipfsImageHash", "type": "string"},
-          {"internalType": "string", "name": "ipfsCertHash", "type": "string"},
-          {"internalType": "string", "name": "farmCoords", "type": "string"},
+          {"internalType": "uint64", "name": "id", "type": "uint64"},
+          {"internalType": "uint64", "name": "harvestDate", "type": "uint64"},
+          {"internalType": "uint64", "name": "expiryDate", "type": "uint64"},
+          {"internalType": "uint64", "name": "createdAt", "type": "uint64"},
+          {"internalType": "uint128", "name": "quantity", "type": "uint128"},
+          {"internalType": "uint128", "name": "price", "type": "uint128"},
           {"internalType": "address", "name": "currentOwner", "type": "address"},
           {"internalType": "bool", "name": "available", "type": "bool"},
-          {"internalType": "uint256", "name": "createdAt", "type": "uint256"}
+          {"internalType": "int32", "name": "latE6", "type": "int32"},
+          {"internalType": "int32", "name": "lngE6", "type": "int32"},
+          {"internalType": "bytes32", "name": "ipfsImageDigest", "type": "bytes32"},
+          {"internalType": "bytes32", "name": "ipfsCertDigest", "type": "bytes32"},
+          {"internalType": "string", "name": "name", "type": "string"},
+          {"internalType": "string", "name": "batchNumber", "type": "string"}
         ],
         "internalType": "struct EnhancedFoodSupplyChain.Crop",
         "name": "",
@@ -183,6 +194,40 @@ export const CONTRACT_ABI = [
     "stateMutability": "view",
     "type": "function"
   },
+  {
+    "inputs": [
+      {"internalType": "address", "name": "_user", "type": "address"},
+      {"internalType": "uint256", "name": "_offset", "type": "uint256"},
+      {"internalType": "uint256", "name": "_limit", "type": "uint256"}
+    ],
+    "name": "getUserCropsPage",
+    "outputs": [
+      {
+        "components": [
+          {"internalType": "uint64", "name": "id", "type": "uint64"},
+          {"internalType": "uint64", "name": "harvestDate", "type": "uint64"},
+          {"internalType": "uint64", "name": "expiryDate", "type": "uint64"},
+          {"internalType": "uint64", "name": "createdAt", "type": "uint64"},
+          {"internalType": "uint128", "name": "quantity", "type": "uint128"},
+          {"internalType": "uint128", "name": "price", "type": "uint128"},
+          {"internalType": "address", "name": "currentOwner", "type": "address"},
+          {"internalType": "bool", "name": "available", "type": "bool"},
+          {"internalType": "int32", "name": "latE6", "type": "int32"},
+          {"internalType": "int32", "name": "lngE6", "type": "int32"},
+          {"internalType": "bytes32", "name": "ipfsImageDigest", "type": "bytes32"},
+          {"internalType": "bytes32", "name": "ipfsCertDigest", "type": "bytes32"},
+          {"internalType": "string", "name": "name", "type": "string"},
+          {"internalType": "string", "name": "batchNumber", "type": "string"}
+        ],
+        "internalType": "struct EnhancedFoodSupplyChain.Crop",
+        "name": "page",
+        "type": "tuple[]"
+      },
+      {"internalType": "uint256", "name": "total", "type": "uint256"}
+    ],
+    "stateMutability": "view",
+    "type": "function"
+  },
   {
     "inputs": [],
     "name": "cropCount",
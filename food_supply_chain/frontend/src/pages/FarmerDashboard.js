@@ -22,9 +22,12 @@ const FarmerDashboard = () => {
   const loadFarmerCrops = async () => {
     try {
       setLoading(true);
-      const account = await blockchainService.getCurrentAccount();
-      const userCrops = await blockchainService.getUserCrops(account);
-      
+      const result = await blockchainService.getUserCrops(blockchainService.getAccount());
+      if (!result.success) {
+        throw new Error(result.error);
+      }
+      const userCrops = result.data;
+
       setCrops(userCrops);
       
       // Calculate stats
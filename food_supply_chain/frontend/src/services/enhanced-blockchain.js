@@ -1,6 +1,50 @@
-import { BrowserProvider, Contract } from "ethers";
+import { BrowserProvider, Contract, ZeroHash, decodeBase58, encodeBase58, toBeHex } from "ethers";
 import { CONTRACT_ADDRESS, CONTRACT_ABI } from "../config";
 
+// Crops store IPFS CIDv0s as bare sha2-256 digests (CIDv0 = base58(0x1220 || digest))
+// and coordinates as degrees * 1e6
+const CIDV0_PREFIX = "0x1220";
+const COORD_SCALE = 1e6;
+
+const cidToDigest = (cid) => {
+  if (!cid) {
+    return ZeroHash;
+  }
+  const multihash = toBeHex(decodeBase58(cid), 34);
+  if (!multihash.startsWith(CIDV0_PREFIX)) {
+    throw new Error(`Only CIDv0 IPFS hashes are supported: ${cid}`);
+  }
+  return "0x" + multihash.slice(CIDV0_PREFIX.length);
+};
+
+const digestToCid = (digest) => (
+  digest === ZeroHash ? "" : encodeBase58(CIDV0_PREFIX + digest.slice(2))
+);
+
+const parseCoords = (farmCoords) => {
+  const [lat, lng] = farmCoords.split(",").map(part => Math.round(parseFloat(part) * COORD_SCALE));
+  if (!Number.isFinite(lat) || !Number.isFinite(lng)) {
+    throw new Error(`Farm coordinates must be "lat,lng": ${farmCoords}`);
+  }
+  return [lat, lng];
+};
+
+const formatCrop = (crop) => ({
+  id: crop.id.toString(),
+  name: crop.name,
+  quantity: crop.quantity.toString(),
+  price: crop.price.toString(),
+  batchNumber: crop.batchNumber,
+  harvestDate: crop.harvestDate.toString(),
+  expiryDate: crop.expiryDate.toString(),
+  ipfsImageHash: digestToCid(crop.ipfsImageDigest),
+  ipfsCertHash: digestToCid(crop.ipfsCertDigest),
+  farmCoords: `${Number(crop.latE6) / COORD_SCALE},${Number(crop.lngE6) / COORD_SCALE}`,
+  currentOwner: crop.currentOwner,
+  available: crop.available,
+  createdAt: crop.createdAt.toString()
+});
+
 class EnhancedBlockchainService {
   constructor() {
     this.provider = null;
@@ -69,6 +113,7 @@ class EnhancedBlockchainService {
 
       console.log("Registering crop:", cropData);
 
+      const [latE6, lngE6] = parseCoords(cropData.farmCoords);
       const tx = await this.contract.registerCrop(
         cropData.name,
         cropData.quantity,
@@ -76,9 +121,10 @@ class EnhancedBlockchainService {
         cropData.batchNumber,
         cropData.harvestDate,
         cropData.expiryDate,
-        cropData.ipfsImageHash || "",
-        cropData.ipfsCertHash || "",
-        cropData.farmCoords
+        cidToDigest(cropData.ipfsImageHash),
+        cidToDigest(cropData.ipfsCertHash),
+        latE6,
+        lngE6
       );
 
       console.log("Transaction sent:", tx.hash);
@@ -182,21 +228,7 @@ class EnhancedBlockchainService {
       
       return {
         success: true,
-        data: {
-          id: cropData[0].toString(),
-          name: cropData[1],
-          quantity: cropData[2].toString(),
-          price: cropData[3].toString(),
-          batchNumber: cropData[4],
-          harvestDate: cropData[5].toString(),
-          expiryDate: cropData[6].toString(),
-          ipfsImageHash: cropData[7],
-          ipfsCertHash: cropData[8],
-          farmCoords: cropData[9],
-          currentOwner: cropData[10],
-          available: cropData[11],
-          createdAt: cropData[12].toString()
-        }
+        data: formatCrop(cropData)
       };
     } catch (error) {
       console.error("Failed to get crop:", error);
@@ -216,21 +248,7 @@ class EnhancedBlockchainService {
 
       const crops = await this.contract.getAllCrops();
       
-      const formattedCrops = crops.map(crop => ({
-        id: crop[0].toString(),
-        name: crop[1],
-        quantity: crop[2].toString(),
-        price: crop[3].toString(),
-        batchNumber: crop[4],
-        harvestDate: crop[5].toString(),
-        expiryDate: crop[6].toString(),
-        ipfsImageHash: crop[7],
-        ipfsCertHash: crop[8],
-        farmCoords: crop[9],
-        currentOwner: crop[10],
-        available: crop[11],
-        createdAt: crop[12].toString()
-      }));
+      const formattedCrops = crops.map(formatCrop);
 
       return {
         success: true,
@@ -254,21 +272,7 @@ class EnhancedBlockchainService {
 
       const crops = await this.contract.getAvailableCrops();
       
-      const formattedCrops = crops.map(crop => ({
-        id: crop[0].toString(),
-        name: crop[1],
-        quantity: crop[2].toString(),
-        price: crop[3].toString(),
-        batchNumber: crop[4],
-        harvestDate: crop[5].toString(),
-        expiryDate: crop[6].toString(),
-        ipfsImageHash: crop[7],
-        ipfsCertHash: crop[8],
-        farmCoords: crop[9],
-        currentOwner: crop[10],
-        available: crop[11],
-        createdAt: crop[12].toString()
-      }));
+      const formattedCrops = crops.map(formatCrop);
 
       return {
         success: true,
@@ -283,6 +287,38 @@ class EnhancedBlockchainService {
     }
   }
 
+  // Get crops currently owned by a user, one bounded page at a time
+  async getUserCrops(address = null, pageSize = 100) {
+    try {
+      if (!this.isConnected()) {
+        throw new Error("Not connected to blockchain");
+      }
+
+      const user = address || this.account;
+      const formattedCrops = [];
+      let total = 0;
+      do {
+        const [page, pageTotal] = await this.contract.getUserCropsPage(user, formattedCrops.length, pageSize);
+        total = Number(pageTotal);
+        if (page.length === 0) {
+          break;
+        }
+        formattedCrops.push(...page.map(formatCrop));
+      } while (formattedCrops.length < total);
+
+      return {
+        success: true,
+        data: formattedCrops
+      };
+    } catch (error) {
+      console.error("Failed to get user crops:", error);
+      return {
+        success: false,
+        error: error.message
+      };
+    }
+  }
+
   // Get crop history
   async getCropHistory(cropId) {
     try {
@@ -11,6 +11,9 @@ module.exports = {
       viaIR: true
     }
   },
+  paths: {
+    tests: "./tests/contracts"
+  },
   networks: {
     localhost: {
       url: "http://127.0.0.1:8545" // Hardhat local node or Ganache
@@ -1,5 +1,18 @@
 const hre = require("hardhat");
 
+// registerCrop takes CIDv0s as their bare sha2-256 digest (CIDv0 = base58(0x1220 || digest))
+// and coordinates as degrees * 1e6
+const CIDV0_PREFIX = "0x1220";
+const COORD_SCALE = 1e6;
+
+function cidToDigest(cid) {
+  const multihash = hre.ethers.toBeHex(hre.ethers.decodeBase58(cid), 34);
+  if (!multihash.startsWith(CIDV0_PREFIX)) {
+    throw new Error(`Only CIDv0 IPFS hashes are supported: ${cid}`);
+  }
+  return "0x" + multihash.slice(CIDV0_PREFIX.length);
+}
+
 async function main() {
   console.log("Deploying Enhanced Food Supply Chain contract...");
   
@@ -35,9 +48,10 @@ async function main() {
     "BATCH-001",
     Math.floor(Date.now() / 1000), // Current timestamp
     Math.floor(Date.now() / 1000) + (7 * 24 * 60 * 60), // 7 days from now
-    "QmSampleImageHash",
-    "QmSampleCertHash",
-    "12.9716,77.5946" // Bangalore coordinates
+    cidToDigest("QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG"), // sample image
+    hre.ethers.ZeroHash, // no certificate
+    Math.round(12.9716 * COORD_SCALE), // Bangalore coordinates
+    Math.round(77.5946 * COORD_SCALE)
   );
   
   await tx.wait();
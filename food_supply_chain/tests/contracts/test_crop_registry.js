@@ -0,0 +1,152 @@
+const { expect } = require("chai");
+const { ethers } = require("hardhat");
+const { loadFixture } = require("@nomicfoundation/hardhat-toolbox/network-helpers");
+
+const HARVEST = 1_700_000_000;
+const EXPIRY = HARVEST + 7 * 24 * 60 * 60;
+
+async function deployWithCrops() {
+  const [admin, farmer, buyer] = await ethers.getSigners();
+  const Contract = await ethers.getContractFactory("EnhancedFoodSupplyChain");
+  const contract = await Contract.deploy();
+  await contract.grantFarmerRole(farmer.address);
+  for (let i = 1; i <= 5; i++) {
+    await contract.connect(farmer).registerCrop(
+      `Crop ${i}`, 10, 100, `BATCH-${i}`, HARVEST, EXPIRY, ethers.ZeroHash, ethers.ZeroHash, 0, 0
+    );
+  }
+  return { contract, admin, farmer, buyer };
+}
+
+async function ownedIds(contract, user) {
+  return (await contract.getUserCrops(user.address)).map(Number);
+}
+
+describe("EnhancedFoodSupplyChain owner index", function () {
+  it("moves the last crop into the freed slot on transfer", async function () {
+    const { contract, farmer, buyer } = await loadFixture(deployWithCrops);
+
+    await contract.connect(farmer).transferCrop(2, buyer.address, "", "");
+    expect(await ownedIds(contract, farmer)).to.deep.equal([1, 5, 3, 4]);
+
+    // Removing the last entry needs no swap
+    await contract.connect(farmer).transferCrop(4, buyer.address, "", "");
+    expect(await ownedIds(contract, farmer)).to.deep.equal([1, 5, 3]);
+
+    // Crop 5 was swapped into slot 2 and must be removed from there
+    await contract.connect(farmer).transferCrop(5, buyer.address, "", "");
+    expect(await ownedIds(contract, farmer)).to.deep.equal([1, 3]);
+    expect(await ownedIds(contract, buyer)).to.deep.equal([2, 4, 5]);
+  });
+
+  it("keeps both lists exact when crops move back and forth", async function () {
+    const { contract, farmer, buyer } = await loadFixture(deployWithCrops);
+
+    await contract.connect(farmer).transferCrop(1, buyer.address, "", "");
+    await contract.connect(buyer).transferCrop(1, farmer.address, "", "");
+    expect(await ownedIds(contract, farmer)).to.deep.equal([5, 2, 3, 4, 1]);
+    expect(await ownedIds(contract, buyer)).to.deep.equal([]);
+
+    await contract.connect(buyer).buyCrop(3, { value: 100 });
+    expect(await ownedIds(contract, farmer)).to.deep.equal([5, 2, 1, 4]);
+    expect(await ownedIds(contract, buyer)).to.deep.equal([3]);
+    expect(await contract.getUserCropCount(farmer.address)).to.equal(4);
+  });
+
+  it("pages through a user's crops", async function () {
+    const { contract, farmer, buyer } = await loadFixture(deployWithCrops);
+
+    const pages = [];
+    for (let offset = 0; offset < 5; offset += 2) {
+      const [page, total] = await contract.getUserCropsPage(farmer.address, offset, 2);
+      expect(total).to.equal(5);
+      pages.push(...page.map((crop) => Number(crop.id)));
+    }
+    expect(pages).to.deep.equal(await ownedIds(contract, farmer));
+
+    const [last] = await contract.getUserCropsPage(farmer.address, 4, 200);
+    expect(last.map((crop) => Number(crop.id))).to.deep.equal([5]);
+
+    const [past, total] = await contract.getUserCropsPage(farmer.address, 5, 10);
+    expect(past).to.have.length(0);
+    expect(total).to.equal(5);
+
+    const [empty, none] = await contract.getUserCropsPage(buyer.address, 0, 10);
+    expect(empty).to.have.length(0);
+    expect(none).to.equal(0);
+  });
+
+  it("rejects page sizes outside 1..MAX_PAGE_SIZE", async function () {
+    const { contract, farmer } = await loadFixture(deployWithCrops);
+    const maxPageSize = await contract.MAX_PAGE_SIZE();
+
+    await expect(contract.getUserCropsPage(farmer.address, 0, 0)).to.be.revertedWith("Invalid page size");
+    await expect(
+      contract.getUserCropsPage(farmer.address, 0, maxPageSize + 1n)
+    ).to.be.revertedWith("Invalid page size");
+    const [page] = await contract.getUserCropsPage(farmer.address, 0, maxPageSize);
+    expect(page).to.have.length(5);
+  });
+});
+
+function cropInput(i, overrides = {}) {
+  return {
+    name: `Batch crop ${i}`,
+    quantity: 10,
+    price: 100,
+    batchNumber: `BULK-${i}`,
+    harvestDate: HARVEST,
+    expiryDate: EXPIRY,
+    ipfsImageDigest: ethers.ZeroHash,
+    ipfsCertDigest: ethers.ZeroHash,
+    latE6: 0,
+    lngE6: 0,
+    ...overrides,
+  };
+}
+
+describe("EnhancedFoodSupplyChain batches", function () {
+  it("registers a batch in input order", async function () {
+    const { contract, farmer } = await loadFixture(deployWithCrops);
+
+    await contract.connect(farmer).registerCrops([cropInput(6), cropInput(7)]);
+    expect(await contract.cropCount()).to.equal(7);
+    expect((await contract.getCrop(7)).batchNumber).to.equal("BULK-7");
+    expect(await ownedIds(contract, farmer)).to.deep.equal([1, 2, 3, 4, 5, 6, 7]);
+  });
+
+  it("rejects empty and oversized batches", async function () {
+    const { contract, farmer, buyer } = await loadFixture(deployWithCrops);
+    const tooMany = Number(await contract.MAX_BATCH_SIZE()) + 1;
+
+    await expect(contract.connect(farmer).registerCrops([])).to.be.revertedWith("Invalid batch size");
+    await expect(
+      contract.connect(farmer).registerCrops(Array.from({ length: tooMany }, (_, i) => cropInput(i)))
+    ).to.be.revertedWith("Invalid batch size");
+
+    const transfer = { cropId: 1, to: buyer.address, note: "", ipfsDataHash: "" };
+    await expect(contract.connect(farmer).transferCrops([])).to.be.revertedWith("Invalid batch size");
+    await expect(
+      contract.connect(farmer).transferCrops(Array(tooMany).fill(transfer))
+    ).to.be.revertedWith("Invalid batch size");
+    expect(await contract.cropCount()).to.equal(5);
+  });
+
+  it("reverts the whole batch when one row is invalid", async function () {
+    const { contract, farmer, buyer } = await loadFixture(deployWithCrops);
+
+    await expect(
+      contract.connect(farmer).registerCrops([cropInput(6), cropInput(7, { latE6: 91_000_000 })])
+    ).to.be.revertedWith("Invalid latitude");
+    expect(await contract.cropCount()).to.equal(5);
+
+    await contract.connect(farmer).transferCrop(3, buyer.address, "", "");
+    await expect(
+      contract.connect(farmer).transferCrops([
+        { cropId: 1, to: buyer.address, note: "", ipfsDataHash: "" },
+        { cropId: 3, to: farmer.address, note: "", ipfsDataHash: "" },
+      ])
+    ).to.be.revertedWith("Not owner or admin");
+    expect(await ownedIds(contract, buyer)).to.deep.equal([3]);
+  });
+});